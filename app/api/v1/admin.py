@@ -1,59 +1,70 @@
 import logging
-from typing import List
+from datetime import date
+from typing import Callable, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core import auth_service, verify_token
+from app.core import Principal, auth_service, invalidate_principal, metrics, require_admin
 from app.crud import (
+    EXPORT_MEDIA_TYPES,
     add_flower_to_seller,
     create_flower,
     create_user,
+    export_orders,
     get_orders,
     get_user_by_id,
+    import_flowers,
+    import_format,
     update_user,
 )
-from app.db import get_session
+from app.db import (
+    SessionReleasingRoute,
+    commit_unit,
+    get_read_session,
+    get_read_session_factory,
+    get_write_session,
+)
 from app.db.models import Person, User, UserType
-from app.schemas import FlowerCreate, FlowerData, OrderSchema, UserData, UserRegister
+from app.schemas import (
+    FlowerCreate,
+    FlowerData,
+    FlowerImportResult,
+    OrderSchema,
+    UserData,
+    UserRegister,
+)
 
 logger: logging.Logger = logging.getLogger(__name__)
 
 
 class AdminAPI:
     def __init__(self):
-        self.router = APIRouter()
+        self.router = APIRouter(route_class=SessionReleasingRoute)
         self.router.post("/users", response_model=UserData)(self.create_user)
         self.router.delete("/users/{user_id}")(self.delete_user)
         self.router.put("/users/{user_id}", response_model=UserData)(self.admin_update_user)
         self.router.get("/users", response_model=list[UserData])(self.list_users)
         self.router.post("/flowers", response_model=FlowerData)(self.add_flower)
+        self.router.post("/flowers/import", response_model=FlowerImportResult)(self.import_flowers)
         self.router.get("/orders", response_model=List[OrderSchema])(self.admin_get_orders)
-
-    async def _check_admin(self, user_id: int, db: Session):
-        person_result = await db.execute(select(Person).filter(Person.user_id == user_id))
-        person = person_result.scalars().first()
-        if not person:
-            raise HTTPException(status_code=403, detail="Пользователь не найден")
-        user_type_result = await db.execute(
-            select(UserType).filter(UserType.id == person.user_type_id)
-        )
-        user_type = user_type_result.scalars().first()
-        if not user_type or user_type.name != "Админ":
-            raise HTTPException(status_code=403, detail="Доступ только для администратора")
+        self.router.get("/orders/export")(self.export_orders)
+        self.router.get("/metrics")(self.get_metrics)
 
     async def create_user(
         self,
         user_data: UserRegister,
-        admin_id: int = Depends(verify_token),
-        db: Session = Depends(get_session),
+        admin: Principal = Depends(require_admin),
+        db: Session = Depends(get_write_session),
     ):
-        await self._check_admin(admin_id, db)
         existing_user = await db.execute(select(User).filter(User.email == user_data.email))
         if existing_user.scalars().first():
             raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
+        # Соединение с БД не удерживается на время хеширования пароля
+        await db.close()
 
         user = await create_user(db, user_data)
         return await get_user_by_id(db, user.id)
@@ -61,10 +72,9 @@ class AdminAPI:
     async def delete_user(
         self,
         user_id: int,
-        admin_id: int = Depends(verify_token),
-        db: Session = Depends(get_session),
+        admin: Principal = Depends(require_admin),
+        db: Session = Depends(get_write_session),
     ):
-        await self._check_admin(admin_id, db)
         user_result = await db.execute(select(User).filter_by(id=user_id))
         user = user_result.scalars().first()
         if not user:
@@ -72,18 +82,21 @@ class AdminAPI:
 
         await db.execute(delete(Person).filter(Person.user_id == user_id))
         await db.execute(delete(User).filter(User.id == user_id))
-        await db.commit()
+
+        async def _after_commit() -> None:
+            invalidate_principal(user_id)
+            await auth_service.revoke_all_sessions(user_id)
+
+        await commit_unit(db, _after_commit)
         return {"detail": f"Пользователь с ID {user_id} удалён"}
 
     async def admin_update_user(
         self,
         user_id: int,
         updated_data: UserData,
-        admin_id: int = Depends(verify_token),
-        db: Session = Depends(get_session),
+        admin: Principal = Depends(require_admin),
+        db: Session = Depends(get_write_session),
     ):
-        await self._check_admin(admin_id, db)
-
         existing_user = await get_user_by_id(db, user_id)
         if not existing_user:
             raise HTTPException(status_code=404, detail="Пользователь не найден")
@@ -94,10 +107,9 @@ class AdminAPI:
 
     async def list_users(
         self,
-        admin_id: int = Depends(verify_token),
-        db: Session = Depends(get_session),
+        admin: Principal = Depends(require_admin),
+        db: Session = Depends(get_read_session),
     ):
-        await self._check_admin(admin_id, db)
         query = (
             select(User, Person, UserType)
             .join(Person, Person.user_id == User.id)
@@ -124,24 +136,63 @@ class AdminAPI:
         self,
         flower_data: FlowerCreate,
         seller_id: int,
-        admin_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        admin: Principal = Depends(require_admin),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {admin_id} пытается добавить цветок")
-        await self._check_admin(admin_id, db)
+        logger.info(f"Пользователь {admin.user_id} пытается добавить цветок")
         flower = await create_flower(db, flower_data)
         await add_flower_to_seller(db, flower.id, seller_id)
-        logger.info(f"Цветок добавлен пользователем {admin_id}, ID цветка: {flower.id}")
+        logger.info(f"Цветок добавлен пользователем {admin.user_id}, ID цветка: {flower.id}")
         return flower
 
-    async def admin_get_orders(
+    async def import_flowers(
         self,
-        admin_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        seller_id: int,
+        request: Request,
+        admin: Principal = Depends(require_admin),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {admin_id} запрашивает заказы")
-        await self._check_admin(admin_id, db)
+        """Импортировать каталог цветов из тела CSV или NDJSON.
+
+        Импорт не атомарен: строки сохраняются пачками по config.IMPORT_BATCH_SIZE.
+        Если импорт прервался, уже сохранённые пачки остаются, а ответ содержит
+        interrupted=true и их число строк в imported.
+        """
+        fmt = import_format(request.headers.get("content-type"))
+        logger.info(f"Пользователь {admin.user_id} импортирует каталог продавца {seller_id}")
+        return await import_flowers(db, request.stream(), fmt, seller_id)
 
+    async def admin_get_orders(
+        self,
+        admin: Principal = Depends(require_admin),
+        db: AsyncSession = Depends(get_read_session),
+    ):
+        logger.info(f"Пользователь {admin.user_id} запрашивает заказы")
         orders = await get_orders(db)
-        logger.info(f"Пользователь {admin_id} получил {len(orders)} заказов")
+        logger.info(f"Пользователь {admin.user_id} получил {len(orders)} заказов")
         return orders
+
+    async def export_orders(
+        self,
+        fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+        date_from: Optional[date] = Query(None),
+        date_to: Optional[date] = Query(None),
+        admin: Principal = Depends(require_admin),
+        session_factory: Callable[[], AsyncSession] = Depends(get_read_session_factory),
+    ):
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(status_code=400, detail="date_from позже date_to")
+
+        logger.info(
+            f"Пользователь {admin.user_id} выгружает заказы ({fmt}) "
+            f"за период {date_from or '...'} — {date_to or '...'}"
+        )
+        return StreamingResponse(
+            export_orders(session_factory, fmt, date_from, date_to),
+            media_type=EXPORT_MEDIA_TYPES[fmt],
+            headers={"Content-Disposition": f'attachment; filename="orders.{fmt}"'},
+        )
+
+    async def get_metrics(self, admin: Principal = Depends(require_admin)):
+        logger.info(f"Пользователь {admin.user_id} запрашивает метрики")
+        return metrics.snapshot()
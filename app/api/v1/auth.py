@@ -1,32 +1,45 @@
 import logging
-from datetime import timedelta
 
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core import auth_service, config, verify_token
-from app.crud import create_user, get_user_by_email
-from app.db import get_session
+from app.core import auth_service, auth_throttle, issue_access_token, verify_token
+from app.crud import create_user, get_user_by_email, update_password_hash
+from app.db import SessionReleasingRoute, get_read_session, get_write_session
 from app.schemas import RefreshTokenRequest, TokenResponse, UserLogin, UserRegister
 
 logger: logging.Logger = logging.getLogger(__name__)
 
 
+def _client_ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
 class AuthAPI:
     def __init__(self):
-        self.router = APIRouter()
+        self.router = APIRouter(route_class=SessionReleasingRoute)
 
         # Регистрация маршрутов
         self.router.post("/login", response_model=TokenResponse)(self.login)
         self.router.post("/refresh", response_model=TokenResponse)(self.refresh_token)
         self.router.post("/register", response_model=TokenResponse)(self.register_user)
         self.router.post("/check-token")(self.check_token)
+        self.router.post("/logout-all")(self.logout_all)
 
     async def check_token(self, _: str = Depends(verify_token)):
         return {"detail": "Токен активен"}
 
-    async def register_user(self, user_data: UserRegister, db: Session = Depends(get_session)):
+    async def logout_all(self, user_id: str = Depends(verify_token)):
+        sessions = await auth_service.revoke_all_sessions(int(user_id))
+        logger.info("Пользователь ID %s завершил все сессии (%s)", user_id, sessions)
+        return {"detail": "Все сессии завершены"}
+
+    async def register_user(
+        self, user_data: UserRegister, request: Request, db: Session = Depends(get_write_session)
+    ):
         logger.info("Начало регистрации пользователя с email: %s", user_data.email)
+        await auth_throttle.check("register", _client_ip(request), user_data.email)
 
         existing_user = await get_user_by_email(db, user_data.email)
         if existing_user:
@@ -35,37 +48,60 @@ class AuthAPI:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User with this email already exists",
             )
+        # Соединение с БД не удерживается на время хеширования пароля
+        await db.close()
 
         user = await create_user(db, user_data)
         logger.info("Пользователь успешно создан: ID %s", user.id)
 
-        access_token = auth_service.create_access_token(user.id)
-        refresh_token = auth_service.create_refresh_token(user.id)
+        access_token = await issue_access_token(db, user.id)
+        refresh_token = await auth_service.create_refresh_token(user.id)
 
         logger.info("Токены успешно сгенерированы для пользователя ID %s", user.id)
 
         return TokenResponse(access_token=access_token, refresh_token=refresh_token)
 
-    async def login(self, user_data: UserLogin, db: Session = Depends(get_session)):
+    async def login(
+        self,
+        user_data: UserLogin,
+        request: Request,
+        db: Session = Depends(get_write_session),
+        read_db: AsyncSession = Depends(get_read_session),
+    ):
         logger.info("Попытка входа для пользователя: %s", user_data.email)
+        # Лимит проверяется до поиска пользователя и bcrypt, которые и защищает
+        await auth_throttle.check("login", _client_ip(request), user_data.email)
 
-        user = await get_user_by_email(db, user_data.email)
+        user = await get_user_by_email(read_db, user_data.email)
+        # Соединение с БД не удерживается на время проверки bcrypt
+        await read_db.close()
         if not user:
             logger.warning("Неудачная попытка входа: пользователь не найден - %s", user_data.email)
             raise HTTPException(status_code=400, detail="Incorrect username or password")
 
-        if not auth_service.verify_password(user_data.password, user.password_hash):
+        valid, new_hash = await auth_service.verify_and_update(
+            user_data.password, user.password_hash
+        )
+        if not valid:
             logger.warning("Неудачная попытка входа: неверный пароль для %s", user_data.email)
             raise HTTPException(status_code=400, detail="Incorrect username or password")
 
-        access_token = auth_service.create_access_token(user.id)
-        refresh_token = auth_service.create_refresh_token(user.id)
+        # Хеш с устаревшей стоимостью bcrypt пересчитывается, пока пароль известен
+        if new_hash is not None:
+            await update_password_hash(db, user.id, new_hash)
+
+        access_token = await issue_access_token(read_db, user.id)
+        refresh_token = await auth_service.create_refresh_token(user.id)
 
         logger.info("Успешный вход для пользователя ID %s. Токены сгенерированы.", user.id)
 
         return TokenResponse(access_token=access_token, refresh_token=refresh_token)
 
-    async def refresh_token(self, token_data: RefreshTokenRequest = Body(...)):
+    async def refresh_token(
+        self,
+        token_data: RefreshTokenRequest = Body(...),
+        db: AsyncSession = Depends(get_read_session),
+    ):
         logger.info("Получен запрос на обновление токена")
 
         payload = auth_service.decode_token(token_data.refresh_token)
@@ -73,24 +109,22 @@ class AuthAPI:
             logger.error("Невалидный refresh токен")
             raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-        if auth_service.is_token_revoked(token_data.refresh_token):
-            logger.warning("Попытка использовать отозванный refresh токен")
-            raise HTTPException(status_code=401, detail="Token revoked")
-
         user_id = payload.get("sub")
         if not user_id:
             logger.error("Токен не содержит идентификатор пользователя")
             raise HTTPException(status_code=401, detail="Invalid token payload")
 
-        logger.info("Генерация новых токенов для пользователя ID %s", user_id)
+        # Проверка, удаление старой и сохранение новой сессии атомарны в Redis
+        new_refresh_token = await auth_service.rotate_refresh_token(
+            payload.get("jti"), int(user_id)
+        )
+        if new_refresh_token is None:
+            logger.warning("Попытка использовать отозванный refresh токен")
+            raise HTTPException(status_code=401, detail="Token revoked")
 
-        access_token = auth_service.create_access_token(int(user_id))
-        new_refresh_token = auth_service.create_refresh_token(int(user_id))
+        logger.info("Генерация новых токенов для пользователя ID %s", user_id)
 
-        # Отзываем старый refresh токен
-        auth_service.revoke_token(
-            token_data.refresh_token, expires_in=timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS)
-        )
+        access_token = await issue_access_token(db, int(user_id))
 
         logger.info("Старый refresh токен отозван. Выданы новые токены.")
 
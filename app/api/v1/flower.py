@@ -1,11 +1,12 @@
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core import verify_token
+from app.core import Principal, require_seller
 from app.crud import (
     add_flower_to_seller,
     create_flower,
@@ -22,14 +23,13 @@ from app.crud import (
     get_flower_usages,
     get_flowering_countries,
     get_flowering_seasons,
-    get_flowers,
+    get_flowers_page,
     get_orders_by_seller,
-    get_user_by_id,
     update_flower,
     update_password,
     update_user,
 )
-from app.db import get_session
+from app.db import SessionReleasingRoute, get_read_session, get_write_session
 from app.schemas import (
     FlowerCountryCreate,
     FlowerCreate,
@@ -53,7 +53,7 @@ logger: logging.Logger = logging.getLogger(__name__)
 
 class FlowerAPI:
     def __init__(self):
-        self.router = APIRouter()
+        self.router = APIRouter(route_class=SessionReleasingRoute)
 
         # Регистрация маршрутов
         self.router.get("/", response_model=List[FlowerData])(self.list_flowers)
@@ -74,133 +74,109 @@ class FlowerAPI:
         self.router.delete("/seasons/{season_id}")(self.remove_flower_seasons)
         self.router.delete("/usages/{usage_id}")(self.remove_flower_usages)
 
-    async def list_flower_types(self, db: AsyncSession = Depends(get_session)):
+    async def list_flower_types(self, db: AsyncSession = Depends(get_read_session)):
         return await get_flower_types(db)
 
-    async def list_flowering_seasons(self, db: AsyncSession = Depends(get_session)):
+    async def list_flowering_seasons(self, db: AsyncSession = Depends(get_read_session)):
         return await get_flowering_seasons(db)
 
-    async def list_flower_usages(self, db: AsyncSession = Depends(get_session)):
+    async def list_flower_usages(self, db: AsyncSession = Depends(get_read_session)):
         return await get_flower_usages(db)
 
-    async def list_flowering_countries(self, db: AsyncSession = Depends(get_session)):
+    async def list_flowering_countries(self, db: AsyncSession = Depends(get_read_session)):
         return await get_flowering_countries(db)
 
     async def remove_flower_types(
         self,
         type_id: int,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {user_id} пытается удалить тип цветка ID {type_id}")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
+        logger.info(f"Пользователь {principal.user_id} пытается удалить тип цветка ID {type_id}")
         await delete_flower_type(db, type_id)
-        logger.info(f"Тип цветка ID {type_id} удалён пользователем {user_id}")
+        logger.info(f"Тип цветка ID {type_id} удалён пользователем {principal.user_id}")
         return {"detail": "Тип цветка удалён успешно"}
 
     async def remove_flower_seasons(
         self,
         season_id: int,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {user_id} пытается удалить сезон цветка ID {season_id}")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
+        logger.info(
+            f"Пользователь {principal.user_id} пытается удалить сезон цветка ID {season_id}"
+        )
         await delete_flower_season(db, season_id)
-        logger.info(f"Сезон цветка ID {season_id} удалён пользователем {user_id}")
+        logger.info(f"Сезон цветка ID {season_id} удалён пользователем {principal.user_id}")
         return {"detail": "Сезон цветка удалён успешно"}
 
     async def remove_flower_usages(
         self,
         usage_id: int,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {user_id} пытается удалить использование цветка ID {usage_id}")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
+        logger.info(
+            f"Пользователь {principal.user_id} пытается удалить использование цветка ID {usage_id}"
+        )
         await delete_flower_usage(db, usage_id)
-        logger.info(f"Использование цветка ID {usage_id} удалено пользователем {user_id}")
+        logger.info(f"Использование цветка ID {usage_id} удалено пользователем {principal.user_id}")
         return {"detail": "Использование цветка удалено успешно"}
 
     async def remove_flower_countries(
         self,
         country_id: int,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {user_id} пытается удалить страну цветка ID {country_id}")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
+        logger.info(
+            f"Пользователь {principal.user_id} пытается удалить страну цветка ID {country_id}"
+        )
         await delete_flower_country(db, country_id)
-        logger.info(f"Страна цветка ID {country_id} удалена пользователем {user_id}")
+        logger.info(f"Страна цветка ID {country_id} удалена пользователем {principal.user_id}")
         return {"detail": "Страна цветка удалена успешно"}
 
     async def create_flower_countries(
         self,
         data: FlowerCountryCreate,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
         flower_country = await create_flowering_countries(db, data)
         return flower_country
 
     async def create_flower_type(
         self,
         data: FlowerTypeCreate,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
         flower_type = await create_flower_type(db, data)
         return flower_type
 
     async def create_flowering_season(
         self,
         data: FloweringSeasonCreate,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
         season = await create_flowering_season(db, data)
         return season
 
     async def create_flower_usage(
         self,
         data: FlowerUsageCreate,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
         usage = await create_flower_usage(db, data)
         return usage
 
     async def list_flowers(
         self,
+        response: Response,
         name: Optional[str] = Query(None),
+        q: Optional[str] = Query(None, max_length=200),
         flower_id: Optional[int] = Query(None),
         type_id: Optional[int] = Query(None),
         season_id: Optional[int] = Query(None),
@@ -209,21 +185,27 @@ class FlowerAPI:
         min_price: Optional[float] = Query(None),
         max_price: Optional[float] = Query(None),
         seller_id: Optional[int] = Query(None),
-        limit: int = Query(100, le=100),
+        limit: int = Query(100, ge=1, le=100),
         offset: int = Query(0, ge=0),
-        db: AsyncSession = Depends(get_session),
+        cursor: Optional[str] = Query(None, max_length=512),
+        db: AsyncSession = Depends(get_read_session),
     ):
+        if cursor and offset:
+            raise HTTPException(status_code=400, detail="cursor и offset несовместимы")
         try:
             logger.info(
                 f"Запрос списка цветов с фильтрами: "
-                f"name={name}, type_id={type_id}, season_id={season_id}, usage_id={usage_id}, "
+                f"name={name}, q={q}, type_id={type_id}, season_id={season_id}, "
+                f"usage_id={usage_id}, "
                 f"country_id={country_id}, min_price={min_price}, max_price={max_price}, "
-                f"limit={limit}, offset={offset}, seller_id={seller_id}, flower_id={flower_id}"
+                f"limit={limit}, offset={offset}, cursor={cursor}, seller_id={seller_id}, "
+                f"flower_id={flower_id}"
             )
 
             filters = FlowerFilter(
                 id=flower_id,
                 name=name,
+                q=q,
                 type_id=type_id,
                 season_id=season_id,
                 usage_id=usage_id,
@@ -232,9 +214,15 @@ class FlowerAPI:
                 max_price=max_price,
                 seller_id=seller_id,
             )
-            flowers = await get_flowers(db, filters, limit=limit, offset=offset)
-
-            logger.info(f"Найдено {len(flowers)} цветов по запросу")
-            return flowers
+            page = await get_flowers_page(db, filters, limit=limit, offset=offset, cursor=cursor)
+            if page.next_cursor:
+                # Курсор следующей страницы; тело ответа остаётся списком цветков
+                response.headers["X-Next-Cursor"] = page.next_cursor
+
+            logger.info(f"Найдено {len(page.items)} цветов по запросу")
+            return page.items
+        except (HTTPException, PoolTimeoutError):
+            # Ошибки запроса отдаются как есть, исчерпание пула — как 503 обработчиком приложения
+            raise
         except Exception:
             raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,10 +1,10 @@
 import logging
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core import verify_token
+from app.core import Principal, require_seller
 from app.crud import (
     add_flower_to_seller,
     create_flower,
@@ -22,15 +22,17 @@ from app.crud import (
     get_flowering_countries,
     get_flowering_seasons,
     get_orders_by_seller,
-    get_user_by_id,
+    import_flowers,
+    import_format,
+    toggle_order_status,
     update_flower,
 )
-from app.crud.order import get_order_by_id
-from app.db import get_session
+from app.db import SessionReleasingRoute, get_read_session, get_write_session
 from app.schemas import (
     FlowerCountryCreate,
     FlowerCreate,
     FlowerData,
+    FlowerImportResult,
     FloweringcountriesData,
     FloweringSeasonCreate,
     FloweringSeasonData,
@@ -48,9 +50,12 @@ logger = logging.getLogger(__name__)
 
 class SellerAPI:
     def __init__(self):
-        self.router = APIRouter()
+        self.router = APIRouter(route_class=SessionReleasingRoute)
 
         self.router.post("/flowers", response_model=FlowerData)(self.add_flower)
+        self.router.post("/flowers/import", response_model=FlowerImportResult)(
+            self.import_flowers
+        )
         self.router.put("/flowers/{flower_id}", response_model=FlowerData)(self.edit_flower)
         self.router.delete("/flowers/{flower_id}")(self.remove_flower)
         self.router.get("/orders", response_model=List[OrderSchema])(self.get_orders)
@@ -59,93 +64,81 @@ class SellerAPI:
     async def change_order_status(
         self,
         order_id: int,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {user_id} пытается изменить статус заказа {order_id}")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(
-                f"Доступ запрещён пользователю {user_id} для изменения статуса заказа — не продавец или админ"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Доступ разрешён только продавцам и администраторам",
-            )
+        logger.info(
+            f"Пользователь {principal.user_id} пытается изменить статус заказа {order_id}"
+        )
 
-        order = await get_order_by_id(db, order_id)
-        if not order:
+        is_closed = await toggle_order_status(db, order_id)
+        if is_closed is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Заказ не найден",
             )
 
-        order.is_closed = not order.is_closed
-        db.add(order)
-        await db.commit()
-        await db.refresh(order)
-
-        logger.info(f"Статус заказа {order_id} изменён на {'закрыт' if order.is_closed else 'открыт'}")
+        logger.info(f"Статус заказа {order_id} изменён на {'закрыт' if is_closed else 'открыт'}")
         return {"detail": "Данные заказа успешно обновлены"}
 
     async def add_flower(
         self,
         flower_data: FlowerCreate,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {user_id} пытается добавить цветок")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
+        logger.info(f"Пользователь {principal.user_id} пытается добавить цветок")
         flower = await create_flower(db, flower_data)
-        await add_flower_to_seller(db, flower.id, user_id)
-        logger.info(f"Цветок добавлен пользователем {user_id}, ID цветка: {flower.id}")
+        await add_flower_to_seller(db, flower.id, principal.user_id)
+        logger.info(f"Цветок добавлен пользователем {principal.user_id}, ID цветка: {flower.id}")
         return flower
 
+    async def import_flowers(
+        self,
+        request: Request,
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
+    ):
+        """Импортировать каталог цветов из тела CSV или NDJSON.
+
+        Импорт не атомарен: строки сохраняются пачками по config.IMPORT_BATCH_SIZE.
+        Если импорт прервался, уже сохранённые пачки остаются, а ответ содержит
+        interrupted=true и их число строк в imported.
+        """
+        # Тело CSV или NDJSON читается потоком, без загрузки файла в память
+        fmt = import_format(request.headers.get("content-type"))
+        logger.info(f"Пользователь {principal.user_id} импортирует каталог цветов")
+        return await import_flowers(db, request.stream(), fmt, principal.user_id)
+
     async def edit_flower(
         self,
         flower_id: int,
         flower_data: FlowerUpdate,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {user_id} пытается изменить цветок ID {flower_id}")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
+        logger.info(f"Пользователь {principal.user_id} пытается изменить цветок ID {flower_id}")
         updated_flower = await update_flower(db, flower_id, flower_data)
-        logger.info(f"Цветок ID {flower_id} обновлён пользователем {user_id}")
+        logger.info(f"Цветок ID {flower_id} обновлён пользователем {principal.user_id}")
         return updated_flower
 
     async def remove_flower(
         self,
         flower_id: int,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_write_session),
     ):
-        logger.info(f"Пользователь {user_id} пытается удалить цветок ID {flower_id}")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не продавец")
-            raise HTTPException(status_code=403, detail="Доступ разрешен только продавцам")
+        logger.info(f"Пользователь {principal.user_id} пытается удалить цветок ID {flower_id}")
         await delete_flower(db, flower_id)
-        logger.info(f"Цветок ID {flower_id} удалён пользователем {user_id}")
+        logger.info(f"Цветок ID {flower_id} удалён пользователем {principal.user_id}")
         return {"detail": "Цветок удалён успешно"}
 
     async def get_orders(
         self,
-        user_id: int = Depends(verify_token),
-        db: AsyncSession = Depends(get_session),
+        principal: Principal = Depends(require_seller),
+        db: AsyncSession = Depends(get_read_session),
     ):
-        logger.info(f"Пользователь {user_id} запрашивает свои заказы")
-        user = await get_user_by_id(db, user_id)
-        if not user or not (user.is_user_seller or user.is_user_admin):
-            logger.warning(f"Доступ запрещён для пользователя {user_id}: не покупатель")
-            raise HTTPException(403, "Доступ разрешен только покупателям")
-
-        orders = await get_orders_by_seller(db, user_id)
-        logger.info(f"Пользователь {user_id} получил {len(orders)} заказов")
+        logger.info(f"Пользователь {principal.user_id} запрашивает свои заказы")
+        orders = await get_orders_by_seller(db, principal.user_id)
+        logger.info(f"Пользователь {principal.user_id} получил {len(orders)} заказов")
         return orders
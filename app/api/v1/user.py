@@ -1,11 +1,12 @@
 import logging
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.core import auth_service, verify_token
+from app.core import optional_token_claims, verify_token
 from app.crud import get_user_by_id, update_password, update_user
-from app.db import get_session
+from app.db import SessionReleasingRoute, get_read_session, get_write_session
 from app.schemas import UserData
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -13,7 +14,7 @@ logger: logging.Logger = logging.getLogger(__name__)
 
 class UserAPI:
     def __init__(self):
-        self.router = APIRouter()
+        self.router = APIRouter(route_class=SessionReleasingRoute)
 
         # Регистрация маршрутов
         self.router.get("/", response_model=UserData)(self.get_user)
@@ -24,16 +25,12 @@ class UserAPI:
     async def get_user_by_id(
         self,
         user_id: int,
-        token: str = Header(None, alias="X-Token"),
-        db: Session = Depends(get_session),
+        claims: Optional[Dict[str, Any]] = Depends(optional_token_claims),
+        db: Session = Depends(get_read_session),
     ):
         get_user_data = None
-        if token is not None:
-            payload = auth_service.decode_token(token)
-            if payload is not None:
-                get_user_id: str = payload.get("sub")
-                if get_user_id is not None:
-                    get_user_data = await get_user_by_id(db, get_user_id)
+        if claims is not None:
+            get_user_data = await get_user_by_id(db, claims["sub"])
 
         logger.info(f"Запрос данных пользователя с ID: {user_id}")
         user_data = await get_user_by_id(db, user_id)
@@ -49,7 +46,7 @@ class UserAPI:
                 get_user_data is None
                 or not (get_user_data.is_user_seller or get_user_data.is_user_admin)
             )
-            and get_user_data.id != user_id
+            and (get_user_data is None or get_user_data.id != user_id)
             and not user_data.is_user_seller
         ):
             raise HTTPException(
@@ -60,7 +57,7 @@ class UserAPI:
         return user_data
 
     async def get_user(
-        self, user_id: str = Depends(verify_token), db: Session = Depends(get_session)
+        self, user_id: str = Depends(verify_token), db: Session = Depends(get_read_session)
     ):
         logger.info(f"Запрос данных пользователя с ID: {user_id}")
         user_data = await get_user_by_id(db, user_id)
@@ -77,7 +74,7 @@ class UserAPI:
         self,
         user_data: UserData,
         user_id: str = Depends(verify_token),
-        db: Session = Depends(get_session),
+        db: Session = Depends(get_write_session),
     ):
         logger.info(f"Пользователь с ID {user_id} пытается обновить свои данные")
         await update_user(db, user_id, user_data)
@@ -88,7 +85,7 @@ class UserAPI:
         self,
         new_password: str,
         user_id: str = Depends(verify_token),
-        db: Session = Depends(get_session),
+        db: Session = Depends(get_write_session),
     ):
         logger.info(f"Пользователь с ID {user_id} пытается изменить пароль")
         await update_password(db, user_id, new_password)
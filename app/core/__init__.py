@@ -1,6 +1,32 @@
 from .config import config
 from .logger import setup_logger
+from .metrics import metrics
+from .principal import (
+    Principal,
+    current_principal,
+    invalidate_principal,
+    issue_access_token,
+    require_admin,
+    require_seller,
+)
 from .security import auth_service
-from .token import verify_token
+from .throttle import auth_throttle
+from .token import get_token_claims, optional_token_claims, token_claims, verify_token
 
-__all__ = ["config", "setup_logger", "auth_service", "verify_token"]
+__all__ = [
+    "config",
+    "setup_logger",
+    "metrics",
+    "auth_service",
+    "auth_throttle",
+    "verify_token",
+    "get_token_claims",
+    "token_claims",
+    "optional_token_claims",
+    "Principal",
+    "current_principal",
+    "invalidate_principal",
+    "issue_access_token",
+    "require_admin",
+    "require_seller",
+]
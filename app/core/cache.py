@@ -0,0 +1,88 @@
+"""Модуль in-process кэша с ограничением размера и временем жизни записей.
+
+Предоставляет класс TTLCache — LRU-кэш для горячих данных, которые дорого получать
+из БД или Redis на каждом запросе. Кэш ведёт счётчики попаданий и промахов, чтобы
+эффект кэширования можно было измерить.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """LRU-кэш с ограничением числа записей и временем жизни каждой записи.
+
+    Кэш не потокобезопасен и рассчитан на использование из одного event loop.
+    Размер 0 отключает кэширование: все обращения считаются промахами.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получить значение по ключу.
+
+        Args:
+            key: Ключ записи.
+
+        Returns:
+            Optional[Any]: Сохранённое значение или None, если записи нет или она устарела.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Сохранить значение, вытеснив самую старую запись при переполнении.
+
+        Args:
+            key: Ключ записи.
+            value: Сохраняемое значение.
+            ttl: Время жизни записи в секундах. По умолчанию используется ttl кэша.
+        """
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удалить запись по ключу, если она есть."""
+        self._data.pop(key, None)
+
+    def keys(self) -> List[Hashable]:
+        """Получить ключи записей, включая ещё не удалённые устаревшие."""
+        return list(self._data)
+
+    def clear(self) -> None:
+        """Удалить все записи и сбросить счётчики."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Получить текущий размер кэша и счётчики попаданий и промахов."""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -4,7 +4,10 @@
 Позволяет управлять параметрами базы данных, пагинацией и внешними ресурсами.
 """
 
-from pydantic import ConfigDict
+import os
+from typing import List, Optional
+
+from pydantic import ConfigDict, Field
 from pydantic_settings import BaseSettings
 
 
@@ -15,17 +18,96 @@ class Config(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Настройки пула процессов для bcrypt
+    PASSWORD_HASH_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+
+    # Стоимость bcrypt; BCRYPT_ROUNDS под целевую задержку BCRYPT_TARGET_MS
+    # подбирается бенчмарком benchmarks/bench_bcrypt.py
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: float = 250.0
+
+    # Ограничение попыток входа и регистрации (скользящее окно в секундах)
+    AUTH_RATE_LIMIT_WINDOW: float = 60.0
+    AUTH_RATE_LIMIT_PER_IP: int = 20
+    AUTH_RATE_LIMIT_PER_EMAIL: int = 5
+    # Число окон в памяти процесса на случай недоступности Redis
+    AUTH_RATE_LIMIT_LOCAL_KEYS: int = 10000
+
+    # Настройки кэша principal (роль и персона пользователя)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60.0
+
+    # Размер кэша декодированных JWT (0 — кэш отключён)
+    TOKEN_CACHE_SIZE: int = 10000
+
+    # Заголовок Server-Timing с числом и временем SQL-запросов, команд Redis и
+    # вычислений bcrypt; его можно отключить, чтобы не раскрывать замеры клиентам
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Импорт каталога: строк в одной пачке executemany, ошибок строк в ответе и
+    # наибольший размер строки (записи CSV) в байтах
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_ERRORS: int = 1000
+    IMPORT_MAX_LINE_BYTES: int = 64 * 1024
+
+    # Выгрузка заказов: строк, получаемых из курсора БД за одну порцию
+    EXPORT_FETCH_SIZE: int = 1000
+
+    # Бюджет холодного старта воркера: при превышении этапы запуска пишутся в лог
+    # с уровнем WARNING
+    STARTUP_BUDGET_MS: float = 2000.0
+
+    # Синхронизация локального зеркала версий токенов: канал pub/sub, срок, после
+    # которого версия пользователя перечитывается из Redis, и размер зеркала
+    REVOCATION_CHANNEL: str = "token_revocations"
+    REVOCATION_RESYNC_SECONDS: float = 60.0
+    TOKEN_VERSION_CACHE_SIZE: int = 100000
+
     # Настройки Redis
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_DB: int
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+
+    # Строка подключения к БД целиком; если не задана, собирается из POSTGRES_*,
+    # а без них используется локальный файл SQLite
+    DATABASE_URL: Optional[str] = None
+    SQLITE_PATH: str = "flowers.db"
+
+    # Настройки пула соединений с БД
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Профиль SQLite: прагмы каждого соединения и размер пула читателей
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_READ_POOL_SIZE: int = 4
+
+    # Реплики для чтения: список строк подключения, стратегия выбора
+    # (round_robin или least_connections) и окно read-your-writes после записи
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_STRATEGY: str = "round_robin"
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
 
     # Настройки PostgreSQL
-    POSTGRES_HOST: str
-    POSTGRES_PORT: int
-    POSTGRES_DB: str
-    POSTGRES_USER: str
-    POSTGRES_PASSWORD: str
+    POSTGRES_HOST: Optional[str] = None
+    POSTGRES_PORT: int = 5432
+    POSTGRES_DB: Optional[str] = None
+    POSTGRES_USER: Optional[str] = None
+    POSTGRES_PASSWORD: Optional[str] = None
 
     @property
     def POSTGRES_URL(self) -> str:
@@ -34,6 +116,14 @@ class Config(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def DB_URL(self) -> str:
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
+        if self.POSTGRES_HOST:
+            return self.POSTGRES_URL
+        return f"sqlite+aiosqlite:///{self.SQLITE_PATH}"
+
     # Конфигурация загрузки переменных окружения
     model_config = ConfigDict(env_file=".env")  # type: ignore
     _ = model_config  # type: ignore
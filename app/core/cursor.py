@@ -0,0 +1,46 @@
+"""Модуль курсоров keyset-пагинации.
+
+Курсор — непрозрачная для клиента строка: base64url от JSON с ключом сортировки
+и id последней выданной записи. Следующая страница начинается строго после этой
+позиции, поэтому её стоимость не зависит от номера страницы, в отличие от offset.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Упаковать позицию последней записи страницы в курсор.
+
+    Args:
+        position: Значения ключа сортировки, сериализуемые в JSON.
+
+    Returns:
+        str: Курсор без символов дополнения base64.
+    """
+    data = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Распаковать курсор, полученный от клиента.
+
+    Args:
+        cursor: Курсор из предыдущего ответа.
+
+    Returns:
+        Dict[str, Any]: Позиция последней записи страницы.
+
+    Raises:
+        ValueError: Если курсор повреждён.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Некорректный курсор") from e
+    if not isinstance(position, dict):
+        raise ValueError("Некорректный курсор")
+    return position
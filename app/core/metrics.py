@@ -0,0 +1,45 @@
+"""Модуль сбора метрик приложения.
+
+Предоставляет реестр простых счётчиков и источников метрик (кэши, пулы соединений),
+снимок которых отдаётся администраторам через API.
+"""
+
+from collections import defaultdict
+from typing import Any, Callable, Dict
+
+
+class MetricsRegistry:
+    """Реестр счётчиков и источников метрик одного процесса."""
+
+    def __init__(self):
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        """Увеличить счётчик.
+
+        Args:
+            name: Имя счётчика.
+            value: Величина приращения. Default: 1.
+        """
+        self._counters[name] += value
+
+    def register(self, name: str, source: Callable[[], Dict[str, Any]]) -> None:
+        """Зарегистрировать источник метрик, опрашиваемый при построении снимка.
+
+        Args:
+            name: Имя раздела метрик в снимке.
+            source: Функция, возвращающая словарь текущих значений.
+        """
+        self._sources[name] = source
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Получить текущие значения всех счётчиков и источников метрик."""
+        result: Dict[str, Any] = {"counters": dict(self._counters)}
+        for name, source in self._sources.items():
+            result[name] = source()
+        return result
+
+
+# Единственный реестр метрик процесса
+metrics = MetricsRegistry()
@@ -0,0 +1,160 @@
+"""Модуль определения текущего пользователя (principal) для защищённых эндпоинтов.
+
+Роль пользователя нужна почти каждому защищённому обработчику, поэтому результат
+разрешения кэшируется в процессе и явно сбрасывается при изменении или удалении
+пользователя. Зависимости require_seller и require_admin строятся поверх кэша.
+
+Access токены несут компактные claims роли (role) и персоны (pid), поэтому для
+них principal восстанавливается из токена без обращения к БД. Актуальность claims
+гарантирует версия токенов пользователя (ver), увеличиваемая при смене роли.
+"""
+
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import config
+from app.core.metrics import metrics
+from app.core.revocation import revocation_mirror
+from app.core.security import auth_service
+from app.core.token import token_claims
+from app.db import get_read_session
+from app.db.models import Person, UserType
+
+logger = logging.getLogger(__name__)
+
+
+class Principal(NamedTuple):
+    user_id: int
+    person_id: int
+    role: str
+
+    @property
+    def is_seller(self) -> bool:
+        return self.role == "Продавец"
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "Админ"
+
+
+# Компактные коды ролей для claims access токена
+ROLE_CODES = {"Покупатель": "b", "Продавец": "s", "Админ": "a"}
+_ROLE_NAMES = {code: name for name, code in ROLE_CODES.items()}
+
+# Запрос собран один раз и при промахе кэша только получает параметр
+PRINCIPAL_QUERY = (
+    select(Person.id, UserType.name)
+    .join(UserType, UserType.id == Person.user_type_id)
+    .where(Person.user_id == bindparam("user_id"))
+)
+
+principal_cache = TTLCache(maxsize=config.PRINCIPAL_CACHE_SIZE, ttl=config.PRINCIPAL_CACHE_TTL)
+metrics.register("principal_cache", principal_cache.stats)
+
+
+async def load_principal(
+    db: AsyncSession, user_id: int, fresh: bool = False
+) -> Optional[Principal]:
+    """Получить principal пользователя из кэша или одним запросом к БД.
+
+    Args:
+        db: Асинхронная сессия SQLAlchemy.
+        user_id: Идентификатор пользователя.
+        fresh: Прочитать principal из БД в обход кэша и обновить кэш.
+
+    Returns:
+        Optional[Principal]: Principal пользователя или None, если персона не найдена.
+    """
+    if not fresh:
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+    result = await db.execute(PRINCIPAL_QUERY, {"user_id": user_id})
+    row = result.first()
+    if row is None:
+        logger.warning(f"Персона пользователя с ID {user_id} не найдена")
+        return None
+
+    principal = Principal(user_id=user_id, person_id=row[0], role=row[1])
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Сбросить закэшированный principal пользователя после изменения его данных."""
+    principal_cache.invalidate(int(user_id))
+    logger.debug(f"Кэш principal сброшен для пользователя {user_id}")
+
+
+# Смена версии токенов на любом воркере означает смену роли или удаление пользователя
+revocation_mirror.on_version_change(invalidate_principal)
+
+
+def principal_from_claims(claims: Dict[str, Any]) -> Optional[Principal]:
+    """Восстановить principal из claims access токена, если они в нём есть."""
+    role = claims.get("role")
+    person_id = claims.get("pid")
+    if role is None or person_id is None:
+        return None
+    return Principal(
+        user_id=int(claims["sub"]), person_id=person_id, role=_ROLE_NAMES.get(role, role)
+    )
+
+
+async def issue_access_token(db: AsyncSession, user_id: int) -> str:
+    """Выпустить access токен с claims роли и текущей версией токенов пользователя.
+
+    Args:
+        db: Асинхронная сессия SQLAlchemy.
+        user_id: Идентификатор пользователя.
+
+    Returns:
+        str: Подписанный access токен.
+    """
+    # Версия читается из Redis: зеркало этого воркера могло пропустить увеличение,
+    # и токен со старой версией отклонили бы остальные воркеры
+    claims: Dict[str, Any] = {"ver": await auth_service.current_token_version(user_id)}
+    # Роль читается из БД: токен с новой версией не должен нести роль из кэша,
+    # который мог устареть на этом воркере
+    principal = await load_principal(db, user_id, fresh=True)
+    if principal is not None:
+        claims["role"] = ROLE_CODES.get(principal.role, principal.role)
+        claims["pid"] = principal.person_id
+    return auth_service.create_access_token(user_id, **claims)
+
+
+async def current_principal(
+    claims: Dict[str, Any] = Depends(token_claims),
+    db: AsyncSession = Depends(get_read_session),
+) -> Principal:
+    principal = principal_from_claims(claims)
+    if principal is None:
+        # Токены, выпущенные до появления claims роли
+        principal = await load_principal(db, int(claims["sub"]))
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Пользователь не найден")
+    return principal
+
+
+async def require_seller(principal: Principal = Depends(current_principal)) -> Principal:
+    if not (principal.is_seller or principal.is_admin):
+        logger.warning(f"Доступ запрещён для пользователя {principal.user_id}: не продавец")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Доступ разрешен только продавцам"
+        )
+    return principal
+
+
+async def require_admin(principal: Principal = Depends(current_principal)) -> Principal:
+    if not principal.is_admin:
+        logger.warning(f"Доступ запрещён для пользователя {principal.user_id}: не администратор")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Доступ только для администратора"
+        )
+    return principal
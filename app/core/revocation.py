@@ -0,0 +1,148 @@
+"""Модуль локального зеркала версий токенов пользователей.
+
+Увеличение версии при смене роли, пароля или удалении пользователя делает
+недействительными все выданные ему ранее access токены. Проверка версии нужна на
+каждом аутентифицированном запросе, поэтому версии держатся в памяти процесса:
+новые приходят через pub/sub, а версия пользователя, которой нет в зеркале,
+читается из Redis одним GET и хранится не дольше resync_interval. Полного
+перечитывания ключей Redis нет: зеркало ограничено по размеру, а ключ версии в
+Redis удаляется через TOKEN_VERSION_TTL после её увеличения или последнего
+выпуска токена с ней.
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Callable, List, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import config
+from app.core.metrics import metrics
+from app.db.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Префикс ключей версий токенов в Redis
+TOKEN_VERSION_PREFIX = "token_version:"
+# Срок жизни ключа версии: не меньше времени жизни access токена, который её несёт
+TOKEN_VERSION_TTL = config.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+def token_digest(token: str) -> str:
+    """Получить компактный идентификатор токена для кэшей и токенов без jti."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationMirror:
+    """Версии токенов пользователей в памяти процесса, синхронизируемые с Redis."""
+
+    def __init__(self, channel: str, resync_interval: float, cache_size: int = 100000):
+        self.channel = channel
+        self.resync_interval = resync_interval
+        # Версия, не подтверждённая pub/sub дольше resync_interval, перечитывается из Redis
+        self._versions = TTLCache(maxsize=cache_size, ttl=resync_interval)
+        self._version_listeners: List[Callable[[int], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def token_version(self, user_id: int | str) -> int:
+        """Текущая версия токенов пользователя; 0, если версия ни разу не менялась.
+
+        Версия, которой нет в зеркале, читается из Redis. Если Redis недоступен,
+        считается, что версия не менялась.
+        """
+        key = str(user_id)
+        version = self._versions.get(key)
+        if version is not None:
+            return version
+        try:
+            value = await get_redis().get(f"{TOKEN_VERSION_PREFIX}{key}")
+        except RedisError as e:
+            logger.warning(f"Не удалось прочитать версию токенов пользователя {key}: {e}")
+            metrics.inc("revocation.redis_fallback")
+            return 0
+        version = int(value) if value is not None else 0
+        # Прочитанная версия не новая: кэши подписчиков сбрасывать не нужно
+        self._versions.set(key, version)
+        return version
+
+    def set_token_version(self, user_id: int | str, version: int) -> None:
+        """Запомнить новую версию токенов пользователя, не допуская отката назад."""
+        key = str(user_id)
+        current = self._versions.get(key)
+        if current is not None and version < current:
+            return
+        self._versions.set(key, version)
+        if version > (current or 0):
+            self._notify_version_change(key)
+
+    def on_version_change(self, listener: Callable[[int], None]) -> None:
+        """Вызывать listener(user_id) при каждом увеличении версии токенов пользователя.
+
+        Так кэши других модулей (например, principal) сбрасываются на всех воркерах,
+        а не только на том, который изменил пользователя.
+        """
+        self._version_listeners.append(listener)
+
+    def _notify_version_change(self, user_id: str) -> None:
+        for listener in self._version_listeners:
+            listener(int(user_id))
+
+    def reset(self) -> None:
+        """Забыть все версии: они будут перечитаны из Redis при следующей проверке.
+
+        Кэши, подписанные на смену версий, сбрасываются для каждого известного
+        пользователя, поскольку увеличения могли быть пропущены.
+        """
+        known = self._versions.keys()
+        self._versions.clear()
+        for user_id in known:
+            self._notify_version_change(user_id)
+
+    def _apply_message(self, data: str) -> None:
+        kind, _, payload = data.partition(":")
+        if kind == "version":
+            user_id, _, version = payload.partition(":")
+            self.set_token_version(user_id, int(version))
+        else:
+            logger.warning(f"Неизвестное сообщение в канале версий токенов: {data}")
+
+    async def _listen(self, redis: Redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._apply_message(message["data"])
+            except RedisError as e:
+                logger.warning(f"Потеряна связь с Redis в зеркале версий токенов: {e}")
+                # Сообщения, пропущенные без подписки, заменяются чтением версий заново
+                self.reset()
+                await asyncio.sleep(1)
+
+    async def start(self, redis: Redis) -> None:
+        """Запустить фоновую подписку зеркала на новые версии токенов."""
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._listen(redis))
+
+    async def stop(self) -> None:
+        """Остановить фоновую синхронизацию."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocation_mirror = RevocationMirror(
+    channel=config.REVOCATION_CHANNEL,
+    resync_interval=config.REVOCATION_RESYNC_SECONDS,
+    cache_size=config.TOKEN_VERSION_CACHE_SIZE,
+)
+metrics.register("token_versions", revocation_mirror._versions.stats)
@@ -1,57 +1,248 @@
+import asyncio
 import logging
+import multiprocessing
+import secrets
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Tuple
 
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from redis.asyncio import Redis
 
 from app.core.config import config
-from app.db.redis import redis_client
+from app.core.revocation import TOKEN_VERSION_PREFIX, TOKEN_VERSION_TTL, revocation_mirror
+from app.core.timing import timed
+from app.db.redis import get_redis
 
 logger = logging.getLogger(__name__)
 
+# Контекст bcrypt на уровне модуля: он же используется в процессах пула хеширования.
+# Хеши с другой стоимостью считаются устаревшими и пересчитываются при входе.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=config.BCRYPT_ROUNDS
+)
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _new_jti() -> str:
+    return secrets.token_urlsafe(8)
+
+
+# Ключи сессий: refresh токен хранится по короткому jti, а все jti пользователя
+# собраны в множество, чтобы завершать все его сессии одной операцией
+REFRESH_PREFIX = "rt:"
+USER_SESSIONS_PREFIX = "rt_user:"
+
+# Атомарная ротация refresh токена: проверка владельца, удаление старой сессии
+# и сохранение новой выполняются за один round-trip.
+# KEYS: rt:{old_jti}, rt:{new_jti}, rt_user:{user_id}
+# ARGV: old_jti, new_jti, user_id, TTL новой сессии
+ROTATE_REFRESH_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[3] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[3], ARGV[1])
+redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[4])
+redis.call('SADD', KEYS[3], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+return 1
+"""
+
+# Завершение всех сессий пользователя: удаление его refresh токенов и увеличение
+# версии токенов, которое отзывает выданные access токены во всех воркерах.
+# KEYS: rt_user:{user_id}, token_version:{user_id}
+# ARGV: префикс ключей refresh токенов, user_id, канал синхронизации, TTL версии
+REVOKE_SESSIONS_SCRIPT = """
+local jtis = redis.call('SMEMBERS', KEYS[1])
+local keys = {}
+for _, jti in ipairs(jtis) do
+    keys[#keys + 1] = ARGV[1] .. jti
+    if #keys == 1000 then
+        redis.call('DEL', unpack(keys))
+        keys = {}
+    end
+end
+if #keys > 0 then
+    redis.call('DEL', unpack(keys))
+end
+redis.call('DEL', KEYS[1])
+local version = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+redis.call('PUBLISH', ARGV[3], 'version:' .. ARGV[2] .. ':' .. version)
+return {#jtis, version}
+"""
+
+# Увеличение версии токенов пользователя и оповещение остальных воркеров одной
+# атомарной операцией: версия не может измениться без сообщения в канал.
+# KEYS: token_version:{user_id}
+# ARGV: user_id, канал синхронизации, TTL версии
+BUMP_TOKEN_VERSION_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('PUBLISH', ARGV[2], 'version:' .. ARGV[1] .. ':' .. version)
+return version
+"""
+
 
 class AuthService:
     def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = pwd_context
         self.secret_key = config.SECRET_KEY
         self.algorithm = config.ALGORITHM
         self.access_token_expire_minutes = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
         self.refresh_token_expire_days = timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS)
-        self.redis = redis_client
+        self.hash_workers = config.PASSWORD_HASH_WORKERS
+        self.hash_queue_limit = config.PASSWORD_HASH_QUEUE_LIMIT
+        self._hash_executor: Optional[ProcessPoolExecutor] = None
+        self._hash_pending = 0
 
-    def get_password_hash(self, password: str) -> str:
-        hashed = self.pwd_context.hash(password)
+    @property
+    def redis(self) -> Redis:
+        return get_redis()
+
+    def _get_hash_executor(self) -> ProcessPoolExecutor:
+        if self._hash_executor is None:
+            self._hash_executor = ProcessPoolExecutor(
+                max_workers=self.hash_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Запущен пул хеширования паролей: {self.hash_workers} процессов")
+        return self._hash_executor
+
+    async def _run_in_hash_pool(self, func: Callable[..., Any], *args: Any) -> Any:
+        # bcrypt намеренно медленный: не даём очереди расти бесконечно под нагрузкой
+        if self._hash_pending >= self.hash_queue_limit:
+            logger.warning(f"Очередь хеширования переполнена: {self._hash_pending} задач в работе")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервис перегружен, повторите попытку позже",
+                headers={"Retry-After": "1"},
+            )
+        self._hash_pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            with timed("hash"):
+                return await loop.run_in_executor(self._get_hash_executor(), func, *args)
+        finally:
+            self._hash_pending -= 1
+
+    async def hash_password(self, password: str) -> str:
+        hashed = await self._run_in_hash_pool(_hash_password, password)
         logger.debug("Пароль успешно захеширован")
         return hashed
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        valid = self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        valid = await self._run_in_hash_pool(_verify_password, plain_password, hashed_password)
         logger.debug(f"Проверка пароля: {'успешно' if valid else 'неудачно'}")
         return valid
 
-    def create_access_token(self, user_id: int) -> str:
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        valid, new_hash = await self._run_in_hash_pool(
+            _verify_and_update, plain_password, hashed_password
+        )
+        logger.debug(f"Проверка пароля: {'успешно' if valid else 'неудачно'}")
+        if new_hash is not None:
+            logger.info("Хеш пароля устарел и пересчитан с текущей стоимостью bcrypt")
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        if self._hash_executor is not None:
+            self._hash_executor.shutdown(wait=False, cancel_futures=True)
+            self._hash_executor = None
+            logger.info("Пул хеширования паролей остановлен")
+
+    def create_access_token(self, user_id: int, **claims: Any) -> str:
         expire = datetime.now(timezone.utc) + self.access_token_expire_minutes
-        to_encode = {"sub": str(user_id), "exp": expire}
+        to_encode = {"sub": str(user_id), "exp": expire, "jti": _new_jti(), **claims}
         token = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         logger.info(f"Создан access токен для пользователя с id={user_id}")
         return token
 
-    def create_refresh_token(self, user_id: int) -> str:
+    def _encode_refresh_token(self, user_id: int, jti: str) -> str:
         expire = datetime.now(timezone.utc) + self.refresh_token_expire_days
-        to_encode = {"sub": str(user_id), "exp": expire}
-        token = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        self.redis.setex(f"refresh_token:{token}", self.refresh_token_expire_days, user_id)
+        to_encode = {"sub": str(user_id), "exp": expire, "jti": jti}
+        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+
+    async def create_refresh_token(self, user_id: int) -> str:
+        jti = _new_jti()
+        token = self._encode_refresh_token(user_id, jti)
+        ttl = int(self.refresh_token_expire_days.total_seconds())
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.setex(f"{REFRESH_PREFIX}{jti}", ttl, user_id)
+            pipe.sadd(f"{USER_SESSIONS_PREFIX}{user_id}", jti)
+            pipe.expire(f"{USER_SESSIONS_PREFIX}{user_id}", ttl)
+            with timed("redis"):
+                await pipe.execute()
         logger.info(f"Создан refresh токен и сохранён в Redis для пользователя с id={user_id}")
         return token
 
-    def revoke_token(self, token: str, expires_in: int):
-        self.redis.setex(f"blacklist:{token}", expires_in, "true")
-        logger.info(f"Токен занесён в черный список на {expires_in} секунд")
+    async def rotate_refresh_token(self, jti: Optional[str], user_id: int) -> Optional[str]:
+        if not jti:
+            return None
+
+        new_jti = _new_jti()
+        new_token = self._encode_refresh_token(user_id, new_jti)
+        rotate = self.redis.register_script(ROTATE_REFRESH_SCRIPT)
+        with timed("redis"):
+            rotated = await rotate(
+                keys=[
+                    f"{REFRESH_PREFIX}{jti}",
+                    f"{REFRESH_PREFIX}{new_jti}",
+                    f"{USER_SESSIONS_PREFIX}{user_id}",
+                ],
+                args=[jti, new_jti, user_id, int(self.refresh_token_expire_days.total_seconds())],
+            )
+        if not rotated:
+            logger.warning(f"Повторная ротация refresh токена пользователя с id={user_id}")
+            return None
+        logger.info(f"Refresh токен пользователя с id={user_id} ротирован")
+        return new_token
+
+    async def revoke_all_sessions(self, user_id: int) -> int:
+        revoke = self.redis.register_script(REVOKE_SESSIONS_SCRIPT)
+        with timed("redis"):
+            sessions, version = await revoke(
+                keys=[f"{USER_SESSIONS_PREFIX}{user_id}", f"{TOKEN_VERSION_PREFIX}{user_id}"],
+                args=[REFRESH_PREFIX, user_id, revocation_mirror.channel, TOKEN_VERSION_TTL],
+            )
+        revocation_mirror.set_token_version(user_id, version)
+        logger.info(f"Завершено {sessions} сессий пользователя с id={user_id}")
+        return sessions
+
+    async def bump_token_version(self, user_id: int) -> int:
+        bump = self.redis.register_script(BUMP_TOKEN_VERSION_SCRIPT)
+        with timed("redis"):
+            version = await bump(
+                keys=[f"{TOKEN_VERSION_PREFIX}{user_id}"],
+                args=[user_id, revocation_mirror.channel, TOKEN_VERSION_TTL],
+            )
+        revocation_mirror.set_token_version(user_id, version)
+        logger.info(f"Версия токенов пользователя с id={user_id} увеличена до {version}")
+        return version
 
-    def is_token_revoked(self, token: str) -> bool:
-        revoked = self.redis.exists(f"blacklist:{token}") == 1
-        logger.debug(f"Проверка, занесён ли токен в черный список: {'да' if revoked else 'нет'}")
-        return revoked
+    async def current_token_version(self, user_id: int) -> int:
+        # Ключ версии живёт, пока жив хотя бы один access токен с этой версией
+        with timed("redis"):
+            value = await self.redis.getex(f"{TOKEN_VERSION_PREFIX}{user_id}", ex=TOKEN_VERSION_TTL)
+        version = int(value) if value is not None else 0
+        # Воркер мог пропустить сообщение об увеличении версии: зеркало догоняет Redis
+        revocation_mirror.set_token_version(user_id, version)
+        return version
 
     def decode_token(self, token: str):
         try:
@@ -0,0 +1,120 @@
+"""Модуль ограничения частоты попыток входа и регистрации.
+
+Каждая попытка входа или регистрации стоит полного вычисления bcrypt, поэтому
+попытки ограничиваются скользящим окном по IP-адресу и по email ещё до обращения
+к БД и хеширования. Окна хранятся в отсортированных множествах Redis и общие для
+всех воркеров; при недоступности Redis используется окно в памяти процесса.
+Локальные окна хранятся в TTLCache: окно без попыток дольше своей ширины
+удаляется, а число окон ограничено, и старые вытесняются.
+"""
+
+import logging
+import math
+import secrets
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import config
+from app.core.metrics import metrics
+from app.core.timing import timed
+from app.db.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Атомарный шаг скользящего окна: удаление устаревших попыток, проверка лимита
+# и регистрация новой попытки. Возвращает 0 или число миллисекунд до освобождения окна.
+# KEYS: ключ окна; ARGV: текущее время (мс), ширина окна (мс), лимит, id попытки
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return math.max(tonumber(oldest[2]) + window - now, 1)
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+return 0
+"""
+
+
+class SlidingWindowThrottle:
+    """Ограничитель попыток со скользящим окном по IP-адресу и email."""
+
+    def __init__(self, ip_limit: int, email_limit: int, window: float, local_keys: int = 10000):
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.window = window
+        self._local = TTLCache(maxsize=local_keys, ttl=window)
+
+    def _hit_local(self, key: str, limit: int) -> float:
+        now = time.monotonic()
+        attempts: Deque[float] = self._local.get(key) or deque()
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        if len(attempts) >= limit:
+            return attempts[0] + self.window - now
+        attempts.append(now)
+        # Окно живёт, пока в нём есть попытки: срок отсчитывается от последней
+        self._local.set(key, attempts)
+        return 0.0
+
+    async def _hit(self, key: str, limit: int) -> float:
+        window_ms = int(self.window * 1000)
+        try:
+            script = get_redis().register_script(SLIDING_WINDOW_SCRIPT)
+            with timed("redis"):
+                retry_ms = await script(
+                    keys=[key],
+                    args=[int(time.time() * 1000), window_ms, limit, secrets.token_hex(4)],
+                )
+            return retry_ms / 1000
+        except RedisError as e:
+            logger.warning(f"Redis недоступен, ограничение попыток ведётся локально: {e}")
+            metrics.inc("throttle.redis_fallback")
+            return self._hit_local(key, limit)
+
+    async def check(self, scope: str, ip: Optional[str], email: Optional[str]) -> None:
+        """Зарегистрировать попытку или отклонить её при превышении лимита.
+
+        Args:
+            scope: Вид попытки, например "login" или "register".
+            ip: IP-адрес клиента.
+            email: Email, указанный в попытке.
+
+        Raises:
+            HTTPException: 429, если превышен лимит по IP-адресу или по email.
+        """
+        limits = []
+        if ip:
+            limits.append(("ip", f"throttle:{scope}:ip:{ip}", self.ip_limit))
+        if email:
+            limits.append(("email", f"throttle:{scope}:email:{email.lower()}", self.email_limit))
+
+        for kind, key, limit in limits:
+            retry_after = await self._hit(key, limit)
+            if retry_after > 0:
+                metrics.inc(f"throttle.{scope}.{kind}.rejected")
+                logger.warning(f"Превышен лимит попыток {scope} по {kind}: {key}")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Слишком много попыток, повторите позже",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+
+    def reset(self) -> None:
+        """Очистить локальные окна попыток."""
+        self._local.clear()
+
+
+auth_throttle = SlidingWindowThrottle(
+    ip_limit=config.AUTH_RATE_LIMIT_PER_IP,
+    email_limit=config.AUTH_RATE_LIMIT_PER_EMAIL,
+    window=config.AUTH_RATE_LIMIT_WINDOW,
+    local_keys=config.AUTH_RATE_LIMIT_LOCAL_KEYS,
+)
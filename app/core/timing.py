@@ -0,0 +1,101 @@
+"""Модуль замеров времени обработки запроса по фазам.
+
+На время HTTP-запроса в контекстной переменной хранится RequestTimings: хуки SQL
+движков БД, обращения AuthService к Redis и хеширование паролей добавляют в него
+число операций и их суммарное время. Итог отдаётся клиенту в заголовке
+Server-Timing и дописывается в лог медленных запросов, поэтому по нему видно, ушло
+время на SQL, Redis или bcrypt. Этапы запуска приложения замеряются через phase.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class RequestTimings:
+    """Число операций и суммарное время по фазам одного запроса."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Учесть одну операцию фазы.
+
+        Args:
+            phase: Имя фазы: "db", "redis" или "hash".
+            seconds: Длительность операции в секундах.
+        """
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def server_timing(self, total_ms: float) -> str:
+        """Получить значение заголовка Server-Timing.
+
+        Args:
+            total_ms: Полное время обработки запроса в миллисекундах.
+
+        Returns:
+            str: Метрики фаз с числом операций в desc и итоговая метрика total.
+        """
+        parts = [
+            f'{phase};desc="{self.counts[phase]}";dur={seconds * 1000:.1f}'
+            for phase, seconds in self.seconds.items()
+        ]
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+    def summary(self) -> str:
+        """Получить краткую сводку фаз для лога."""
+        if not self.counts:
+            return "без обращений к БД, Redis и bcrypt"
+        return ", ".join(
+            f"{phase}: {self.counts[phase]} за {seconds * 1000:.1f} мс"
+            for phase, seconds in self.seconds.items()
+        )
+
+
+# Замеры текущего HTTP-запроса; вне запроса None, и операции не учитываются
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record(phase: str, seconds: float) -> None:
+    """Учесть операцию в замерах текущего запроса, если он есть.
+
+    Args:
+        phase: Имя фазы.
+        seconds: Длительность операции в секундах.
+    """
+    timings = request_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Замерить блок кода (в том числе с await) как одну операцию фазы.
+
+    Args:
+        phase: Имя фазы.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+
+@contextmanager
+def phase(phases: Dict[str, float], name: str) -> Iterator[None]:
+    """Замерить этап, например запуска приложения, и сохранить его длительность.
+
+    Args:
+        phases: Словарь длительностей этапов в миллисекундах.
+        name: Имя этапа.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = (time.perf_counter() - start) * 1000
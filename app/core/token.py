@@ -1,22 +1,67 @@
+import time
+from typing import Any, Dict, Optional
+
 from fastapi import Header, HTTPException, status
-from jose import JWTError
 
+from app.core.cache import TTLCache
+from app.core.config import config
+from app.core.metrics import metrics
+from app.core.revocation import revocation_mirror, token_digest
 from app.core.security import auth_service
 
+# Декодированные claims по дайджесту токена; запись живёт не дольше exp токена
+token_cache = TTLCache(maxsize=config.TOKEN_CACHE_SIZE, ttl=0)
+metrics.register("token_cache", token_cache.stats)
+
+
+def get_token_claims(token: str, key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    key = key or token_digest(token)
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
 
-def verify_token(token: str = Header(..., alias="X-Token")) -> int:
+    claims = auth_service.decode_token(token)
+    if claims is None:
+        return None
+    exp = claims.get("exp")
+    if exp is not None and exp > time.time():
+        token_cache.set(key, claims, ttl=exp - time.time())
+    return claims
+
+
+async def _validate_token(token: str) -> Dict[str, Any]:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = auth_service.decode_token(token)
-        if payload is None:
-            raise credentials_exception
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        return user_id
-    except JWTError:
+    key = token_digest(token)
+    payload = get_token_claims(token, key)
+    if payload is None:
+        raise credentials_exception
+    user_id = payload.get("sub")
+    if user_id is None:
         raise credentials_exception
+    # Версия в токене ниже текущей, если после выдачи сменилась роль или пользователь удалён
+    if payload.get("ver", 0) < await revocation_mirror.token_version(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+async def token_claims(token: str = Header(..., alias="X-Token")) -> Dict[str, Any]:
+    return await _validate_token(token)
+
+
+async def optional_token_claims(
+    token: Optional[str] = Header(None, alias="X-Token")
+) -> Optional[Dict[str, Any]]:
+    # Без токена запрос анонимный; переданный токен проверяется, включая отзыв
+    return await _validate_token(token) if token is not None else None
+
+
+async def verify_token(token: str = Header(..., alias="X-Token")) -> str:
+    return (await _validate_token(token))["sub"]
@@ -15,22 +15,29 @@ from .flower import (
     get_flowering_countries,
     get_flowering_seasons,
     get_flowers,
+    get_flowers_page,
     update_flower,
 )
+from .flower_import import import_flowers, import_format
 from .order import (
     create_order_by_buyer,
     get_order_by_id,
     get_orders,
     get_orders_by_buyer,
     get_orders_by_seller,
+    toggle_order_status,
 )
+from .order_export import EXPORT_MEDIA_TYPES, export_orders
 from .user import (
     create_admin,
     create_default_user_types,
     create_user,
+    ensure_admin,
     get_user_by_email,
     get_user_by_id,
+    get_user_role_id,
     get_user_type_id,
     update_password,
+    update_password_hash,
     update_user,
 )
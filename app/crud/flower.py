@@ -1,18 +1,32 @@
 import logging
-from typing import List
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Integer,
+    Select,
+    bindparam,
+    exists,
+    insert,
+    select,
+    tuple_,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
 
+from app.core.cursor import decode_cursor, encode_cursor
+from app.crud.search import apply_search, search_params, search_terms
+from app.db import commit_unit
 from app.db.models import (
     Country,
     Flower,
     FloweringSeason,
     FlowerType,
     FlowerUsage,
-    Person,
     saleable_flowers,
 )
 from app.schemas import (
@@ -24,46 +38,158 @@ from app.schemas import (
     FlowerUpdate,
     FlowerUsageCreate,
 )
-from app.schemas.flower import FlowerData
+from app.schemas.flower import FlowerData, FlowerPage
 
 logger = logging.getLogger(__name__)
 
 
-async def get_flowers(
+# Условия фильтров собраны один раз; значения фильтров передаются параметрами
+FILTER_CONDITIONS: Dict[str, ColumnElement] = {
+    "name": Flower.name.ilike(bindparam("name")),
+    "type_id": Flower.type_id == bindparam("type_id"),
+    "id": Flower.id == bindparam("id"),
+    "season_id": Flower.season_id == bindparam("season_id"),
+    "usage_id": Flower.usage_id == bindparam("usage_id"),
+    "country_id": Flower.country_id == bindparam("country_id"),
+    "min_price": Flower.price >= bindparam("min_price"),
+    "max_price": Flower.price <= bindparam("max_price"),
+    # EXISTS вместо соединения: цветок не размножается по числу продавцов
+    "seller_id": exists().where(
+        saleable_flowers.c.flower_id == Flower.id,
+        saleable_flowers.c.seller_id == bindparam("seller_id"),
+    ),
+}
+
+SELLERS_OF_FLOWERS = (
+    select(saleable_flowers.c.flower_id, saleable_flowers.c.seller_id)
+    .where(saleable_flowers.c.flower_id.in_(bindparam("flower_ids", expanding=True)))
+    .order_by(saleable_flowers.c.flower_id, saleable_flowers.c.seller_id)
+)
+
+
+def _filter_params(filters: FlowerFilter) -> Dict[str, Any]:
+    params = {name: getattr(filters, name) for name in FILTER_CONDITIONS}
+    params = {name: value for name, value in params.items() if value}
+    if "name" in params:
+        params["name"] = f"%{params['name']}%"
+    return params
+
+
+def _after(sort_key: List[ColumnElement]) -> ColumnElement:
+    after_id = bindparam("after_id", type_=Integer)
+    if len(sort_key) == 1:
+        return sort_key[0] > after_id
+    return tuple_(*sort_key) > tuple_(bindparam("after_k", type_=Float), after_id)
+
+
+@lru_cache(maxsize=1024)
+def _page_statement(
+    conditions: Tuple[str, ...], dialect: Optional[str], terms: int, keyset: bool
+) -> Tuple[Select, bool]:
+    # Запрос строится один раз на форму: набор фильтров, поиск и наличие курсора.
+    # Повторно используемый запрос не пересобирается и не вычисляет ключ кэша
+    # компиляции заново, значения приходят параметрами
+    query = select(Flower).where(*(FILTER_CONDITIONS[name] for name in conditions))
+    rank = None
+    if dialect is not None:
+        query, rank = apply_search(query, dialect, terms)
+    sort_key = [Flower.id] if rank is None else [rank, Flower.id]
+    if rank is not None:
+        query = query.add_columns(rank)
+    if keyset:
+        query = query.where(_after(sort_key))
+    query = (
+        query.order_by(*sort_key)
+        .offset(bindparam("page_offset", type_=Integer))
+        .limit(bindparam("page_limit", type_=Integer))
+    )
+    return query, rank is not None
+
+
+async def _seller_ids(db: AsyncSession, flower_ids: List[int]) -> Dict[int, List[int]]:
+    sellers: Dict[int, List[int]] = defaultdict(list)
+    if not flower_ids:
+        return sellers
+    result = await db.execute(SELLERS_OF_FLOWERS, {"flower_ids": flower_ids})
+    for flower_id, seller_id in result.all():
+        sellers[flower_id].append(seller_id)
+    return sellers
+
+
+def _cursor_position(cursor: str, ranked: bool) -> Dict[str, Any]:
+    try:
+        position = decode_cursor(cursor)
+        if not isinstance(position.get("id"), int) or ranked != ("k" in position):
+            raise ValueError("Курсор не соответствует запросу")
+        if ranked and not isinstance(position["k"], (int, float)):
+            raise ValueError("Курсор не соответствует запросу")
+    except ValueError as e:
+        logger.warning(f"Отклонён курсор {cursor!r}: {e}")
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    return position
+
+
+async def get_flowers_page(
     db: AsyncSession,
     filters: FlowerFilter,
     limit: int = 100,
     offset: int = 0,
-) -> List[FlowerData]:
+    cursor: Optional[str] = None,
+) -> FlowerPage:
+    """Получить страницу цветков и курсор следующей страницы.
+
+    Цветки упорядочены по id, а при поиске q — по релевантности и id. Курсор
+    указывает позицию сразу после последнего цветка страницы, поэтому глубокие
+    страницы стоят столько же, сколько первая. Продавцы загружаются вторым
+    запросом только для цветков страницы.
+
+    Args:
+        db: Асинхронная сессия SQLAlchemy.
+        filters: Фильтры каталога.
+        limit: Размер страницы.
+        offset: Число пропускаемых цветков (для совместимости со старыми клиентами).
+        cursor: Курсор из предыдущего ответа.
+
+    Returns:
+        FlowerPage: Цветки страницы и курсор следующей; курсора нет на последней странице.
+
+    Raises:
+        HTTPException: 400, если курсор повреждён или получен для другого порядка.
+    """
     logger.info(
-        f"Получение списка цветов с фильтрами: {filters.dict()}, limit={limit}, offset={offset}"
+        f"Получение списка цветов с фильтрами: {filters.dict()}, limit={limit}, "
+        f"offset={offset}, cursor={cursor}"
     )
-    query = select(Flower).options(joinedload(Flower.sellers))
-
-    if filters.name:
-        query = query.filter(Flower.name.ilike(f"%{filters.name}%"))
-    if filters.type_id:
-        query = query.filter(Flower.type_id == filters.type_id)
-    if filters.id:
-        query = query.filter(Flower.id == filters.id)
-    if filters.season_id:
-        query = query.filter(Flower.season_id == filters.season_id)
-    if filters.usage_id:
-        query = query.filter(Flower.usage_id == filters.usage_id)
-    if filters.country_id:
-        query = query.filter(Flower.country_id == filters.country_id)
-    if filters.min_price:
-        query = query.filter(Flower.price >= filters.min_price)
-    if filters.max_price:
-        query = query.filter(Flower.price <= filters.max_price)
-    if filters.seller_id:
-        query = query.join(Flower.sellers).filter(Person.id == filters.seller_id)
-
-    query = query.offset(offset).limit(limit)
-    result = await db.execute(query)
-    flowers = result.unique().scalars().all()
+    # Первая фаза: страница цветков без соединений, LIMIT считает ровно цветки
+    params = _filter_params(filters)
+    conditions = tuple(params)
+    dialect, terms = None, []
+    if filters.q:
+        dialect, terms = db.get_bind().dialect.name, search_terms(filters.q)
+        params.update(search_params(dialect, terms))
+    query, ranked = _page_statement(conditions, dialect, len(terms), bool(cursor))
+    if cursor:
+        position = _cursor_position(cursor, ranked)
+        params["after_id"] = position["id"]
+        if ranked:
+            params["after_k"] = position["k"]
+    params.update(page_offset=offset, page_limit=limit)
+
+    result = await db.execute(query, params)
+    rows = result.all()
+    flowers = [row[0] for row in rows]
     logger.info(f"Найдено цветов: {len(flowers)}")
 
+    # Вторая фаза: продавцы всех цветков страницы одним запросом IN
+    sellers = await _seller_ids(db, [flower.id for flower in flowers])
+
+    next_cursor = None
+    if flowers and len(flowers) == limit:
+        next_position: Dict[str, Any] = {"id": flowers[-1].id}
+        if ranked:
+            next_position["k"] = rows[-1][1]
+        next_cursor = encode_cursor(next_position)
+
     flower_data_list = [
         FlowerData(
             id=flower.id,
@@ -74,28 +200,38 @@ async def get_flowers(
             variety=flower.variety,
             price=flower.price,
             country_id=flower.country_id,
-            seller_ids=[seller.id for seller in flower.sellers],
+            seller_ids=sellers.get(flower.id, []),
         )
         for flower in flowers
     ]
 
-    return flower_data_list
+    return FlowerPage(items=flower_data_list, next_cursor=next_cursor)
+
+
+async def get_flowers(
+    db: AsyncSession,
+    filters: FlowerFilter,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[FlowerData]:
+    page = await get_flowers_page(db, filters, limit=limit, offset=offset)
+    return page.items
 
 
 async def add_flower_to_seller(db: AsyncSession, flower_id: int, seller_id: int):
     logger.info(f"Связка цветка {flower_id} с продавцом {seller_id}")
     insert_stmt = saleable_flowers.insert().values(seller_id=seller_id, flower_id=flower_id)
     await db.execute(insert_stmt)
-    await db.commit()
+    await commit_unit(db)
     logger.info("Связка создана")
 
 
 async def create_flower(db: AsyncSession, flower_data: FlowerCreate) -> Flower:
     logger.info(f"Создание нового цветка с данными: {flower_data.dict()}")
-    flower = Flower(**flower_data.dict())
-    db.add(flower)
-    await db.commit()
-    await db.refresh(flower)
+    # INSERT ... RETURNING сразу возвращает строку, refresh после вставки не нужен
+    result = await db.execute(insert(Flower).values(**flower_data.dict()).returning(Flower))
+    flower = result.scalar_one()
+    await commit_unit(db)
     logger.info(f"Цветок создан с ID: {flower.id}")
     return flower
 
@@ -104,17 +240,20 @@ async def update_flower(db: AsyncSession, flower_id: int, flower_data: FlowerUpd
     logger.info(
         f"Обновление цветка с ID {flower_id} данными: {flower_data.dict(exclude_unset=True)}"
     )
-    result = await db.execute(select(Flower).filter_by(id=flower_id))
+    changes = flower_data.dict(exclude_unset=True)
+    if changes:
+        # Поиск, изменение и чтение результата одним UPDATE ... RETURNING
+        result = await db.execute(
+            update(Flower).where(Flower.id == flower_id).values(**changes).returning(Flower)
+        )
+    else:
+        result = await db.execute(select(Flower).filter_by(id=flower_id))
     flower = result.scalars().first()
     if not flower:
         logger.warning(f"Цветок с ID {flower_id} не найден для обновления")
         raise HTTPException(status_code=404, detail="Цветок не найден")
 
-    for field, value in flower_data.dict(exclude_unset=True).items():
-        setattr(flower, field, value)
-
-    await db.commit()
-    await db.refresh(flower)
+    await commit_unit(db)
     logger.info(f"Цветок с ID {flower_id} успешно обновлен")
     return flower
 
@@ -127,32 +266,27 @@ async def delete_flower(db: AsyncSession, flower_id: int) -> None:
         logger.warning(f"Цветок с ID {flower_id} не найден для удаления")
         raise HTTPException(status_code=404, detail="Цветок не найден")
     await db.delete(flower)
-    await db.commit()
+    await commit_unit(db)
     logger.info(f"Цветок с ID {flower_id} успешно удалён")
 
 
+async def _insert_returning(db: AsyncSession, model: Any, data: Any) -> Any:
+    result = await db.execute(insert(model).values(**data.dict()).returning(model))
+    row = result.scalar_one()
+    await commit_unit(db)
+    return row
+
+
 async def create_flower_type(db: AsyncSession, data: FlowerTypeCreate) -> FlowerType:
-    flower_type = FlowerType(**data.dict())
-    db.add(flower_type)
-    await db.commit()
-    await db.refresh(flower_type)
-    return flower_type
+    return await _insert_returning(db, FlowerType, data)
 
 
 async def create_flowering_season(db: AsyncSession, data: FloweringSeasonCreate) -> FloweringSeason:
-    season = FloweringSeason(**data.dict())
-    db.add(season)
-    await db.commit()
-    await db.refresh(season)
-    return season
+    return await _insert_returning(db, FloweringSeason, data)
 
 
 async def create_flower_usage(db: AsyncSession, data: FlowerUsageCreate) -> FlowerUsage:
-    usage = FlowerUsage(**data.dict())
-    db.add(usage)
-    await db.commit()
-    await db.refresh(usage)
-    return usage
+    return await _insert_returning(db, FlowerUsage, data)
 
 
 async def get_flower_types(db: AsyncSession) -> List[FlowerType]:
@@ -176,11 +310,7 @@ async def get_flowering_countries(db: AsyncSession) -> List[Country]:
 
 
 async def create_flowering_countries(db: AsyncSession, data: FlowerCountryCreate) -> Country:
-    flower_country = Country(**data.dict())
-    db.add(flower_country)
-    await db.commit()
-    await db.refresh(flower_country)
-    return flower_country
+    return await _insert_returning(db, Country, data)
 
 
 async def delete_flower_type(db: AsyncSession, flower_type_id: int) -> None:
@@ -191,7 +321,7 @@ async def delete_flower_type(db: AsyncSession, flower_type_id: int) -> None:
         logger.warning(f"Тип цветка с ID {flower_type_id} не найден для удаления")
         raise HTTPException(status_code=404, detail="Тип цветка не найден")
     await db.delete(flower_type)
-    await db.commit()
+    await commit_unit(db)
     logger.info(f"Тип цветка с ID {flower_type_id} успешно удалён")
 
 
@@ -203,7 +333,7 @@ async def delete_flower_season(db: AsyncSession, flower_season_id: int) -> None:
         logger.warning(f"Сезон цветения с ID {flower_season_id} не найден для удаления")
         raise HTTPException(status_code=404, detail="Сезон цветения не найден")
     await db.delete(flower_season)
-    await db.commit()
+    await commit_unit(db)
     logger.info(f"Сезон цветения с ID {flower_season_id} успешно удалён")
 
 
@@ -215,7 +345,7 @@ async def delete_flower_usage(db: AsyncSession, flower_usage_id: int) -> None:
         logger.warning(f"Использование цветка с ID {flower_usage_id} не найдено для удаления")
         raise HTTPException(status_code=404, detail="Использование цветка не найдено")
     await db.delete(flower_usage)
-    await db.commit()
+    await commit_unit(db)
     logger.info(f"Использование цветка с ID {flower_usage_id} успешно удалено")
 
 
@@ -227,5 +357,5 @@ async def delete_flower_country(db: AsyncSession, flower_country_id: int) -> Non
         logger.warning(f"Страна цветка с ID {flower_country_id} не найдена для удаления")
         raise HTTPException(status_code=404, detail="Страна цветка не найдена")
     await db.delete(flower_country)
-    await db.commit()
+    await commit_unit(db)
     logger.info(f"Страна цветка с ID {flower_country_id} успешно удалена")
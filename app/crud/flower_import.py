@@ -0,0 +1,301 @@
+"""Модуль потокового импорта каталога цветов.
+
+Тело запроса (CSV с заголовком или NDJSON) читается по частям: строки
+разбираются по мере поступления, проверяются по справочникам типов, сезонов,
+назначений и стран, загруженным один раз на импорт, и вставляются пачками по
+config.IMPORT_BATCH_SIZE строк одним executemany. Файл целиком в памяти не
+держится: строки и записи CSV длиннее config.IMPORT_MAX_LINE_BYTES пропускаются.
+
+Импорт не является единицей работы запроса: каждая пачка фиксируется отдельной
+транзакцией, и пока читается тело запроса, транзакция не открыта и соединение с
+БД возвращено в пул. Если импорт прервался после хотя бы одной пачки (обрыв тела
+запроса, ошибка БД), уже зафиксированные пачки не откатываются: ответ содержит
+их число строк в imported и флаг interrupted. Строки с ошибками пропускаются, а
+их номера и причины возвращаются в ответе (не более config.IMPORT_MAX_ERRORS).
+"""
+
+import csv
+import json
+import logging
+import math
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import config
+from app.db.models import (
+    Country,
+    Flower,
+    FloweringSeason,
+    FlowerType,
+    FlowerUsage,
+    saleable_flowers,
+)
+from app.schemas import FlowerCreate, FlowerImportError, FlowerImportResult
+
+logger = logging.getLogger(__name__)
+
+CSV = "text/csv"
+NDJSON = "application/x-ndjson"
+# Поддерживаемые типы тела запроса и формат, которым они разбираются
+IMPORT_FORMATS: Dict[str, str] = {
+    "text/csv": CSV,
+    "application/x-ndjson": NDJSON,
+    "application/ndjson": NDJSON,
+    "application/jsonl": NDJSON,
+}
+
+# Справочники, на которые ссылается цветок: поле FlowerCreate и модель
+REFERENCES = {
+    "type_id": FlowerType,
+    "season_id": FloweringSeason,
+    "usage_id": FlowerUsage,
+    "country_id": Country,
+}
+
+# Порядок возвращаемых id не важен: все цветы пачки привязываются к одному продавцу,
+# а без сортировки по параметрам SQLAlchemy вставляет пачку многострочными VALUES
+INSERT_FLOWERS = insert(Flower.__table__).returning(Flower.id)
+
+Record = Tuple[int, Union[dict, str]]
+
+
+def _too_long() -> str:
+    return f"строка длиннее {config.IMPORT_MAX_LINE_BYTES} байт"
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    # Вместо слишком длинной строки выдаётся None, её байты в памяти не копятся
+    limit = config.IMPORT_MAX_LINE_BYTES
+    buffer = b""
+    first = True
+    skipping = False
+    async for chunk in chunks:
+        if skipping:
+            end = chunk.find(b"\n")
+            if end < 0:
+                continue
+            chunk, skipping = chunk[end + 1 :], False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line, first) if len(line) <= limit else None
+            first = False
+        if len(buffer) > limit:
+            # Конец строки ещё не получен: остаток пропускается до перевода строки
+            yield None
+            buffer, first, skipping = b"", False, True
+    if buffer:
+        yield _decode(buffer, first)
+
+
+def _decode(line: bytes, first: bool) -> str:
+    # Байты в неверной кодировке заменяются символом замены и не прерывают импорт
+    text = line.decode("utf-8", errors="replace").rstrip("\r")
+    return text.lstrip("\ufeff") if first else text
+
+
+async def _csv_texts(
+    lines: AsyncIterator[Optional[str]],
+) -> AsyncIterator[Tuple[Optional[str], Optional[str]]]:
+    # Пары (текст записи, ошибка): поле в кавычках может продолжаться на следующих строках
+    pending = ""
+    # Запись в кавычках превысила лимит: строки пропускаются до закрывающей кавычки
+    skipping = False
+    async for line in lines:
+        if skipping:
+            if line is not None and line.count('"') % 2:
+                skipping = False
+            continue
+        if line is None or len(pending) + len(line) > config.IMPORT_MAX_LINE_BYTES:
+            yield None, _too_long()
+            # Кавычки отброшенной длинной строки неизвестны: запись считается законченной
+            skipping = line is not None and (pending.count('"') + line.count('"')) % 2 == 1
+            pending = ""
+            continue
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            # Поле в кавычках продолжается на следующей строке
+            continue
+        text, pending = pending, ""
+        if text.strip():
+            yield text, None
+    if pending:
+        yield None, "незакрытые кавычки в конце файла"
+
+
+async def _csv_records(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Record]:
+    header = None
+    row = 0
+    async for text, error in _csv_texts(lines):
+        if header is None and error is not None:
+            raise HTTPException(status_code=400, detail=f"Заголовок CSV: {error}")
+        if header is None:
+            header = [name.strip() for name in next(csv.reader([text]))]
+            continue
+        row += 1
+        if error is not None:
+            yield row, error
+            continue
+        values = next(csv.reader([text]))
+        if len(values) != len(header):
+            yield row, f"ожидалось полей: {len(header)}, получено: {len(values)}"
+        else:
+            yield row, dict(zip(header, values))
+
+
+async def _ndjson_records(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Record]:
+    row = 0
+    async for line in lines:
+        if line is None:
+            row += 1
+            yield row, _too_long()
+            continue
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield row, f"некорректный JSON: {exc.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield row, "строка должна быть JSON-объектом"
+        else:
+            yield row, record
+
+
+def import_format(content_type: Optional[str]) -> str:
+    """Определить формат импорта по заголовку Content-Type.
+
+    Args:
+        content_type: Значение заголовка, например "text/csv; charset=utf-8".
+
+    Returns:
+        str: CSV или NDJSON.
+
+    Raises:
+        HTTPException: 415, если тип тела не поддерживается.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Поддерживаются только {', '.join(IMPORT_FORMATS)}",
+        )
+    return IMPORT_FORMATS[media_type]
+
+
+def parse_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Record]:
+    """Разобрать поток тела запроса на записи.
+
+    Args:
+        chunks: Части тела запроса.
+        fmt: Формат: CSV или NDJSON.
+
+    Returns:
+        AsyncIterator[Record]: Пары (номер строки данных, словарь полей или текст ошибки).
+    """
+    lines = _lines(chunks)
+    return _csv_records(lines) if fmt == CSV else _ndjson_records(lines)
+
+
+async def _reference_ids(db: AsyncSession) -> Dict[str, Set[int]]:
+    ids = {}
+    for field, model in REFERENCES.items():
+        result = await db.execute(select(model.id))
+        ids[field] = set(result.scalars())
+    return ids
+
+
+def _validate(record: dict, references: Dict[str, Set[int]]) -> Union[dict, str]:
+    try:
+        flower = FlowerCreate(**record)
+    except ValidationError as exc:
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in exc.errors()
+        )
+    if not math.isfinite(flower.price):
+        return "price: цена должна быть конечным числом"
+    if flower.price <= 0:
+        return "price: цена должна быть положительной"
+    if len(flower.name) > 100 or len(flower.variety) > 100:
+        return "name, variety: не длиннее 100 символов"
+    for field, ids in references.items():
+        if getattr(flower, field) not in ids:
+            return f"{field}: {getattr(flower, field)} не найден"
+    return flower.dict()
+
+
+async def _insert_batch(db: AsyncSession, batch: List[dict], seller_id: int) -> None:
+    result = await db.execute(INSERT_FLOWERS, batch)
+    await db.execute(
+        saleable_flowers.insert(),
+        [{"seller_id": seller_id, "flower_id": flower_id} for flower_id in result.scalars()],
+    )
+    # Пачка фиксируется сразу, в обход commit_unit: пока читается тело, транзакция
+    # записи не открыта. Поэтому import_flowers сообщает о частичном импорте сам
+    await db.commit()
+
+
+async def import_flowers(
+    db: AsyncSession, chunks: AsyncIterator[bytes], fmt: str, seller_id: int
+) -> FlowerImportResult:
+    """Импортировать цветы продавца из потока CSV или NDJSON.
+
+    Args:
+        db: Сессия БД запроса.
+        chunks: Части тела запроса.
+        fmt: Формат: CSV или NDJSON.
+        seller_id: Продавец, к которому привязываются цветы.
+
+    Пачки фиксируются по мере вставки. Если импорт прервался после первой
+    зафиксированной пачки, исключение не пробрасывается: возвращается результат
+    с interrupted=True, где imported — число уже сохранённых строк.
+
+    Returns:
+        FlowerImportResult: Число импортированных и пропущенных строк и ошибки строк.
+
+    Raises:
+        HTTPException: 400, если заголовок CSV длиннее config.IMPORT_MAX_LINE_BYTES.
+    """
+    references = await _reference_ids(db)
+    # Соединение с БД не удерживается, пока читается тело запроса
+    await db.close()
+    imported = failed = 0
+    errors: List[FlowerImportError] = []
+    batch: List[dict] = []
+
+    try:
+        async for row, record in parse_records(chunks, fmt):
+            if isinstance(record, dict):
+                record = _validate(record, references)
+            if isinstance(record, str):
+                failed += 1
+                if len(errors) < config.IMPORT_MAX_ERRORS:
+                    errors.append(FlowerImportError(row=row, error=record))
+                continue
+            batch.append(record)
+            if len(batch) >= config.IMPORT_BATCH_SIZE:
+                await _insert_batch(db, batch, seller_id)
+                imported += len(batch)
+                batch = []
+
+        if batch:
+            await _insert_batch(db, batch, seller_id)
+            imported += len(batch)
+    except Exception:
+        if not imported:
+            # Ничего не зафиксировано: ошибка обрабатывается как обычно
+            raise
+        await db.rollback()
+        logger.exception(
+            f"Импорт цветов продавца {seller_id} прерван, уже добавлено {imported} строк"
+        )
+        return FlowerImportResult(imported=imported, failed=failed, errors=errors, interrupted=True)
+    logger.info(f"Импорт цветов продавца {seller_id}: добавлено {imported}, пропущено {failed}")
+    return FlowerImportResult(imported=imported, failed=failed, errors=errors)
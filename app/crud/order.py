@@ -1,11 +1,12 @@
 import logging
 from datetime import date
+from typing import Dict, List, Optional
 
 from fastapi import HTTPException
-from sqlalchemy import distinct, select
+from sqlalchemy import insert, not_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
 
+from app.db import commit_unit
 from app.db.models import Flower, Order, Person, ordered_flowers, saleable_flowers
 from app.schemas import OrderedFlowerSchema, OrderSchema
 
@@ -21,36 +22,42 @@ async def create_order_by_buyer(session: AsyncSession, buyer_id: int, items: lis
         logger.warning(f"Покупатель с ID {buyer_id} не найден")
         raise HTTPException(status_code=404, detail="Покупатель не найден")
 
-    # Группировка товаров по продавцу
-    flowers = []
+    # Все цветы заказа проверяются одним запросом
+    result = await session.execute(
+        select(Flower.id).where(Flower.id.in_({item["flower_id"] for item in items}))
+    )
+    found = set(result.scalars())
     for item in items:
-        flower_result = await session.execute(select(Flower).filter_by(id=item["flower_id"]))
-        flower = flower_result.scalars().first()
-        if not flower:
+        if item["flower_id"] not in found:
             logger.warning(f"Цветок с ID {item['flower_id']} не найден")
             raise HTTPException(
                 status_code=404, detail=f"Цветок с ID {item['flower_id']} не найден"
             )
 
-        flowers.append((flower, item["quantity"]))
-
     created_orders = []
-    order = Order(buyer_id=buyer.id, order_date=date.today())
-    session.add(order)
-    await session.flush()
+    result = await session.execute(
+        insert(Order).values(buyer_id=buyer.id, order_date=date.today()).returning(Order)
+    )
+    order = result.scalar_one()
     logger.info(f"Создан заказ с ID {order.id}")
 
-    for flower, quantity in flowers:
+    if items:
         await session.execute(
-            ordered_flowers.insert().values(
-                order_id=order.id, flower_id=flower.id, quantity=quantity
-            )
+            ordered_flowers.insert(),
+            [
+                {"order_id": order.id, "flower_id": item["flower_id"], "quantity": item["quantity"]}
+                for item in items
+            ],
+        )
+    for item in items:
+        logger.info(
+            f"Добавлен цветок ID {item['flower_id']} (кол-во {item['quantity']}) "
+            f"в заказ ID {order.id}"
         )
-        logger.info(f"Добавлен цветок ID {flower.id} (кол-во {quantity}) в заказ ID {order.id}")
 
         created_orders.append(order)
 
-    await session.commit()
+    await commit_unit(session)
     return created_orders
 
 
@@ -59,6 +66,30 @@ async def get_orders_by_buyer(db: AsyncSession, buyer_id: int):
     return result.scalars().all()
 
 
+async def _order_schemas(db: AsyncSession, orders: List[Order]) -> List[OrderSchema]:
+    # Позиции всех заказов загружаются одним запросом, а не отдельным на каждый заказ
+    items: Dict[int, List[OrderedFlowerSchema]] = {order.id: [] for order in orders}
+    if orders:
+        result = await db.execute(
+            select(ordered_flowers).where(ordered_flowers.c.order_id.in_(list(items)))
+        )
+        for item in result:
+            items[item.order_id].append(
+                OrderedFlowerSchema(flower_id=item.flower_id, quantity=item.quantity)
+            )
+
+    return [
+        OrderSchema(
+            order_date=order.order_date,
+            buyer_id=order.buyer_id,
+            order_id=order.id,
+            items=items[order.id],
+            is_closed=order.is_closed,
+        )
+        for order in orders
+    ]
+
+
 async def get_orders_by_seller(db: AsyncSession, seller_id: int):
     logger.info(f"Получение заказов, связанных с продавцом {seller_id}")
 
@@ -75,25 +106,7 @@ async def get_orders_by_seller(db: AsyncSession, seller_id: int):
     result = await db.execute(stmt)
     orders = result.unique().scalars().all()
     logger.info(f"Найдено заказов: {len(orders)}")
-    order_schemas = []
-
-    for order in orders:
-        stmt_items = select(ordered_flowers).where(ordered_flowers.c.order_id == order.id)
-        result_items = await db.execute(stmt_items)
-        ordered_items = result_items.all()
-
-        # Построим список OrderedFlowerSchema
-        items = [
-            OrderedFlowerSchema(flower_id=item.flower_id, quantity=item.quantity)
-            for item in ordered_items
-        ]
-
-        order_schemas.append(
-            OrderSchema(
-                order_date=order.order_date, buyer_id=order.buyer_id, order_id=order.id, items=items, is_closed=order.is_closed
-            )
-        )
-    return order_schemas
+    return await _order_schemas(db, orders)
 
 
 async def get_orders(db: AsyncSession):
@@ -109,27 +122,23 @@ async def get_orders(db: AsyncSession):
     result = await db.execute(stmt)
     orders = result.unique().scalars().all()
     logger.info(f"Найдено заказов: {len(orders)}")
-    order_schemas = []
-
-    for order in orders:
-        stmt_items = select(ordered_flowers).where(ordered_flowers.c.order_id == order.id)
-        result_items = await db.execute(stmt_items)
-        ordered_items = result_items.all()
-
-        # Построим список OrderedFlowerSchema
-        items = [
-            OrderedFlowerSchema(flower_id=item.flower_id, quantity=item.quantity)
-            for item in ordered_items
-        ]
-
-        order_schemas.append(
-            OrderSchema(
-                order_date=order.order_date, buyer_id=order.buyer_id, order_id=order.id, items=items, is_closed=order.is_closed
-            )
-        )
-    return order_schemas
+    return await _order_schemas(db, orders)
 
 
 async def get_order_by_id(db: AsyncSession, order_id: int) -> Order | None:
     result = await db.execute(select(Order).where(Order.id == order_id))
     return result.scalar_one_or_none()
+
+
+async def toggle_order_status(db: AsyncSession, order_id: int) -> Optional[bool]:
+    # Чтение, переключение и новый статус одним UPDATE ... RETURNING
+    result = await db.execute(
+        update(Order)
+        .where(Order.id == order_id)
+        .values(is_closed=not_(Order.is_closed))
+        .returning(Order.is_closed)
+    )
+    is_closed = result.scalar_one_or_none()
+    if is_closed is not None:
+        await commit_unit(db)
+    return is_closed
@@ -0,0 +1,135 @@
+"""Модуль потоковой выгрузки заказов.
+
+Заказы и их позиции читаются одним запросом с JOIN через AsyncSession.stream:
+строки приходят с сервера порциями по config.EXPORT_FETCH_SIZE (серверный курсор
+в PostgreSQL) и сразу кодируются в NDJSON (строка на заказ с позициями) или CSV
+(строка на позицию). Выгрузка идёт в собственной сессии, которая открывается при
+отправке первой части ответа и закрывается после последней, поэтому память не
+зависит от числа заказов.
+"""
+
+import csv
+import io
+import json
+import logging
+from datetime import date
+from typing import AsyncIterator, Callable, List, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import config
+from app.db.models import Order, ordered_flowers
+
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+NDJSON = "ndjson"
+# Тип содержимого ответа для каждого формата выгрузки
+EXPORT_MEDIA_TYPES = {
+    CSV: "text/csv; charset=utf-8",
+    NDJSON: "application/x-ndjson",
+}
+CSV_HEADER = ["order_id", "order_date", "buyer_id", "is_closed", "flower_id", "quantity"]
+
+
+def export_statement(date_from: Optional[date] = None, date_to: Optional[date] = None) -> Select:
+    """Построить запрос заказов с позициями, упорядоченный по заказу.
+
+    Args:
+        date_from: Первая дата заказа включительно.
+        date_to: Последняя дата заказа включительно.
+
+    Returns:
+        Select: Запрос строк (заказ, позиция).
+    """
+    stmt = (
+        select(
+            Order.id,
+            Order.order_date,
+            Order.buyer_id,
+            Order.is_closed,
+            ordered_flowers.c.flower_id,
+            ordered_flowers.c.quantity,
+        )
+        .join(ordered_flowers, Order.id == ordered_flowers.c.order_id)
+        .order_by(Order.id, ordered_flowers.c.flower_id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(Order.order_date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Order.order_date <= date_to)
+    return stmt
+
+
+def _order_json(rows: List[Row]) -> str:
+    first = rows[0]
+    order = {
+        "order_id": first.id,
+        "order_date": first.order_date.isoformat() if first.order_date else None,
+        "buyer_id": first.buyer_id,
+        "is_closed": bool(first.is_closed),
+        "items": [{"flower_id": row.flower_id, "quantity": row.quantity} for row in rows],
+    }
+    return json.dumps(order, ensure_ascii=False) + "\n"
+
+
+def _csv_chunk(rows: List[Row]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(
+        (row.id, row.order_date, row.buyer_id, bool(row.is_closed), row.flower_id, row.quantity)
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def export_orders(
+    session_factory: Callable[[], AsyncSession],
+    fmt: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> AsyncIterator[bytes]:
+    """Выгрузить заказы потоком частей тела ответа.
+
+    Args:
+        session_factory: Фабрика сессии чтения, в которой идёт выгрузка.
+        fmt: Формат: CSV или NDJSON.
+        date_from: Первая дата заказа включительно.
+        date_to: Последняя дата заказа включительно.
+
+    Yields:
+        bytes: Часть ответа на каждую порцию строк курсора.
+    """
+    stmt = export_statement(date_from, date_to).execution_options(
+        yield_per=config.EXPORT_FETCH_SIZE
+    )
+    orders = 0
+    if fmt == CSV:
+        yield (",".join(CSV_HEADER) + "\n").encode()
+
+    async with session_factory() as session:
+        result = await session.stream(stmt)
+        last_id = None
+        # Позиции текущего заказа NDJSON: заказ может продолжиться в следующей порции
+        items: List[Row] = []
+        async for partition in result.partitions():
+            parts = []
+            for row in partition:
+                if row.id != last_id:
+                    if items:
+                        parts.append(_order_json(items))
+                        items = []
+                    orders += 1
+                    last_id = row.id
+                if fmt == NDJSON:
+                    items.append(row)
+            if fmt == CSV:
+                parts.append(_csv_chunk(partition))
+            if parts:
+                yield "".join(parts).encode()
+        if items:
+            yield _order_json(items).encode()
+
+    logger.info(f"Выгружено заказов: {orders}")
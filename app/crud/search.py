@@ -0,0 +1,124 @@
+"""Модуль полнотекстового поиска цветков по названию и сорту.
+
+Поиск опирается на индексы из миграции 0003: в SQLite — на FTS5-таблицу
+flower_fts с ранжированием bm25, в PostgreSQL — на GIN-индекс по tsvector с
+ранжированием ts_rank. Каждое слово запроса ищется как префикс, все слова
+должны встретиться в названии или сорте.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    Select,
+    String,
+    Table,
+    bindparam,
+    false,
+    func,
+    or_,
+)
+from sqlalchemy.sql.elements import ColumnElement, literal_column
+
+from app.db.models import Flower
+
+# Слова длиннее и сверх этого числа не ищутся: они лишь замедляют разбор запроса
+MAX_TERMS = 8
+MAX_TERM_LENGTH = 50
+
+_WORD = re.compile(r"\w+")
+
+# FTS5-таблица описана в отдельных метаданных: её создаёт миграция, а не create_all
+flower_fts = Table(
+    "flower_fts",
+    MetaData(),
+    Column("rowid", Integer),
+    Column("flower_fts", String),
+    Column("rank", Float),
+)
+
+
+def search_terms(q: str) -> List[str]:
+    """Разбить поисковую строку на слова.
+
+    Args:
+        q: Поисковая строка пользователя.
+
+    Returns:
+        List[str]: Слова в нижнем регистре без знаков препинания и операторов.
+    """
+    return [term[:MAX_TERM_LENGTH] for term in _WORD.findall(q.lower())[:MAX_TERMS]]
+
+
+def pg_search_vector() -> ColumnElement:
+    """Получить tsvector названия и сорта, совпадающий с выражением индекса ix_flower_search."""
+    # Константы встраиваются литералами: с параметрами выражение не совпадёт с индексом
+    empty = literal_column("''")
+    return func.to_tsvector(
+        literal_column("'simple'::regconfig"),
+        func.coalesce(Flower.name, empty)
+        .op("||")(literal_column("' '"))
+        .op("||")(func.coalesce(Flower.variety, empty)),
+    )
+
+
+def apply_search(query: Select, dialect: str, terms: int) -> Tuple[Select, Optional[ColumnElement]]:
+    """Добавить к запросу цветков условие поиска.
+
+    Слова запроса не встраиваются в выражение, а передаются параметрами из
+    search_params, поэтому построенный запрос переиспользуется для любых строк
+    поиска с тем же числом слов.
+
+    Args:
+        query: Запрос, выбирающий Flower.
+        dialect: Имя диалекта БД, например "sqlite" или "postgresql".
+        terms: Число слов в поисковой строке (см. search_terms).
+
+    Returns:
+        Tuple[Select, Optional[ColumnElement]]: Запрос с условием поиска и ключ
+            релевантности, по возрастанию которого идут лучшие совпадения; None,
+            если СУБД не ранжирует результаты. Без слов в строке запрос ничего не находит.
+    """
+    if not terms:
+        return query.where(false()), None
+
+    if dialect == "sqlite":
+        query = query.join(flower_fts, flower_fts.c.rowid == Flower.id).where(
+            flower_fts.c.flower_fts.op("MATCH")(bindparam("search", type_=String))
+        )
+        return query, flower_fts.c.rank
+
+    if dialect == "postgresql":
+        vector = pg_search_vector()
+        tsquery = func.to_tsquery(
+            literal_column("'simple'::regconfig"), bindparam("search", type_=String)
+        )
+        return query.where(vector.op("@@")(tsquery)), -func.ts_rank(vector, tsquery)
+
+    # Прочие СУБД: поиск без индекса и без ранжирования
+    for i in range(terms):
+        pattern = bindparam(f"search_{i}", type_=String)
+        query = query.where(or_(Flower.name.ilike(pattern), Flower.variety.ilike(pattern)))
+    return query, None
+
+
+def search_params(dialect: str, terms: List[str]) -> Dict[str, str]:
+    """Получить параметры условия поиска, построенного apply_search.
+
+    Args:
+        dialect: Имя диалекта БД.
+        terms: Слова поисковой строки.
+
+    Returns:
+        Dict[str, str]: Значения параметров запроса: префиксы слов в синтаксисе
+            FTS5 или tsquery, для прочих СУБД — шаблоны ILIKE.
+    """
+    if dialect == "sqlite":
+        return {"search": " ".join(f'"{term}"*' for term in terms)}
+    if dialect == "postgresql":
+        return {"search": " & ".join(f"{term}:*" for term in terms)}
+    return {f"search_{i}": f"%{term}%" for i, term in enumerate(terms)}
@@ -1,18 +1,33 @@
 import logging
-from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import bindparam, insert, select, update
 from sqlalchemy.orm import Session
 
-from app.core import auth_service
+from app.core import auth_service, invalidate_principal
+from app.db import commit_unit
 from app.db.models import Address, Country, Person, User, UserRole, UserType
 from app.schemas import UserAddress, UserData, UserRegister
 
 default_types = ["Покупатель", "Продавец", "Админ"]
+default_role = "Юзер"
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+# Запросы горячих путей собраны один раз: при вызове они не пересобираются,
+# а значения передаются параметрами
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+# Профиль целиком одним запросом: пользователь, персона, её тип, адрес и страна
+USER_PROFILE = (
+    select(User, Person, UserType, Address, Country)
+    .outerjoin(Person, Person.user_id == User.id)
+    .outerjoin(UserType, UserType.id == Person.user_type_id)
+    .outerjoin(Address, Address.id == Person.address_id)
+    .outerjoin(Country, Country.id == Address.country_id)
+    .where(User.id == bindparam("user_id"))
+)
+
 
 async def create_default_user_types(session: Session):
     for type_name in default_types:
@@ -21,7 +36,7 @@ async def create_default_user_types(session: Session):
         if not exists:
             logger.info(f"Создание типа пользователя: {type_name}")
             session.add(UserType(name=type_name))
-    await session.commit()
+    await commit_unit(session)
     logger.info("Типы пользователей успешно созданы или уже существуют.")
 
 
@@ -37,37 +52,42 @@ async def get_user_type_id(db: Session, name: str) -> int:
         return user_type.id
 
     logger.info(f"Тип пользователя '{name}' не найден. Создание нового.")
-    user_type = UserType(name=name)
-    db.add(user_type)
-    await db.commit()
-    await db.refresh(user_type)
-    return user_type.id
+    # Тип создаётся в транзакции вызывающего и фиксируется вместе с его изменениями
+    result = await db.execute(insert(UserType).values(name=name).returning(UserType.id))
+    return result.scalar_one()
+
+
+async def get_user_role_id(db: Session) -> int:
+    result = await db.execute(select(UserRole.id).filter_by(name=default_role))
+    role_id = result.scalars().first()
+
+    if role_id is not None:
+        return role_id
+
+    logger.info(f"Роль пользователя '{default_role}' не найдена. Создание новой.")
+    # Роль создаётся в транзакции вызывающего и фиксируется вместе с пользователем
+    result = await db.execute(insert(UserRole).values(name=default_role).returning(UserRole.id))
+    return result.scalar_one()
 
 
 async def get_user_by_email(db: Session, email: str):
     logger.info(f"Поиск пользователя по email: {email}")
-    result = await db.execute(select(User).filter(User.email == email))
+    result = await db.execute(USER_BY_EMAIL, {"email": email})
     return result.scalars().first()
 
 
 async def get_user_by_id(db: Session, user_id: int):
     logger.info(f"Получение пользователя по ID: {user_id}")
-    user_result = await db.execute(select(User).filter(User.id == user_id))
-    user_data: User = user_result.scalars().first()
-    if user_data is None:
+    result = await db.execute(USER_PROFILE, {"user_id": user_id})
+    row = result.first()
+    if row is None:
         logger.warning(f"Пользователь с ID {user_id} не найден.")
         return None
+    user_data, person_data, user_type, address, country = row
 
-    person_result = await db.execute(select(Person).filter(Person.user_id == user_id))
-    person_data: Person = person_result.scalars().first()
     if person_data is None:
         logger.warning(f"Персона пользователя с ID {user_id} не найдена.")
         return None
-
-    user_type_result = await db.execute(
-        select(UserType).filter(UserType.id == person_data.user_type_id)
-    )
-    user_type: UserType = user_type_result.scalars().first()
     if user_type is None:
         logger.warning(f"Тип пользователя с ID {user_id} не найден.")
         return None
@@ -75,26 +95,17 @@ async def get_user_by_id(db: Session, user_id: int):
     is_user_admin = user_type.name == "Админ"
 
     user_address = None
-    if person_data.address_id:
-        user_address_result = await db.execute(
-            select(Address).filter(Address.id == person_data.address_id)
-        )
-        address: Optional[Address] = user_address_result.scalars().first()
-        if address:
-            country_result = await db.execute(
-                select(Country).filter(Country.id == address.country_id)
+    if address is not None:
+        if country is not None:
+            user_address = UserAddress(
+                street=address.street,
+                city=address.city,
+                postal_code=address.postal_code,
+                country_name=country.name,
+                country_code=country.code,
             )
-            country: Country = country_result.scalars().first()
-            if country:
-                user_address = UserAddress(
-                    street=address.street,
-                    city=address.city,
-                    postal_code=address.postal_code,
-                    country_name=country.name,
-                    country_code=country.code,
-                )
-            else:
-                logger.warning("Страна не найдена для адреса пользователя.")
+        else:
+            logger.warning("Страна не найдена для адреса пользователя.")
 
     return UserData(
         id=user_data.id,
@@ -108,8 +119,7 @@ async def get_user_by_id(db: Session, user_id: int):
     )
 
 
-async def update_user(db: Session, user_id: int, new_data: UserData) -> None:
-    logger.info(f"Обновление данных пользователя ID: {user_id}")
+def _check_user_data(new_data: UserData) -> None:
     required_fields = [
         new_data.email,
         new_data.first_name,
@@ -135,6 +145,46 @@ async def update_user(db: Session, user_id: int, new_data: UserData) -> None:
                 detail="Все поля адреса обязательны, если адрес передан",
             )
 
+
+async def _save_address(db: Session, person: Person, new_address: UserAddress) -> None:
+    country_result = await db.execute(
+        select(Country.id).where(Country.code == new_address.country_code)
+    )
+    country_id = country_result.scalars().first()
+    if country_id is None:
+        logger.info(f"Создание новой страны: {new_address.country_name}")
+        result = await db.execute(
+            insert(Country)
+            .values(name=new_address.country_name, code=new_address.country_code)
+            .returning(Country.id)
+        )
+        country_id = result.scalar_one()
+
+    values = {
+        "street": new_address.street,
+        "city": new_address.city,
+        "postal_code": new_address.postal_code,
+        "country_id": country_id,
+    }
+    if person.address_id:
+        result = await db.execute(
+            update(Address)
+            .where(Address.id == person.address_id)
+            .values(**values)
+            .returning(Address.id)
+        )
+        if result.scalar_one_or_none() is None:
+            logger.error("Адрес не найден.")
+            raise HTTPException(status_code=404, detail="Адрес не найден")
+    else:
+        result = await db.execute(insert(Address).values(**values).returning(Address.id))
+        person.address_id = result.scalar_one()
+
+
+async def update_user(db: Session, user_id: int, new_data: UserData) -> None:
+    logger.info(f"Обновление данных пользователя ID: {user_id}")
+    _check_user_data(new_data)
+
     user_result = await db.execute(select(User).filter_by(id=user_id))
     user = user_result.scalars().first()
     if not user:
@@ -153,44 +203,20 @@ async def update_user(db: Session, user_id: int, new_data: UserData) -> None:
     person.display_name = new_data.display_name
 
     user_type_name = "Продавец" if new_data.is_user_seller else "Покупатель"
-    person.user_type_id = await get_user_type_id(db, user_type_name)
+    user_type_id = await get_user_type_id(db, user_type_name)
+    role_changed = person.user_type_id != user_type_id
+    person.user_type_id = user_type_id
 
     if new_data.address:
-        country_result = await db.execute(
-            select(Country).filter_by(code=new_data.address.country_code)
-        )
-        country = country_result.scalars().first()
-        if not country:
-            logger.info(f"Создание новой страны: {new_data.address.country_name}")
-            country = Country(
-                name=new_data.address.country_name, code=new_data.address.country_code
-            )
-            db.add(country)
-            await db.flush()
-
-        if person.address_id:
-            address_result = await db.execute(select(Address).filter_by(id=person.address_id))
-            address = address_result.scalars().first()
-            if address:
-                address.street = new_data.address.street
-                address.city = new_data.address.city
-                address.postal_code = new_data.address.postal_code
-                address.country_id = country.id
-            else:
-                logger.error("Адрес не найден.")
-                raise HTTPException(status_code=404, detail="Адрес не найден")
-        else:
-            address = Address(
-                street=new_data.address.street,
-                city=new_data.address.city,
-                postal_code=new_data.address.postal_code,
-                country_id=country.id,
-            )
-            db.add(address)
-            await db.flush()
-            person.address_id = address.id
+        await _save_address(db, person, new_data.address)
 
-    await db.commit()
+    async def _after_commit() -> None:
+        invalidate_principal(user_id)
+        if role_changed:
+            # Выданные access токены несут прежнюю роль
+            await auth_service.bump_token_version(user_id)
+
+    await commit_unit(db, _after_commit)
     logger.info(f"Пользователь с ID {user_id} успешно обновлен.")
 
 
@@ -199,62 +225,71 @@ async def update_password(db: Session, user_id: int, new_password: str) -> None:
         logger.warning("Попытка установить короткий пароль.")
         raise HTTPException(status_code=400, detail="Пароль должен содержать минимум 8 символов")
 
+    # bcrypt выполняется до первого запроса: транзакция записи не ждёт хеширования
+    password_hash = await auth_service.hash_password(new_password)
+
     result = await db.execute(select(User).filter_by(id=user_id))
     user = result.scalars().first()
     if not user:
         logger.error(f"Пользователь с ID {user_id} не найден.")
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
-    user.password_hash = auth_service.get_password_hash(new_password)
-    await db.commit()
+    user.password_hash = password_hash
+    # Сессии, открытые со старым паролем, больше не действительны
+    await commit_unit(db, lambda: auth_service.revoke_all_sessions(user_id))
     logger.info(f"Пароль пользователя ID {user_id} успешно обновлен.")
 
 
-async def create_user(db: Session, user_data: UserRegister) -> User:
+async def update_password_hash(db: Session, user_id: int, password_hash: str) -> None:
+    await db.execute(update(User).where(User.id == user_id).values(password_hash=password_hash))
+    await commit_unit(db)
+    logger.info(f"Хеш пароля пользователя ID {user_id} обновлён.")
+
+
+async def _create_user(db: Session, user_data: UserRegister, type_name: str) -> User:
     logger.info(f"Создание нового пользователя: {user_data.email}")
-    type_name = "Продавец" if user_data.is_user_seller else "Покупатель"
+    # bcrypt выполняется до первого запроса: транзакция записи не ждёт хеширования
+    hashed_password = await auth_service.hash_password(user_data.password)
     user_type_id = await get_user_type_id(db, type_name)
-    hashed_password = auth_service.get_password_hash(user_data.password)
-
-    user = User(email=user_data.email, password_hash=hashed_password)
-    db.add(user)
-    await db.flush()
-
-    db_person = Person(
-        first_name=user_data.first_name,
-        last_name=user_data.last_name,
-        display_name=f"{user_data.first_name} {user_data.last_name}",
-        user_id=user.id,
-        user_type_id=user_type_id,
+    role_id = await get_user_role_id(db)
+
+    # INSERT ... RETURNING: id пользователя без отдельного flush и refresh
+    result = await db.execute(
+        insert(User)
+        .values(email=user_data.email, password_hash=hashed_password, role_id=role_id)
+        .returning(User)
+    )
+    user = result.scalar_one()
+    await db.execute(
+        insert(Person).values(
+            first_name=user_data.first_name,
+            last_name=user_data.last_name,
+            display_name=f"{user_data.first_name} {user_data.last_name}",
+            user_id=user.id,
+            user_type_id=user_type_id,
+        )
     )
-    db.add(db_person)
-    await db.commit()
-    await db.refresh(db_person)
+    await commit_unit(db)
 
     logger.info(f"Пользователь создан с ID {user.id}")
     return user
 
 
-async def create_admin(db: Session, user_data: UserRegister) -> User:
-    logger.info(f"Создание нового пользователя: {user_data.email}")
-    type_name = "Админ"
-    user_type_id = await get_user_type_id(db, type_name)
-    hashed_password = auth_service.get_password_hash(user_data.password)
-
-    user = User(email=user_data.email, password_hash=hashed_password)
-    db.add(user)
-    await db.flush()
-
-    db_person = Person(
-        first_name=user_data.first_name,
-        last_name=user_data.last_name,
-        display_name=f"{user_data.first_name} {user_data.last_name}",
-        user_id=user.id,
-        user_type_id=user_type_id,
-    )
-    db.add(db_person)
-    await db.commit()
-    await db.refresh(db_person)
+async def create_user(db: Session, user_data: UserRegister) -> User:
+    type_name = "Продавец" if user_data.is_user_seller else "Покупатель"
+    return await _create_user(db, user_data, type_name)
 
-    logger.info(f"Пользователь создан с ID {user.id}")
-    return user
+
+async def create_admin(db: Session, user_data: UserRegister) -> User:
+    return await _create_user(db, user_data, "Админ")
+
+
+async def ensure_admin(db: Session, user_data: UserRegister) -> bool:
+    # Существование проверяется до bcrypt: повторный запуск не хеширует пароль
+    if await get_user_by_email(db, user_data.email) is not None:
+        logger.info(f"Администратор {user_data.email} уже существует.")
+        return False
+    # Соединение с БД не удерживается на время хеширования пароля
+    await db.close()
+    await create_admin(db, user_data)
+    return True
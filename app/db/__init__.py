@@ -1,4 +1,23 @@
-from .database import Base, get_session, init_db
-from .redis import redis_client
+from .database import (
+    Base,
+    get_read_session,
+    get_read_session_factory,
+    get_write_session,
+    init_db,
+)
+from .redis import close_redis, get_redis, init_redis
+from .session import LazySession, SessionReleasingRoute, commit_unit
 
-__all__ = ["get_session", "init_db", "Base", "redis_client"]
+__all__ = [
+    "get_read_session",
+    "get_read_session_factory",
+    "get_write_session",
+    "LazySession",
+    "SessionReleasingRoute",
+    "commit_unit",
+    "init_db",
+    "Base",
+    "get_redis",
+    "init_redis",
+    "close_redis",
+]
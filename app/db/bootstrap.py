@@ -0,0 +1,129 @@
+"""Модуль одноразовой инициализации БД при запуске приложения.
+
+Несколько воркеров uvicorn запускаются одновременно, и каждый выполняет lifespan.
+Инициализация (миграции пустой БД и создание администратора) нужна один раз,
+поэтому сначала без блокировки проверяется, что БД уже на последней ревизии и
+администратор существует: тогда запуск не трогает ни миграции, ни bcrypt. Иначе
+воркеры по очереди проходят инициализацию под блокировкой: advisory lock в
+PostgreSQL или flock на файле рядом с БД SQLite.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import exists, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.crud import ensure_admin
+from app.db.models import User
+from app.db.schema import current_revision, ensure_schema, head_revision
+from app.schemas import UserRegister
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock PostgreSQL, общий для всех экземпляров приложения
+ADVISORY_LOCK_KEY = 0x466C6F77  # "Flow"
+
+
+def lock_path(engine: AsyncEngine) -> Optional[str]:
+    """Получить путь файла блокировки для БД SQLite.
+
+    Args:
+        engine: Движок основной БД.
+
+    Returns:
+        Optional[str]: Путь рядом с файлом БД или None для БД в памяти и PostgreSQL.
+    """
+    database = engine.url.database
+    if engine.dialect.name != "sqlite" or not database or database == ":memory:":
+        return None
+    return f"{database}.bootstrap.lock"
+
+
+@asynccontextmanager
+async def bootstrap_lock(engine: AsyncEngine) -> AsyncIterator[None]:
+    """Выполнить блок эксклюзивно среди всех воркеров, работающих с этой БД.
+
+    Args:
+        engine: Движок основной БД.
+    """
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            try:
+                yield
+            finally:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY}
+                )
+        return
+
+    path = lock_path(engine)
+    if path is None or fcntl is None:
+        yield
+        return
+
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        # Ожидание блокировки уходит в поток, чтобы не останавливать цикл событий
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+async def is_bootstrapped(engine: AsyncEngine, admin_email: str) -> bool:
+    """Проверить, что БД на последней ревизии и администратор уже создан.
+
+    Args:
+        engine: Движок основной БД.
+        admin_email: Email администратора по умолчанию.
+
+    Returns:
+        bool: True, если инициализация не требуется.
+    """
+    async with engine.connect() as conn:
+        if await conn.run_sync(current_revision) != head_revision():
+            return False
+        return bool(await conn.scalar(select(exists().where(User.email == admin_email))))
+
+
+async def bootstrap_db(engine: AsyncEngine, admin: UserRegister) -> bool:
+    """Подготовить БД к работе: проверить схему и создать администратора.
+
+    Повторный и одновременный запуск безопасны: уже выполненные шаги
+    пропускаются, а сама инициализация идёт под bootstrap_lock.
+
+    Args:
+        engine: Движок основной БД.
+        admin: Данные администратора по умолчанию.
+
+    Returns:
+        bool: True, если инициализация выполнялась, и False, если БД была готова.
+
+    Raises:
+        SchemaOutdatedError: Если ревизия БД отстаёт от последней миграции.
+    """
+    if await is_bootstrapped(engine, admin.email):
+        logger.info("БД уже инициализирована, инициализация пропущена.")
+        return False
+
+    async with bootstrap_lock(engine):
+        # Другой воркер мог завершить инициализацию, пока этот ждал блокировку
+        async with engine.connect() as conn:
+            await conn.run_sync(ensure_schema)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await ensure_admin(session, admin)
+    logger.info("Инициализация БД завершена.")
+    return True
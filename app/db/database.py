@@ -2,47 +2,378 @@
 
 Содержит настройки подключения к базе данных, объявление асинхронной сессии,
 базового класса для ORM-моделей, а также функции инициализации БД и получения сессии.
+
+Движок строится из config.DB_URL (PostgreSQL через asyncpg или локальный SQLite)
+с настройками пула из конфигурации; состояние пула публикуется в метриках. Для
+SQLite запись идёт через единственное соединение писателя, а чтение — через
+отдельный пул соединений только для чтения; на каждом соединении выставляются
+прагмы WAL, busy_timeout и кэша.
+
+Если заданы реплики (config.DB_REPLICA_URLS), сессии чтения распределяются по ним
+через ReadRouter, а клиент, только что записавший данные, на короткое окно
+читает из основной БД: время записи возвращается ему в cookie LAST_WRITE_COOKIE.
+
+Эндпоинты получают ленивые сессии (LazySession): сессия открывается при первом
+обращении к БД и закрывается сразу после обработчика, до сериализации ответа.
+Сессия записи фиксируется один раз за запрос.
 """
 
 import logging
-from typing import AsyncGenerator
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+
+from app.core.config import config
+from app.core.metrics import metrics
+from app.core.timing import record
+from app.db.routing import ReadRouter
+from app.db.schema import ensure_schema
+from app.db.session import LazySession
 
 # Инициализация логгера
 logger = logging.getLogger(__name__)
 
+
+def is_sqlite(url: str) -> bool:
+    """Проверить, указывает ли строка подключения на SQLite."""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str, readonly: bool = False) -> Dict[str, Any]:
+    """Получить параметры create_async_engine для строки подключения.
+
+    Args:
+        url: Строка подключения SQLAlchemy.
+        readonly: Движок только для чтения (для SQLite — отдельный пул читателей).
+
+    Returns:
+        Dict[str, Any]: Итоговый URL и параметры пула соединений.
+    """
+    db_url = make_url(url)
+    options: Dict[str, Any] = {"url": db_url}
+    if is_sqlite(url) and db_url.database in (None, "", ":memory:"):
+        # БД в памяти живёт в единственном соединении, пул для неё не настраивается
+        return options
+
+    if db_url.get_driver_name() == "asyncpg":
+        options["url"] = db_url.update_query_dict(
+            {"prepared_statement_cache_size": str(config.DB_STATEMENT_CACHE_SIZE)}
+        )
+    options.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    )
+    if is_sqlite(url):
+        # SQLite допускает одного писателя: запись идёт через единственное соединение,
+        # а чтение в режиме WAL — параллельно через пул читателей
+        options.update(
+            pool_size=config.SQLITE_READ_POOL_SIZE if readonly else 1,
+            max_overflow=0,
+        )
+    return options
+
+
+def sqlite_pragmas(readonly: bool = False) -> List[str]:
+    """Получить прагмы SQLite, выполняемые на каждом новом соединении.
+
+    Args:
+        readonly: Соединение пула читателей.
+
+    Returns:
+        List[str]: Прагмы в порядке выполнения.
+    """
+    pragmas = [
+        f"busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}",
+        f"synchronous={config.SQLITE_SYNCHRONOUS}",
+        f"mmap_size={config.SQLITE_MMAP_SIZE}",
+        f"cache_size={config.SQLITE_CACHE_SIZE}",
+        f"temp_store={config.SQLITE_TEMP_STORE}",
+    ]
+    if readonly:
+        pragmas.append("query_only=ON")
+    else:
+        # Режим журнала хранится в самом файле БД, его достаточно задать писателю
+        pragmas.insert(0, f"journal_mode={config.SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine: AsyncEngine, pragmas: List[str]) -> None:
+    """Выполнять прагмы на каждом новом соединении движка SQLite.
+
+    Args:
+        engine: Асинхронный движок SQLAlchemy.
+        pragmas: Прагмы без ключевого слова PRAGMA.
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+def instrument_pool(engine: AsyncEngine, name: str = "db_pool") -> None:
+    """Подписаться на события пула соединений и зарегистрировать его метрики.
+
+    Args:
+        engine: Асинхронный движок SQLAlchemy.
+        name: Имя раздела метрик.
+    """
+    pool = engine.sync_engine.pool
+    counters = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidated": 0}
+
+    def _counter(key: str):
+        def _listener(*_: Any) -> None:
+            counters[key] += 1
+
+        return _listener
+
+    event.listen(pool, "connect", _counter("connects"))
+    event.listen(pool, "checkout", _counter("checkouts"))
+    event.listen(pool, "checkin", _counter("checkins"))
+    event.listen(pool, "invalidate", _counter("invalidated"))
+
+    def _stats() -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(counters)
+        for key in ("size", "checkedout", "overflow", "checkedin"):
+            method = getattr(pool, key, None)
+            if method is not None:
+                stats[key] = method()
+        return stats
+
+    metrics.register(name, _stats)
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """Учитывать число и время SQL-запросов движка в замерах текущего HTTP-запроса.
+
+    Args:
+        engine: Асинхронный движок SQLAlchemy.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn: Any, *_: Any) -> None:
+        # Запросы одного соединения выполняются последовательно
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn: Any, *_: Any) -> None:
+        record("db", time.perf_counter() - conn.info.pop("query_start"))
+
+
+def instrument_statement_cache(engine: AsyncEngine, name: str = "db_statements") -> None:
+    """Считать попадания запросов движка в кэш компиляции и зарегистрировать метрики.
+
+    Промах означает, что запрос компилируется в SQL заново. Низкая доля попаданий
+    говорит о запросах со встроенными литералами или о слишком малом кэше.
+
+    Args:
+        engine: Асинхронный движок SQLAlchemy.
+        name: Имя раздела метрик.
+    """
+    counters = {"hits": 0, "misses": 0, "uncached": 0}
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _count(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, *_: Any):
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit == CACHE_HIT:
+            counters["hits"] += 1
+        elif cache_hit == CACHE_MISS:
+            counters["misses"] += 1
+        else:
+            # DDL, текстовые запросы и прочее, что не кэшируется
+            counters["uncached"] += 1
+
+    def _stats() -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(counters)
+        compiled = counters["hits"] + counters["misses"]
+        stats["hit_rate"] = round(counters["hits"] / compiled, 4) if compiled else None
+        cache = engine.sync_engine._compiled_cache
+        stats["size"] = len(cache) if cache is not None else 0
+        return stats
+
+    metrics.register(name, _stats)
+
+
+def create_engine(url: str, readonly: bool = False, name: str = "db_pool") -> AsyncEngine:
+    """Создать асинхронный движок с настройками пула из конфигурации.
+
+    Args:
+        url: Строка подключения SQLAlchemy.
+        readonly: Движок только для чтения (для SQLite — с прагмой query_only).
+        name: Имя раздела метрик пула; метрики кэша компиляции идут в {name}_statements.
+
+    Returns:
+        AsyncEngine: Движок с подключёнными метриками пула, кэша и замерами запросов.
+    """
+    options = engine_options(url, readonly=readonly)
+    engine = create_async_engine(options.pop("url"), **options)
+    if is_sqlite(url):
+        apply_sqlite_pragmas(engine, sqlite_pragmas(readonly=readonly))
+    instrument_pool(engine, name=name)
+    instrument_queries(engine)
+    instrument_statement_cache(engine, name=f"{name}_statements")
+    logger.info(f"Движок БД создан: {engine.url.render_as_string(hide_password=True)}")
+    return engine
+
+
 # Создание асинхронного движка SQLAlchemy
-engine = create_async_engine("sqlite+aiosqlite:///flowers.db")  # TODO: заменить на config.DB_URL
+engine = create_engine(config.DB_URL)
+
+# Чтение идёт через реплики, если они заданы. Для SQLite без реплик — через
+# отдельный пул соединений только для чтения, для остальных СУБД — через общий пул
+read_engines = [
+    create_engine(url, readonly=True, name=f"db_replica_pool_{i}")
+    for i, url in enumerate(config.DB_REPLICA_URLS)
+]
+if not read_engines and is_sqlite(config.DB_URL):
+    read_engines = [create_engine(config.DB_URL, readonly=True, name="db_read_pool")]
+
+# Маршрутизатор сессий чтения; закрепление после записи нужно только при репликах
+read_router = ReadRouter(
+    primary=engine,
+    replicas=read_engines,
+    strategy=config.DB_REPLICA_STRATEGY,
+    pin_seconds=config.DB_READ_YOUR_WRITES_SECONDS if config.DB_REPLICA_URLS else 0,
+)
+# Cookie со временем последней записи клиента для окна read-your-writes
+LAST_WRITE_COOKIE = "last_write"
 
-# Создание фабрики асинхронных сессий
+# Создание фабрики асинхронных сессий записи
 async_session = sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
 
 # Базовый класс для декларативных ORM-моделей
 Base = declarative_base()
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    """Получить асинхронную сессию для работы с базой данных.
+def last_write(request: Request) -> Optional[float]:
+    """Получить время последней записи клиента для закрепления за основной БД.
+
+    Время приходит в cookie, выставленной после фиксации записи, поэтому
+    закрепление не зависит от воркера, принявшего запрос, и не требует хранилища
+    на сервере. Подделанное значение может лишь направить чтение клиента в
+    основную БД на окно config.DB_READ_YOUR_WRITES_SECONDS.
+
+    Args:
+        request: Текущий HTTP-запрос.
+
+    Returns:
+        Optional[float]: Время записи (Unix time) или None, если cookie нет или она некорректна.
+    """
+    value = request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_after_commit(session: Session) -> None:
+    # Клиент, записавший данные, на окно read-your-writes читает из основной БД
+    response = session.info.get("response")
+    if response is not None and read_router.pin_seconds > 0:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            # Округление вниз: время записи не должно оказаться в будущем
+            str(math.floor(time.time() * 1000) / 1000),
+            max_age=math.ceil(read_router.pin_seconds),
+            httponly=True,
+            samesite="lax",
+        )
+
+
+@asynccontextmanager
+async def _lazy(
+    factory: Callable[[], AsyncSession], unit_of_work: bool = False
+) -> AsyncIterator[LazySession]:
+    session = LazySession(factory, unit_of_work=unit_of_work)
+    try:
+        yield session
+        if unit_of_work:
+            # Маршруты SessionReleasingRoute фиксируют сессию раньше, здесь это
+            # страховка для остальных: без открытой сессии complete ничего не делает
+            await session.complete()
+    finally:
+        if not session.used:
+            # Запрос объявил сессию, но не обратился к БД: соединение не понадобилось
+            metrics.inc("db.sessions.unused")
+        await session.release()
+
+
+async def get_write_session(response: Response) -> AsyncGenerator[LazySession, None]:
+    """Получить ленивую сессию основной БД для запроса, изменяющего данные.
+
+    Сессия открывается при первом обращении к ней и служит единицей работы:
+    изменения запроса фиксируются одним COMMIT после обработчика (см.
+    app.db.session). После фиксации ответ выставляет cookie LAST_WRITE_COOKIE,
+    и клиент читает из основной БД config.DB_READ_YOUR_WRITES_SECONDS.
 
     Yields:
-        AsyncSession: Асинхронная сессия SQLAlchemy.
+        LazySession: Прокси асинхронной сессии SQLAlchemy.
     """
-    async with async_session() as session:
+
+    def _open() -> AsyncSession:
+        session = async_session()
+        session.info["response"] = response
+        return session
+
+    async with _lazy(_open, unit_of_work=True) as session:
         yield session
 
 
+async def get_read_session(request: Request) -> AsyncGenerator[LazySession, None]:
+    """Получить ленивую сессию только для чтения.
+
+    При первом обращении сессия открывается на реплике, выбранной маршрутизатором,
+    или на основной БД, если клиент недавно записывал данные. Для SQLite без реплик
+    сессия работает через пул читателей и не занимает единственное соединение писателя.
+
+    Yields:
+        LazySession: Прокси асинхронной сессии SQLAlchemy.
+    """
+    written_at = last_write(request)
+    async with _lazy(lambda: read_router.session(written_at)) as session:
+        yield session
+
+
+def get_read_session_factory(request: Request) -> Callable[[], AsyncSession]:
+    """Получить фабрику сессий чтения для потоковых ответов.
+
+    Тело StreamingResponse формируется после того, как сессии запроса закрыты,
+    поэтому потоковый ответ открывает собственную сессию этой фабрикой и сам её
+    закрывает. Сессия выбирается маршрутизатором так же, как в get_read_session.
+
+    Returns:
+        Callable[[], AsyncSession]: Фабрика асинхронных сессий SQLAlchemy.
+    """
+    written_at = last_write(request)
+    return lambda: read_router.session(written_at)
+
+
 async def init_db() -> None:
-    """Инициализировать базу данных, создав все таблицы, определённые в моделях.
+    """Проверить схему базы данных перед запуском приложения.
 
-    Эта функция использует метаданные из Base и создаёт все таблицы,
-    если они ещё не существуют.
+    Схема ведётся миграциями Alembic (app/db/migrations). На пустую БД миграции
+    применяются сразу; отставшая схема не обновляется автоматически, и
+    приложение не запускается.
 
     Raises:
+        SchemaOutdatedError: Если ревизия БД отстаёт от последней миграции.
         Любые исключения, возникающие при подключении к БД или выполнении запросов.
     """
-    logger.info("Creating database tables...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)  # type: ignore[attr-defined]
-    logger.info("Database tables created.")
+    logger.info("Checking database schema...")
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    logger.info("Database schema is up to date.")
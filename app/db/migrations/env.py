@@ -0,0 +1,87 @@
+"""Окружение миграций Alembic.
+
+Строка подключения берётся из sqlalchemy.url, если она передана явно, иначе из
+config.DB_URL. Метаданные моделей используются для autogenerate. Каждая миграция
+выполняется в своей транзакции, чтобы миграции с autocommit_block (например,
+CREATE INDEX CONCURRENTLY в PostgreSQL) не смешивались с остальными.
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import config as app_config
+from app.db import models  # noqa: F401  регистрация таблиц в метаданных
+from app.db.database import Base
+from app.db.schema import include_name
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _url() -> str:
+    return config.get_main_option("sqlalchemy.url") or app_config.DB_URL
+
+
+def run_migrations_offline() -> None:
+    """Сгенерировать SQL миграций без подключения к БД."""
+    context.configure(
+        url=_url(),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    """Применить миграции на открытом соединении."""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        transaction_per_migration=True,
+        # SQLite не умеет ALTER TABLE для большинства операций
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """Подключиться к БД и применить миграции."""
+    connectable = create_async_engine(_url(), poolclass=pool.NullPool)
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    """Применить миграции к БД."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        # Соединение передано вызывающим кодом, например проверкой схемы при запуске
+        do_run_migrations(connection)
+    else:
+        asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,198 @@
+"""Исходная схема БД.
+
+Соответствует таблицам, которые раньше создавались Base.metadata.create_all.
+Существующую БД с такой схемой достаточно отметить командой
+``alembic stamp 0001``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "country",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("code", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "flower_type",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "flower_usage",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "flowering_season",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "user_role",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "user_type",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "address",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("street", sa.String(), nullable=True),
+        sa.Column("city", sa.String(), nullable=True),
+        sa.Column("postal_code", sa.String(), nullable=True),
+        sa.Column("country_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["country_id"],
+            ["country.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "flower",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("type_id", sa.Integer(), nullable=False),
+        sa.Column("season_id", sa.Integer(), nullable=True),
+        sa.Column("usage_id", sa.Integer(), nullable=True),
+        sa.Column("variety", sa.String(length=100), nullable=True),
+        sa.Column("price", sa.DECIMAL(precision=10, scale=2), nullable=False),
+        sa.Column("country_id", sa.Integer(), nullable=True),
+        sa.CheckConstraint("price > 0", name="check_price_positive"),
+        sa.ForeignKeyConstraint(
+            ["country_id"],
+            ["country.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["season_id"],
+            ["flowering_season.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["type_id"],
+            ["flower_type.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["usage_id"],
+            ["flower_usage.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "user",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("password_hash", sa.String(length=255), nullable=False),
+        sa.Column("role_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["role_id"],
+            ["user_role.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+    )
+    op.create_table(
+        "person",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("first_name", sa.String(length=100), nullable=False),
+        sa.Column("last_name", sa.String(length=100), nullable=False),
+        sa.Column("display_name", sa.String(length=150), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("address_id", sa.Integer(), nullable=True),
+        sa.Column("user_type_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["address_id"],
+            ["address.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_type_id"],
+            ["user_type.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("buyer_id", sa.Integer(), nullable=True),
+        sa.Column("order_date", sa.Date(), nullable=True),
+        sa.Column("is_closed", sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["buyer_id"],
+            ["person.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "saleable_flowers",
+        sa.Column("seller_id", sa.Integer(), nullable=False),
+        sa.Column("flower_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["flower_id"],
+            ["flower.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["seller_id"],
+            ["person.id"],
+        ),
+        sa.PrimaryKeyConstraint("seller_id", "flower_id"),
+    )
+    op.create_table(
+        "ordered_flowers",
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("flower_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["flower_id"],
+            ["flower.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["order_id"],
+            ["orders.id"],
+        ),
+        sa.PrimaryKeyConstraint("order_id", "flower_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ordered_flowers")
+    op.drop_table("saleable_flowers")
+    op.drop_table("orders")
+    op.drop_table("person")
+    op.drop_table("user")
+    op.drop_table("flower")
+    op.drop_table("address")
+    op.drop_table("user_type")
+    op.drop_table("user_role")
+    op.drop_table("flowering_season")
+    op.drop_table("flower_usage")
+    op.drop_table("flower_type")
+    op.drop_table("country")
@@ -0,0 +1,58 @@
+"""Индексы горячих путей.
+
+Индексы по внешним ключам, которыми соединяются заказы, персоны и каталог, а
+также по полям фильтрации каталога. В PostgreSQL индексы строятся через
+CREATE INDEX CONCURRENTLY вне транзакции и не блокируют запись в таблицы, поэтому
+миграцию можно применять на работающей БД. Прерванное построение оставляет
+невалидный индекс: его нужно удалить и повторить миграцию.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Таблица и столбец каждого индекса; имена совпадают с index=True в моделях
+INDEXES = [
+    ("person", "user_id"),
+    ("orders", "buyer_id"),
+    ("ordered_flowers", "flower_id"),
+    ("saleable_flowers", "flower_id"),
+    ("flower", "type_id"),
+    ("flower", "season_id"),
+    ("flower", "usage_id"),
+    ("flower", "country_id"),
+    ("flower", "price"),
+    ("country", "code"),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, column in INDEXES:
+            op.create_index(
+                f"ix_{table}_{column}",
+                table,
+                [column],
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, column in reversed(INDEXES):
+            op.drop_index(
+                f"ix_{table}_{column}",
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
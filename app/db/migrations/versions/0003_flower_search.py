@@ -0,0 +1,101 @@
+"""Полнотекстовый поиск по названию и сорту цветка.
+
+В SQLite создаётся внешняя FTS5-таблица flower_fts над flower(name, variety),
+которую триггеры синхронизируют при вставке, изменении и удалении цветков. В
+PostgreSQL строятся GIN-индекс по tsvector тех же полей и триграммный индекс
+pg_trgm по названию, ускоряющий фильтр name (ILIKE '%...%'). Индексы PostgreSQL
+строятся через CREATE INDEX CONCURRENTLY.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS flower_fts USING fts5(
+        name, variety, content='flower', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flower_fts_insert AFTER INSERT ON flower BEGIN
+        INSERT INTO flower_fts(rowid, name, variety) VALUES (new.id, new.name, new.variety);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flower_fts_delete AFTER DELETE ON flower BEGIN
+        INSERT INTO flower_fts(flower_fts, rowid, name, variety)
+        VALUES ('delete', old.id, old.name, old.variety);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS flower_fts_update AFTER UPDATE OF name, variety ON flower BEGIN
+        INSERT INTO flower_fts(flower_fts, rowid, name, variety)
+        VALUES ('delete', old.id, old.name, old.variety);
+        INSERT INTO flower_fts(rowid, name, variety) VALUES (new.id, new.name, new.variety);
+    END
+    """,
+    # Совпадение в названии весит больше, чем в сорте
+    "INSERT INTO flower_fts(flower_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    # Индексирование уже существующих цветков
+    "INSERT INTO flower_fts(flower_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS flower_fts_update",
+    "DROP TRIGGER IF EXISTS flower_fts_delete",
+    "DROP TRIGGER IF EXISTS flower_fts_insert",
+    "DROP TABLE IF EXISTS flower_fts",
+]
+
+# Выражение индекса должно совпадать с app.crud.search.pg_search_vector
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_flower_search ON flower USING gin (
+        to_tsvector('simple'::regconfig, coalesce(name, '') || ' ' || coalesce(variety, ''))
+    )
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_flower_name_trgm
+    ON flower USING gin (name gin_trgm_ops)
+    """,
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX CONCURRENTLY IF EXISTS ix_flower_name_trgm",
+    "DROP INDEX CONCURRENTLY IF EXISTS ix_flower_search",
+]
+
+
+def _execute(statements: Sequence[str]) -> None:
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        _execute(SQLITE_UPGRADE)
+    elif dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            _execute(POSTGRES_UPGRADE)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        _execute(SQLITE_DOWNGRADE)
+    elif dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            _execute(POSTGRES_DOWNGRADE)
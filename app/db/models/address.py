@@ -13,7 +13,7 @@ class Address(Base):
     postal_code = Column(String)
     country_id = Column(Integer, ForeignKey("country.id"))
 
-    country = relationship("Country")
+    country = relationship("Country", lazy="raise")
 
 
 class Country(Base):
@@ -21,4 +21,4 @@ class Country(Base):
 
     id = Column(Integer, primary_key=True)
     name = Column(String)
-    code = Column(String)
+    code = Column(String, index=True)
@@ -8,14 +8,14 @@ saleable_flowers = Table(
     "saleable_flowers",
     Base.metadata,
     Column("seller_id", Integer, ForeignKey("person.id"), primary_key=True),
-    Column("flower_id", Integer, ForeignKey("flower.id"), primary_key=True),
+    Column("flower_id", Integer, ForeignKey("flower.id"), primary_key=True, index=True),
 )
 
 ordered_flowers = Table(
     "ordered_flowers",
     Base.metadata,
     Column("order_id", Integer, ForeignKey("orders.id"), primary_key=True),
-    Column("flower_id", Integer, ForeignKey("flower.id"), primary_key=True),
+    Column("flower_id", Integer, ForeignKey("flower.id"), primary_key=True, index=True),
     Column("quantity", Integer, nullable=False),
 )
 
@@ -49,21 +49,31 @@ class Flower(Base):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
-    type_id = Column(Integer, ForeignKey("flower_type.id"), nullable=False)
-    season_id = Column(Integer, ForeignKey("flowering_season.id"))
-    usage_id = Column(Integer, ForeignKey("flower_usage.id"))
+    type_id = Column(Integer, ForeignKey("flower_type.id"), nullable=False, index=True)
+    season_id = Column(Integer, ForeignKey("flowering_season.id"), index=True)
+    usage_id = Column(Integer, ForeignKey("flower_usage.id"), index=True)
     variety = Column(String(100))
-    price = Column(DECIMAL(10, 2), nullable=False)
-    country_id = Column(Integer, ForeignKey("country.id"))
+    price = Column(DECIMAL(10, 2), nullable=False, index=True)
+    country_id = Column(Integer, ForeignKey("country.id"), index=True)
 
     __table_args__ = (
         CheckConstraint(price > 0, name='check_price_positive'),
     )
 
-    flower_type = relationship("FlowerType")
-    season = relationship("FloweringSeason")
-    usage = relationship("FlowerUsage")
-    country = relationship("Country")
-    sellers = relationship("Person", secondary=saleable_flowers, back_populates="flowers_for_sale")
-    orders = relationship("Order", secondary=ordered_flowers, back_populates="flowers")
+    flower_type = relationship("FlowerType", lazy="raise")
+    season = relationship("FloweringSeason", lazy="raise")
+    usage = relationship("FlowerUsage", lazy="raise")
+    country = relationship("Country", lazy="raise")
+    sellers = relationship(
+        "Person",
+        secondary=saleable_flowers,
+        back_populates="flowers_for_sale",
+        lazy="raise",
+    )
+    orders = relationship(
+        "Order",
+        secondary=ordered_flowers,
+        back_populates="flowers",
+        lazy="raise",
+    )
 
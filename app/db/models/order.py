@@ -9,9 +9,14 @@ class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True)
-    buyer_id = Column(Integer, ForeignKey("person.id"))
+    buyer_id = Column(Integer, ForeignKey("person.id"), index=True)
     order_date = Column(Date)
     is_closed = Column(Boolean, default=False)
 
-    buyer = relationship("Person", back_populates="orders")
-    flowers = relationship("Flower", secondary=ordered_flowers, back_populates="orders")
+    buyer = relationship("Person", back_populates="orders", lazy="raise")
+    flowers = relationship(
+        "Flower",
+        secondary=ordered_flowers,
+        back_populates="orders",
+        lazy="raise",
+    )
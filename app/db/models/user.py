@@ -27,7 +27,7 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     role_id = Column(Integer, ForeignKey("user_role.id"), nullable=False)
 
-    role = relationship("UserRole")
+    role = relationship("UserRole", lazy="raise")
 
 
 class Person(Base):
@@ -37,12 +37,17 @@ class Person(Base):
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
     display_name = Column(String(150))
-    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
     address_id = Column(Integer, ForeignKey("address.id"))
     user_type_id = Column(Integer, ForeignKey("user_type.id"), nullable=False)
 
-    user = relationship("User")
-    address = relationship("Address")
-    user_type = relationship("UserType")
-    flowers_for_sale = relationship("Flower", secondary=saleable_flowers, back_populates="sellers")
-    orders = relationship("Order", back_populates="buyer")
+    user = relationship("User", lazy="raise")
+    address = relationship("Address", lazy="raise")
+    user_type = relationship("UserType", lazy="raise")
+    flowers_for_sale = relationship(
+        "Flower",
+        secondary=saleable_flowers,
+        back_populates="sellers",
+        lazy="raise",
+    )
+    orders = relationship("Order", back_populates="buyer", lazy="raise")
@@ -1,11 +1,81 @@
-import redis
+"""Модуль подключения к Redis.
+
+Содержит общий асинхронный пул соединений и клиент Redis. Пул создаётся при старте
+приложения (lifespan) и закрывается при его остановке, а все обращения к Redis
+выполняются без блокировки event loop.
+"""
+
+import logging
+from typing import Optional
+
+from redis.asyncio import BlockingConnectionPool, Redis
 
 from app.core.config import config
 
-# Настройки Redis
-redis_client = redis.Redis(
-    host=config.REDIS_HOST,
-    port=config.REDIS_PORT,
-    db=config.REDIS_DB,
-    decode_responses=True,  # если нужны строки, а не байты
-)
+# Инициализация логгера
+logger = logging.getLogger(__name__)
+
+# Общий пул соединений и клиент, создаются в init_redis
+redis_pool: Optional[BlockingConnectionPool] = None
+redis_client: Optional[Redis] = None
+
+
+def create_redis_pool() -> BlockingConnectionPool:
+    """Создать пул соединений Redis по настройкам из конфигурации.
+
+    Returns:
+        BlockingConnectionPool: Пул, ожидающий освобождения соединения при исчерпании
+        лимита вместо немедленной ошибки.
+    """
+    return BlockingConnectionPool(
+        host=config.REDIS_HOST,
+        port=config.REDIS_PORT,
+        db=config.REDIS_DB,
+        decode_responses=True,  # если нужны строки, а не байты
+        max_connections=config.REDIS_MAX_CONNECTIONS,
+        timeout=config.REDIS_POOL_TIMEOUT,
+        socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=config.REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL,
+    )
+
+
+async def init_redis() -> Redis:
+    """Создать общий пул соединений и клиент Redis.
+
+    Returns:
+        Redis: Асинхронный клиент, использующий общий пул.
+    """
+    return get_redis()
+
+
+def get_redis() -> Redis:
+    """Получить общий клиент Redis.
+
+    Если клиент ещё не создан (например, приложение запущено без lifespan),
+    он создаётся при первом обращении.
+
+    Returns:
+        Redis: Асинхронный клиент, использующий общий пул.
+    """
+    global redis_pool, redis_client
+    if redis_client is None:
+        redis_pool = create_redis_pool()
+        redis_client = Redis(connection_pool=redis_pool)
+        logger.info(
+            f"Пул соединений Redis создан: {config.REDIS_HOST}:{config.REDIS_PORT}, "
+            f"max_connections={config.REDIS_MAX_CONNECTIONS}"
+        )
+    return redis_client
+
+
+async def close_redis() -> None:
+    """Закрыть клиент Redis и все соединения общего пула."""
+    global redis_pool, redis_client
+    if redis_client is not None:
+        await redis_client.aclose()
+    if redis_pool is not None:
+        await redis_pool.aclose()
+    redis_pool = None
+    redis_client = None
+    logger.info("Пул соединений Redis закрыт.")
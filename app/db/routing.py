@@ -0,0 +1,82 @@
+"""Модуль маршрутизации чтения между основной БД и репликами.
+
+Предоставляет класс ReadRouter, который выбирает движок для сессии чтения:
+реплику по кругу (round_robin) или с наименьшим числом занятых соединений
+(least_connections). Клиент, только что записавший данные, на короткое окно
+закрепляется за основной БД, чтобы сразу видеть свои изменения несмотря на
+отставание репликации. Время последней записи хранит сам клиент (см.
+app.db.database), поэтому закрепление действует на любом воркере.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+STRATEGIES = ("round_robin", "least_connections")
+
+
+class ReadRouter:
+    """Выбор движка для сессий чтения с закреплением после записи."""
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: List[AsyncEngine],
+        strategy: str = "round_robin",
+        pin_seconds: float = 0.0,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия выбора реплики: {strategy}")
+        self.primary = primary
+        self.replicas = replicas or [primary]
+        self.strategy = strategy
+        self._next = 0
+        # 0 отключает закрепление: без реплик читать свои записи и так можно сразу
+        self.pin_seconds = pin_seconds
+        self._factories: Dict[AsyncEngine, sessionmaker] = {
+            engine: sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+            for engine in [primary, *self.replicas]
+        }
+
+    def is_pinned(self, last_write: Optional[float]) -> bool:
+        """Проверить, закреплён ли клиент за основной БД.
+
+        Args:
+            last_write: Время последней записи клиента (Unix time) или None.
+        """
+        if last_write is None or self.pin_seconds <= 0:
+            return False
+        # Время из будущего клиент мог только подделать: такое закрепление не действует
+        return 0 <= time.time() - last_write < self.pin_seconds
+
+    def choose(self, last_write: Optional[float] = None) -> AsyncEngine:
+        """Выбрать движок для сессии чтения.
+
+        Args:
+            last_write: Время последней записи клиента для проверки закрепления.
+
+        Returns:
+            AsyncEngine: Основная БД для закреплённого клиента, иначе реплика по стратегии.
+        """
+        if self.is_pinned(last_write):
+            return self.primary
+        if len(self.replicas) == 1:
+            return self.replicas[0]
+        if self.strategy == "least_connections":
+            return min(self.replicas, key=lambda engine: engine.sync_engine.pool.checkedout())
+        engine = self.replicas[self._next % len(self.replicas)]
+        self._next += 1
+        return engine
+
+    def session(self, last_write: Optional[float] = None) -> AsyncSession:
+        """Создать сессию чтения на выбранном движке.
+
+        Args:
+            last_write: Время последней записи клиента для проверки закрепления.
+
+        Returns:
+            AsyncSession: Асинхронная сессия SQLAlchemy.
+        """
+        return self._factories[self.choose(last_write)]()
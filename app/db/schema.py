@@ -0,0 +1,129 @@
+"""Модуль проверки версии схемы БД.
+
+Схема ведётся миграциями Alembic из app/db/migrations. При запуске приложение
+сверяет ревизию БД с последней миграцией и отказывается работать на отставшей
+схеме: миграции применяются отдельно командой ``alembic upgrade head``. На пустую
+БД миграции применяются сразу при запуске.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[2]
+ALEMBIC_INI = ROOT / "alembic.ini"
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+# Объекты полнотекстового поиска создаются миграциями вручную и не описаны в моделях
+SEARCH_OBJECTS = ("flower_fts", "ix_flower_search", "ix_flower_name_trgm")
+
+
+class SchemaOutdatedError(RuntimeError):
+    """Ревизия схемы БД не совпадает с последней миграцией."""
+
+
+def alembic_config(url: Optional[str] = None) -> AlembicConfig:
+    """Получить конфигурацию Alembic приложения.
+
+    Args:
+        url: Строка подключения; по умолчанию используется config.DB_URL.
+
+    Returns:
+        AlembicConfig: Конфигурация для команд alembic.command.
+    """
+    alembic_cfg = AlembicConfig(str(ALEMBIC_INI))
+    alembic_cfg.set_main_option("script_location", str(MIGRATIONS_DIR))
+    if url:
+        alembic_cfg.set_main_option("sqlalchemy.url", url)
+    return alembic_cfg
+
+
+def include_name(name: Optional[str], type_: str, parent_names: Any) -> bool:
+    """Исключить объекты поиска из сравнения схемы с моделями при autogenerate."""
+    return not (name or "").startswith(SEARCH_OBJECTS)
+
+
+def head_revision() -> Optional[str]:
+    """Получить ревизию последней миграции."""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(connection: Connection) -> Optional[str]:
+    """Получить ревизию, на которой находится БД, или None для БД без версии."""
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def matches_initial_schema(connection: Connection) -> bool:
+    """Проверить, что схема БД без версии совпадает с ревизией 0001.
+
+    Такую схему создавал create_all прежней версии приложения: её можно отметить
+    ревизией 0001 и обновить миграциями. Индексы не учитываются, их добавляют
+    миграции после 0001.
+
+    Args:
+        connection: Синхронное соединение SQLAlchemy.
+
+    Returns:
+        bool: True, если таблицы, столбцы и ограничения совпадают с моделями.
+    """
+    # Модели импортируются здесь: app.db.database сам импортирует этот модуль
+    from app.db import models  # noqa: F401
+    from app.db.database import Base
+
+    context = MigrationContext.configure(connection, opts={"include_name": include_name})
+    diffs = compare_metadata(context, Base.metadata)
+    # Изменения столбцов приходят списком, остальные — кортежем с видом изменения
+    return all(isinstance(diff, tuple) and diff[0] == "add_index" for diff in diffs)
+
+
+def ensure_schema(connection: Connection) -> None:
+    """Проверить, что схема БД соответствует последней миграции.
+
+    На пустую БД применяются все миграции. Функция синхронная и вызывается
+    через AsyncConnection.run_sync на соединении вне транзакции.
+
+    Args:
+        connection: Синхронное соединение SQLAlchemy.
+
+    Raises:
+        SchemaOutdatedError: Если ревизия БД отличается от последней миграции.
+    """
+    head = head_revision()
+    current = current_revision(connection)
+    empty = current is None and not inspect(connection).get_table_names()
+    # Завершение транзакции, открытой проверкой: миграции управляют транзакциями сами
+    connection.commit()
+    if current == head:
+        logger.info(f"Схема БД актуальна, ревизия {head}")
+        return
+
+    if empty:
+        logger.info(f"БД пуста: применение миграций до ревизии {head}")
+        alembic_cfg = alembic_config()
+        alembic_cfg.attributes["connection"] = connection
+        alembic_cfg.attributes["configure_logger"] = False
+        command.upgrade(alembic_cfg, "head")
+        return
+
+    hint = "alembic upgrade head"
+    if current is None:
+        if not matches_initial_schema(connection):
+            raise SchemaOutdatedError(
+                "Схема БД без версии не совпадает с ревизией 0001: создайте новую БД "
+                "командой alembic upgrade head и перенесите в неё данные"
+            )
+        # БД создана прежним create_all: сначала она отмечается исходной ревизией
+        hint = "alembic stamp 0001 && alembic upgrade head"
+    raise SchemaOutdatedError(
+        f"Схема БД на ревизии {current or 'без версии'}, требуется {head}: выполните {hint}"
+    )
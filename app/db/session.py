@@ -0,0 +1,145 @@
+"""Модуль ленивых сессий БД для HTTP-запросов.
+
+Обработчик или зависимость, объявившие сессию, часто так и не обращаются к БД:
+запрос отклоняется авторизацией, principal восстанавливается из claims токена.
+LazySession создаёт настоящую сессию (и выбирает для неё реплику) только при
+первом обращении, а SessionReleasingRoute закрывает её сразу после обработчика,
+до сериализации ответа, чтобы соединение не простаивало вне пула.
+
+Сессия записи — единица работы запроса: функции CRUD не фиксируют транзакцию
+сами, а вызывают commit_unit, и SessionReleasingRoute фиксирует все изменения
+обработчика одним COMMIT после его успешного завершения. Если обработчик упал,
+изменения откатываются целиком. Действия, которые можно выполнять только после
+фиксации (сброс кэшей, отзыв токенов), откладываются до неё.
+"""
+
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, List, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import metrics
+
+
+class LazySession:
+    """Прокси AsyncSession, открывающий сессию при первом обращении к ней.
+
+    Args:
+        factory: Фабрика настоящей сессии.
+        unit_of_work: Фиксировать ли изменения один раз в complete. Без этого
+            флага commit_unit фиксирует транзакцию сразу.
+    """
+
+    def __init__(self, factory: Callable[[], AsyncSession], unit_of_work: bool = False):
+        self._factory = factory
+        self._session: Optional[AsyncSession] = None
+        self._on_commit: List[Callable[[], Awaitable[None]]] = []
+        self.unit_of_work = unit_of_work
+        self.used = False
+
+    @property
+    def opened(self) -> bool:
+        """Открыта ли сейчас настоящая сессия."""
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+            self.used = True
+            metrics.inc("db.sessions.opened")
+        return getattr(self._session, name)
+
+    def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Отложить действие до фиксации единицы работы.
+
+        Args:
+            callback: Асинхронное действие без аргументов.
+        """
+        self._on_commit.append(callback)
+
+    async def complete(self) -> None:
+        """Зафиксировать единицу работы и выполнить отложенные после фиксации действия."""
+        callbacks, self._on_commit = self._on_commit, []
+        if self._session is not None:
+            await self._session.commit()
+            metrics.inc("db.sessions.committed")
+        for callback in callbacks:
+            await callback()
+
+    async def release(self) -> None:
+        """Закрыть открытую сессию и вернуть её соединение в пул.
+
+        Незафиксированные изменения откатываются, загруженные объекты остаются
+        доступными. Следующее обращение к прокси откроет новую сессию.
+        """
+        session, self._session = self._session, None
+        self._on_commit = []
+        if session is not None:
+            await session.close()
+
+
+async def commit_unit(db: Any, on_commit: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+    """Зафиксировать изменения или отложить фиксацию до конца единицы работы.
+
+    В сессии запроса (LazySession с unit_of_work) изменения только отправляются
+    в БД, а COMMIT и on_commit выполняются в LazySession.complete. В остальных
+    сессиях, например при инициализации приложения, транзакция фиксируется сразу.
+
+    Args:
+        db: Сессия AsyncSession или LazySession.
+        on_commit: Действие, которое выполняется только после фиксации.
+    """
+    if isinstance(db, LazySession) and db.unit_of_work:
+        await db.flush()
+        if on_commit is not None:
+            db.after_commit(on_commit)
+        return
+    await db.commit()
+    if on_commit is not None:
+        await on_commit()
+
+
+def release_sessions(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Обернуть обработчик так, чтобы его ленивые сессии закрывались сразу после него.
+
+    После успешного обработчика единицы работы фиксируются; при исключении
+    сессии закрываются без фиксации, и все изменения откатываются.
+
+    Args:
+        endpoint: Асинхронный обработчик маршрута.
+
+    Returns:
+        Callable[..., Any]: Обработчик с той же сигнатурой.
+    """
+    if not inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        sessions = [value for value in kwargs.values() if isinstance(value, LazySession)]
+        try:
+            result = await endpoint(*args, **kwargs)
+            for session in sessions:
+                if session.unit_of_work:
+                    await session.complete()
+            return result
+        finally:
+            for session in sessions:
+                if session.opened:
+                    metrics.inc("db.sessions.released_before_response")
+                    await session.release()
+
+    return wrapper
+
+
+class SessionReleasingRoute(APIRoute):
+    """Маршрут, закрывающий сессии обработчика до сериализации ответа.
+
+    FastAPI закрывает зависимости с yield только после сериализации, и без этого
+    соединение занято всё время построения ответа.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, release_sessions(endpoint), **kwargs)
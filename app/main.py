@@ -1,35 +1,65 @@
 from contextlib import asynccontextmanager
 import time
+from typing import Dict
 from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from app.api.v1 import AdminAPI, AuthAPI, FlowerAPI, OrderAPI, SellerAPI, UserAPI
-from app.core import setup_logger
-from app.crud import create_admin
-from app.db.database import get_session, init_db
+from app.core import auth_service, config, metrics, setup_logger
+from app.core.revocation import revocation_mirror
+from app.core.timing import RequestTimings, phase, request_timings
+from app.db import close_redis, init_redis
+from app.db.bootstrap import bootstrap_db
+from app.db.database import engine
 from app.schemas import UserRegister
 import logging
 from fastapi import FastAPI, Request
 
 logger = logging.getLogger(__name__)
 
+# Администратор по умолчанию, создаваемый при первом запуске
+DEFAULT_ADMIN = UserRegister(
+    email="test@admin.ti",
+    first_name="test@admin.ti",
+    last_name="test@admin.ti",
+    password="test@admin.ti",
+)
+
+
+def log_startup(phases: Dict[str, float], total_ms: float) -> None:
+    summary = ", ".join(f"{name} {ms:.1f} мс" for name, ms in phases.items())
+    if total_ms > config.STARTUP_BUDGET_MS:
+        logger.warning(
+            f"Запуск занял {total_ms:.1f} мс при бюджете "
+            f"{config.STARTUP_BUDGET_MS:.0f} мс: {summary}"
+        )
+    else:
+        logger.info(f"Приложение запущено за {total_ms:.1f} мс: {summary}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logger()
-    await init_db()
-
-    async for session in get_session():
-        await create_admin(
-            session,
-            UserRegister(
-                email="test@admin.ti",
-                first_name="test@admin.ti",
-                last_name="test@admin.ti",
-                password="test@admin.ti",
-            ),
-        )
+    # Этапы запуска замеряются: холодный старт воркера должен укладываться в бюджет
+    phases: Dict[str, float] = {}
+    start_time = time.monotonic()
+    with phase(phases, "db"):
+        await bootstrap_db(engine, DEFAULT_ADMIN)
+    with phase(phases, "redis"):
+        redis = await init_redis()
+    with phase(phases, "revocation"):
+        await revocation_mirror.start(redis)
+    log_startup(phases, (time.monotonic() - start_time) * 1000)
+    metrics.register("startup_ms", lambda: dict(phases))
 
     yield
+
+    auth_service.shutdown()
+    await revocation_mirror.stop()
+    await close_redis()
+
+
 THRESHOLD_MS = 300
 
 
@@ -38,14 +68,37 @@ app = FastAPI(title="FlowerHub API", lifespan=lifespan)
 
 @app.middleware("http")
 async def timing_middleware(request: Request, call_next):
+    # Хуки SQL, Redis и bcrypt копят замеры фаз в контексте текущего запроса
+    timings = RequestTimings()
+    token = request_timings.set(timings)
     start_time = time.monotonic()
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
     duration_ms = (time.monotonic() - start_time) * 1000
+    if config.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = timings.server_timing(duration_ms)
     if duration_ms > THRESHOLD_MS:
-        logger.warning(f"Длительный отклик: {duration_ms:.2f} мс, путь: {request.url.path}")
+        logger.warning(
+            f"Длительный отклик: {duration_ms:.2f} мс, путь: {request.url.path}, "
+            f"{timings.summary()}"
+        )
     return response
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # Все соединения пула заняты дольше DB_POOL_TIMEOUT: просим клиента повторить позже
+    metrics.inc("db.pool.timeouts")
+    logger.error(f"Пул соединений с БД исчерпан, путь: {request.url.path}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Сервис перегружен, повторите попытку позже"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/", include_in_schema=False)
 async def root_redirect():
     return RedirectResponse(url="/docs")
@@ -4,9 +4,12 @@ from .flower import (
     FlowerCreate,
     FlowerData,
     FlowerFilter,
+    FlowerImportError,
+    FlowerImportResult,
     FloweringcountriesData,
     FloweringSeasonCreate,
     FloweringSeasonData,
+    FlowerPage,
     FlowerTypeCreate,
     FlowerTypeData,
     FlowerUpdate,
@@ -27,6 +30,9 @@ __all__ = [
     "FlowerFilter",
     "Pagination",
     "FlowerData",
+    "FlowerPage",
     "FlowerUpdate",
     "FlowerCreate",
+    "FlowerImportError",
+    "FlowerImportResult",
 ]
@@ -6,6 +6,7 @@ from pydantic import BaseModel
 class FlowerFilter(BaseModel):
     id: Optional[int] = None
     name: Optional[str] = None
+    q: Optional[str] = None
     type_id: Optional[int] = None
     season_id: Optional[int] = None
     usage_id: Optional[int] = None
@@ -35,6 +36,11 @@ class FlowerData(BaseModel):
         orm_mode = True
 
 
+class FlowerPage(BaseModel):
+    items: List[FlowerData]
+    next_cursor: Optional[str] = None
+
+
 class FlowerCreate(BaseModel):
     name: str
     type_id: int
@@ -45,6 +51,19 @@ class FlowerCreate(BaseModel):
     price: float
 
 
+class FlowerImportError(BaseModel):
+    row: int
+    error: str
+
+
+class FlowerImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[FlowerImportError]
+    # Импорт прерван: строки imported уже сохранены, остальные не обработаны
+    interrupted: bool = False
+
+
 class FlowerTypeCreate(BaseModel):
     name: str
     description: str
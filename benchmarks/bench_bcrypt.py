@@ -0,0 +1,84 @@
+"""Калибровка стоимости bcrypt и пропускная способность логина по каждой стоимости.
+
+Для каждого значения rounds замеряется задержка одной проверки пароля и число
+проверок в секунду на одном ядре и на пуле из PASSWORD_HASH_WORKERS процессов.
+В конце выводится наибольшая стоимость, укладывающаяся в BCRYPT_TARGET_MS, —
+её стоит прописать в BCRYPT_ROUNDS для текущего железа.
+
+Запуск:
+    poetry run python benchmarks/bench_bcrypt.py --min-rounds 10 --max-rounds 14
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from passlib.hash import bcrypt
+
+from app.core import config, setup_logger
+from app.core.security import _verify_password
+
+PASSWORD = "benchmark-password"
+
+
+def _latency_ms(hashed: str, samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.verify(PASSWORD, hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _pool_rate(executor: ProcessPoolExecutor, hashed: str, logins: int) -> float:
+    start = time.perf_counter()
+    list(executor.map(_verify_password, [PASSWORD] * logins, [hashed] * logins))
+    return logins / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=config.BCRYPT_TARGET_MS)
+    parser.add_argument("--workers", type=int, default=config.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    recommended = None
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        # Прогрев: процессы пула стартуют до начала замеров
+        _pool_rate(executor, bcrypt.using(rounds=4).hash(PASSWORD), args.workers)
+
+        print(f"цель: {args.target_ms:.0f} мс, процессов в пуле: {args.workers}")
+        for rounds in range(args.min_rounds, args.max_rounds + 1):
+            hashed = bcrypt.using(rounds=rounds).hash(PASSWORD)
+            latency = _latency_ms(hashed, args.samples)
+            pool_rate = _pool_rate(executor, hashed, args.workers * args.samples)
+            print(
+                f"rounds={rounds:2d} | {latency:8.1f} мс | {1000 / latency:7.1f} логинов/с на ядро"
+                f" | {pool_rate:8.1f} логинов/с на пул"
+            )
+            if latency <= args.target_ms:
+                recommended = rounds
+    finally:
+        executor.shutdown()
+
+    if recommended is None:
+        print(f"ни одна стоимость не укладывается в {args.target_ms:.0f} мс")
+    else:
+        print(f"рекомендуется BCRYPT_ROUNDS={recommended} (сейчас {config.BCRYPT_ROUNDS})")
+
+
+if __name__ == "__main__":
+    main()
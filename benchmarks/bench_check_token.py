@@ -0,0 +1,72 @@
+"""Микробенчмарк POST /api/v1/auth/check-token до и после кэширования JWT.
+
+Режим ``before`` воспроизводит прежнюю зависимость: синхронную функцию, которую
+FastAPI выполняет в пуле потоков и которая декодирует токен на каждом запросе.
+Режим ``after`` использует текущую асинхронную зависимость verify_token с LRU-кэшем
+декодированных claims.
+
+Запуск:
+    poetry run python benchmarks/bench_check_token.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import Header, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.core import auth_service, setup_logger, verify_token
+from app.core.token import token_cache
+from app.main import app
+
+
+def legacy_verify_token(token: str = Header(..., alias="X-Token")) -> int:
+    payload = auth_service.decode_token(token)
+    if payload is None or payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return payload["sub"]
+
+
+async def _run(requests: int, concurrency: int, token: str) -> float:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = iter(range(requests))
+
+        async def worker() -> None:
+            for _ in queue:
+                response = await client.post("/api/v1/auth/check-token", headers={"X-Token": token})
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    token = auth_service.create_access_token(1)
+
+    app.dependency_overrides[verify_token] = legacy_verify_token
+    before = await _run(args.requests, args.concurrency, token)
+    app.dependency_overrides.clear()
+
+    token_cache.clear()
+    after = await _run(args.requests, args.concurrency, token)
+
+    print(f"before: {before:8.1f} запросов/с")
+    print(f" after: {after:8.1f} запросов/с ({after / before:.2f}x)")
+    print(f"кэш токенов: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
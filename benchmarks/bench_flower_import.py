@@ -0,0 +1,134 @@
+"""Импорт каталога продавца: поштучные POST /seller/flowers против потокового импорта.
+
+БД SQLite создаётся во временном каталоге миграциями; запись идёт через
+единственное соединение писателя из app.db.database.create_engine. Авторизация
+подменяется продавцом. Поштучное добавление замеряется на --single запросах и
+пересчитывается на весь каталог; импорт отправляет --rows строк CSV одним
+потоковым телом частями по 64 КБ. Для импорта печатается пик памяти Python
+(tracemalloc) на время запроса.
+
+Запуск:
+    poetry run python benchmarks/bench_flower_import.py --rows 20000 --single 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import AsyncIterator
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core import Principal, current_principal, setup_logger
+from app.db import database
+from app.db.database import create_engine
+from app.db.models import Country, FloweringSeason, FlowerType, FlowerUsage
+from app.db.routing import ReadRouter
+from app.db.schema import ensure_schema
+from app.main import app
+
+SELLER = Principal(user_id=2, person_id=2, role="Продавец")
+FLOWER = {
+    "name": "Роза",
+    "variety": "-",
+    "type_id": 1,
+    "season_id": 1,
+    "usage_id": 1,
+    "country_id": 1,
+    "price": 10,
+}
+CHUNK = 64 * 1024
+
+
+async def _seed(engine: AsyncEngine) -> None:
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    async with engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage):
+            await conn.execute(insert(model).values(id=1, name="-"))
+        await conn.execute(insert(Country).values(id=1, name="Россия", code="RU"))
+
+
+async def _csv(rows: int) -> AsyncIterator[bytes]:
+    buffer = [",".join(FLOWER)]
+    for i in range(rows):
+        buffer.append(f"Роза {i},сорт {i},1,1,1,1,{1 + i % 500}")
+        if len(buffer) >= 1000:
+            data = ("\n".join(buffer) + "\n").encode()
+            for start in range(0, len(data), CHUNK):
+                yield data[start : start + CHUNK]
+            buffer = []
+    yield "\n".join(buffer).encode()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single", type=int, default=1000)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+    app.dependency_overrides[current_principal] = lambda: SELLER
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'import.db')}"
+        engine = create_engine(url, name="bench_import_pool")
+        await _seed(engine)
+        database.async_session = sessionmaker(
+            bind=engine, expire_on_commit=False, class_=AsyncSession
+        )
+        database.read_router = ReadRouter(primary=engine, replicas=[])
+
+        stats = {"statements": 0, "commits": 0}
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany) -> None:
+            stats["statements"] += 1
+
+        @event.listens_for(engine.sync_engine, "commit")
+        def _commit(conn) -> None:
+            stats["commits"] += 1
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            start = time.perf_counter()
+            for _ in range(args.single):
+                await client.post("/api/v1/seller/flowers", json=FLOWER)
+            per_row = (time.perf_counter() - start) / args.single
+            print(
+                f"{'поштучно':>10} | {per_row * args.rows:8.2f} с на {args.rows} строк"
+                f" (оценка по {args.single})"
+                f" | {stats['statements'] / args.single:4.1f} запр./строку"
+                f" | {stats['commits'] / args.single:4.1f} фиксаций/строку"
+            )
+
+            stats.update(statements=0, commits=0)
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/v1/seller/flowers/import",
+                content=_csv(args.rows),
+                headers={"Content-Type": "text/csv"},
+            )
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{'импорт':>10} | {elapsed:8.2f} с на {response.json()['imported']} строк"
+                f" | {stats['statements']} запр. | {stats['commits']} фиксаций"
+                f" | пик памяти {peak / 2**20:.1f} МБ"
+            )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""Глубокие страницы каталога: offset против курсора.
+
+БД SQLite создаётся во временном каталоге миграциями и заполняется цветками с
+id подряд. Для каждой страницы замеряется медианная задержка get_flowers_page
+при пагинации через offset и через курсор. Курсор страницы строится сразу по id
+последнего цветка предыдущей страницы — тем же значением, которое вернул бы
+обход страниц по X-Next-Cursor.
+
+Запуск:
+    poetry run python benchmarks/bench_flower_pages.py --flowers 1000000 --limit 100
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.core import setup_logger
+from app.core.cursor import encode_cursor
+from app.crud import get_flowers_page
+from app.db.models import Country, Flower, FloweringSeason, FlowerType, FlowerUsage
+from app.db.schema import ensure_schema
+from app.schemas import FlowerFilter
+
+BATCH = 10000
+
+
+async def _seed(engine: AsyncEngine, flowers: int) -> None:
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    async with engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage, Country):
+            await conn.execute(insert(model).values(id=1, name="-"))
+        base = {"type_id": 1, "season_id": 1, "usage_id": 1, "country_id": 1, "variety": "-"}
+        for first in range(1, flowers + 1, BATCH):
+            rows = [
+                {"id": i, "name": f"Flower {i}", "price": 1 + i % 500, **base}
+                for i in range(first, min(first + BATCH, flowers + 1))
+            ]
+            await conn.execute(insert(Flower), rows)
+
+
+async def _latency_ms(db: AsyncSession, samples: int, **kwargs) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        page = await get_flowers_page(db, FlowerFilter(), **kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+    assert page.items, "страница пуста: увеличьте --flowers"
+    return statistics.median(timings)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flowers", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'pages.db')}")
+        await _seed(engine, args.flowers)
+
+        async with AsyncSession(engine) as db:
+            for number in args.pages:
+                skipped = (number - 1) * args.limit
+                offset = await _latency_ms(db, args.samples, limit=args.limit, offset=skipped)
+                cursor = encode_cursor({"id": skipped}) if skipped else None
+                keyset = await _latency_ms(db, args.samples, limit=args.limit, cursor=cursor)
+                print(f"страница {number:6d} | offset {offset:9.1f} мс | курсор {keyset:7.1f} мс")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
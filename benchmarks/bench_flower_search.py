@@ -0,0 +1,109 @@
+"""Поиск цветков: ILIKE '%...%' по названию против полнотекстового поиска q.
+
+БД SQLite создаётся во временном каталоге миграциями (с FTS5-таблицей и
+триггерами) и заполняется случайными цветками. Для каждого слова из набора
+замеряется медианная задержка get_flowers с фильтром name (полный просмотр
+таблицы) и с поисковой строкой q (индекс FTS5 с ранжированием bm25). Для частых
+слов поиск ранжирует все совпадения, поэтому выигрыш на них меньше, чем на редких.
+
+Запуск:
+    poetry run python benchmarks/bench_flower_search.py --flowers 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.core import setup_logger
+from app.crud import get_flowers
+from app.db.models import Country, Flower, FloweringSeason, FlowerType, FlowerUsage
+from app.db.schema import ensure_schema
+from app.schemas import FlowerFilter
+
+BATCH = 10000
+NAMES = ["Роза", "Тюльпан", "Пион", "Лилия", "Орхидея", "Хризантема", "Гербера", "Ирис"]
+# Редкое название: примерно один цветок из RARE_EVERY
+RARE_NAME = "эдельвейс"
+RARE_EVERY = 10000
+COLORS = ["красная", "белая", "жёлтая", "розовая", "синяя", "кремовая", "пёстрая"]
+SYLLABLES = ["ка", "ли", "мо", "ра", "те", "ви", "но", "са", "ду", "ре"]
+# Частые, редкие и отсутствующие слова; все они встречаются только в названии
+TERMS = ["пион", "кремовая", RARE_NAME, "несуществующий"]
+
+
+def _name(rng: random.Random) -> str:
+    return RARE_NAME if rng.randrange(RARE_EVERY) == 0 else rng.choice(NAMES)
+
+
+def _variety(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(4)).capitalize()
+
+
+async def _seed(engine: AsyncEngine, flowers: int) -> float:
+    rng = random.Random(42)
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage, Country):
+            await conn.execute(insert(model).values(id=1, name="-"))
+        base = {"type_id": 1, "season_id": 1, "usage_id": 1, "country_id": 1}
+        for first in range(1, flowers + 1, BATCH):
+            rows = [
+                {
+                    "id": i,
+                    "name": f"{_name(rng)} {rng.choice(COLORS)}",
+                    "variety": _variety(rng),
+                    "price": rng.randint(1, 500),
+                    **base,
+                }
+                for i in range(first, min(first + BATCH, flowers + 1))
+            ]
+            await conn.execute(insert(Flower), rows)
+    return time.perf_counter() - start
+
+
+async def _latency_ms(db: AsyncSession, filters: FlowerFilter, samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await get_flowers(db, filters, limit=20)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flowers", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'search.db')}")
+        elapsed = await _seed(engine, args.flowers)
+        print(f"{args.flowers} цветков вставлено за {elapsed:.1f} с (вместе с индексом FTS5)")
+
+        async with AsyncSession(engine) as db:
+            for term in TERMS:
+                ilike = await _latency_ms(db, FlowerFilter(name=term), args.samples)
+                fts = await _latency_ms(db, FlowerFilter(q=term), args.samples)
+                print(
+                    f"{term:>15} | name ILIKE {ilike:9.1f} мс | q FTS5 {fts:9.1f} мс"
+                    f" | ускорение x{ilike / fts:6.1f}"
+                )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""Бенчмарк пропускной способности логина при хешировании в пуле процессов.
+
+Запускает серию одновременных POST /api/v1/auth/login для разного числа процессов
+пула bcrypt и параллельно замеряет задержку GET /api/v1/flowers/. Режим ``inline``
+воспроизводит старое поведение (bcrypt прямо в event loop) для сравнения.
+
+Обращения к БД и Redis подменяются заглушками, чтобы измерялись только bcrypt и
+отзывчивость event loop.
+
+Запуск:
+    poetry run python benchmarks/bench_login.py --logins 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpx import ASGITransport, AsyncClient
+
+from app.core import auth_service, setup_logger
+from app.core.security import pwd_context
+from app.main import app
+from app.schemas import FlowerPage
+
+PASSWORD = "benchmark-password"
+
+
+async def _probe_flowers(client: AsyncClient, stop: asyncio.Event, latencies: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/v1/flowers/")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def _run(logins: int) -> tuple[float, list]:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        latencies: list = []
+        probe = asyncio.create_task(_probe_flowers(client, stop, latencies))
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                client.post("/api/v1/auth/login", json={"email": "b@b.b", "password": PASSWORD})
+                for _ in range(logins)
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await probe
+    return logins / elapsed, latencies
+
+
+def _report(label: str, rate: float, latencies: list) -> None:
+    latencies = sorted(latencies) or [0.0]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{label:>10} | {rate:8.1f} логинов/с | flowers p50 {statistics.median(latencies):7.1f} мс"
+        f" | p99 {p99:7.1f} мс"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    user = SimpleNamespace(id=1, password_hash=pwd_context.hash(PASSWORD))
+    auth_service.hash_queue_limit = max(auth_service.hash_queue_limit, args.logins)
+
+    with (
+        patch("app.api.v1.auth.get_user_by_email", new=AsyncMock(return_value=user)),
+        patch(
+            "app.api.v1.flower.get_flowers_page",
+            new=AsyncMock(return_value=FlowerPage(items=[])),
+        ),
+        patch.object(auth_service, "create_refresh_token", new=AsyncMock(return_value="refresh")),
+    ):
+
+        async def inline_verify(plain: str, hashed: str) -> tuple[bool, None]:
+            return pwd_context.verify(plain, hashed), None
+
+        with patch.object(auth_service, "verify_and_update", new=inline_verify):
+            _report("inline", *await _run(args.logins))
+
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            auth_service.shutdown()
+            auth_service.hash_workers = workers
+            # Прогрев: процессы пула стартуют до начала замера
+            await asyncio.gather(
+                *(
+                    auth_service.verify_and_update(PASSWORD, user.password_hash)
+                    for _ in range(workers)
+                )
+            )
+            _report(f"pool={workers}", *await _run(args.logins))
+            workers *= 2
+
+    auth_service.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
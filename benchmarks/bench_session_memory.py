@@ -0,0 +1,96 @@
+"""Сравнение памяти Redis на активные сессии: ключ по JWT против ключа по jti.
+
+Режим ``legacy`` воспроизводит прежнюю схему, где refresh токен хранился под
+ключом ``refresh_token:{jwt}``. Режим ``jti`` использует текущую схему: ``rt:{jti}``
+плюс множество ``rt_user:{user_id}`` со всеми jti пользователя. Прирост
+``used_memory`` измеряется на отдельной базе Redis, ключи бенчмарка удаляются
+после каждого прогона.
+
+Запуск:
+    poetry run python benchmarks/bench_session_memory.py --sessions 1000000 --db 15
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from redis.asyncio import Redis
+
+from app.core import auth_service, config, setup_logger
+from app.core.security import _new_jti
+
+BATCH = 10000
+PREFIX = "bench:"
+
+
+async def _used_memory(redis: Redis) -> int:
+    return (await redis.info("memory"))["used_memory"]
+
+
+async def _cleanup(redis: Redis) -> None:
+    batch = []
+    async for key in redis.scan_iter(match=f"{PREFIX}*", count=BATCH):
+        batch.append(key)
+        if len(batch) == BATCH:
+            await redis.unlink(*batch)
+            batch = []
+    if batch:
+        await redis.unlink(*batch)
+
+
+async def _fill(redis: Redis, mode: str, sessions: int, users: int) -> None:
+    ttl = int(auth_service.refresh_token_expire_days.total_seconds())
+    for start in range(0, sessions, BATCH):
+        async with redis.pipeline(transaction=False) as pipe:
+            for i in range(start, min(start + BATCH, sessions)):
+                user_id = i % users
+                jti = _new_jti()
+                if mode == "legacy":
+                    token = auth_service._encode_refresh_token(user_id, jti)
+                    pipe.setex(f"{PREFIX}refresh_token:{token}", ttl, user_id)
+                else:
+                    pipe.setex(f"{PREFIX}rt:{jti}", ttl, user_id)
+                    pipe.sadd(f"{PREFIX}rt_user:{user_id}", jti)
+                    pipe.expire(f"{PREFIX}rt_user:{user_id}", ttl)
+            await pipe.execute()
+
+
+async def _measure(redis: Redis, mode: str, sessions: int, users: int) -> int:
+    await _cleanup(redis)
+    before = await _used_memory(redis)
+    await _fill(redis, mode, sessions, users)
+    used = await _used_memory(redis) - before
+    await _cleanup(redis)
+    return used
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--db", type=int, default=15)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    redis = Redis(host=config.REDIS_HOST, port=config.REDIS_PORT, db=args.db)
+    try:
+        results = {
+            mode: await _measure(redis, mode, args.sessions, args.users)
+            for mode in ("legacy", "jti")
+        }
+    finally:
+        await redis.aclose()
+
+    for mode, used in results.items():
+        print(
+            f"{mode:>6}: {used / 2**20:8.1f} МиБ на {args.sessions} сессий "
+            f"({used / args.sessions:6.1f} байт/сессия)"
+        )
+    print(f"экономия: {1 - results['jti'] / results['legacy']:.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
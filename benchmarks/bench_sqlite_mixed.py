@@ -0,0 +1,145 @@
+"""Смешанная нагрузка на SQLite: POST /api/v1/order/ вперемешку с GET /api/v1/flowers/.
+
+Режим ``default`` воспроизводит прежнюю конфигурацию: один движок aiosqlite с
+прагмами по умолчанию (журнал отката, synchronous=FULL). Режим ``profile``
+использует текущий профиль SQLite: WAL, прагмы из конфигурации, единственное
+соединение писателя и отдельный пул читателей.
+
+Каждый режим работает на собственной временной БД с одинаковыми данными;
+flowers.db из репозитория не используется. Авторизация подменяется покупателем.
+
+Запуск:
+    poetry run python benchmarks/bench_sqlite_mixed.py --requests 2000 --writes 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import Principal, current_principal, setup_logger
+from app.db import database
+from app.db.database import Base, create_engine
+from app.db.models import (
+    Country,
+    Flower,
+    FloweringSeason,
+    FlowerType,
+    FlowerUsage,
+    Person,
+    User,
+    UserRole,
+    UserType,
+)
+from app.db.routing import ReadRouter
+from app.main import app
+
+FLOWERS = 500
+
+
+async def _seed(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(UserRole).values(id=1, name="user"))
+        await conn.execute(insert(UserType).values(id=1, name="Покупатель"))
+        await conn.execute(insert(User).values(id=1, email="b@b.b", password_hash="x", role_id=1))
+        await conn.execute(
+            insert(Person).values(id=1, first_name="b", last_name="b", user_id=1, user_type_id=1)
+        )
+        await conn.execute(insert(FlowerType).values(id=1, name="Роза"))
+        await conn.execute(insert(FloweringSeason).values(id=1, name="Лето"))
+        await conn.execute(insert(FlowerUsage).values(id=1, name="Букет"))
+        await conn.execute(insert(Country).values(id=1, name="Нидерланды", code="NL"))
+        flower = {"type_id": 1, "season_id": 1, "usage_id": 1, "country_id": 1, "price": 10}
+        await conn.execute(
+            insert(Flower),
+            [{"id": i, "name": f"Flower {i}", "variety": "-", **flower} for i in range(1, FLOWERS)],
+        )
+
+
+def _use(writer: AsyncEngine, reader: AsyncEngine) -> None:
+    database.async_session = sessionmaker(bind=writer, expire_on_commit=False, class_=AsyncSession)
+    database.read_router = ReadRouter(primary=writer, replicas=[reader])
+
+
+async def _run(requests: int, concurrency: int, writes: float) -> dict:
+    latencies: dict = {"order": [], "flowers": []}
+    errors = 0
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue = iter(range(requests))
+
+        async def worker() -> None:
+            nonlocal errors
+            for _ in queue:
+                start = time.perf_counter()
+                if random.random() < writes:
+                    kind = "order"
+                    item = {"flower_id": random.randint(1, FLOWERS - 1), "quantity": 1}
+                    response = await client.post("/api/v1/order/", json={"items": [item]})
+                else:
+                    kind = "flowers"
+                    response = await client.get("/api/v1/flowers/", params={"limit": 50})
+                latencies[kind].append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {"rate": requests / elapsed, "errors": errors, **latencies}
+
+
+def _report(label: str, result: dict) -> None:
+    parts = [f"{label:>8} | {result['rate']:8.1f} запросов/с | ошибок {result['errors']:4d}"]
+    for kind in ("order", "flowers"):
+        values = sorted(result[kind]) or [0.0]
+        p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+        parts.append(f"{kind} p50 {statistics.median(values):7.1f} мс p99 {p99:7.1f} мс")
+    print(" | ".join(parts))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--writes", type=float, default=0.2)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    app.dependency_overrides[current_principal] = lambda: Principal(
+        user_id=1, person_id=1, role="Покупатель"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'default.db')}"
+        engine = create_async_engine(url)
+        await _seed(engine)
+        _use(engine, engine)
+        _report("default", await _run(args.requests, args.concurrency, args.writes))
+        await engine.dispose()
+
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'profile.db')}"
+        writer = create_engine(url, name="bench_writer_pool")
+        reader = create_engine(url, readonly=True, name="bench_reader_pool")
+        await _seed(writer)
+        _use(writer, reader)
+        _report("profile", await _run(args.requests, args.concurrency, args.writes))
+        await writer.dispose()
+        await reader.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
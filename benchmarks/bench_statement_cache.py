@@ -0,0 +1,170 @@
+"""Накладные расходы ORM на один вызов горячих функций CRUD.
+
+БД SQLite создаётся во временном каталоге миграциями и заполняется
+пользователями с адресами и цветками. Каждая функция вызывается --calls раз
+подряд в одной сессии; печатаются среднее время вызова, число SQL-запросов на
+вызов и доля запросов, скомпилированных из кэша SQLAlchemy. Кэш principal
+сбрасывается перед каждым вызовом, чтобы load_principal ходил в БД.
+
+Запуск:
+    poetry run python benchmarks/bench_statement_cache.py --calls 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, insert
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.core import setup_logger
+from app.core.principal import load_principal, principal_cache
+from app.crud import get_flowers_page, get_user_by_email, get_user_by_id
+from app.db.models import (
+    Address,
+    Country,
+    Flower,
+    FloweringSeason,
+    FlowerType,
+    FlowerUsage,
+    Person,
+    User,
+    UserType,
+    saleable_flowers,
+)
+from app.db.schema import ensure_schema
+from app.schemas import FlowerFilter
+
+USERS = 1000
+FLOWERS = 10000
+
+
+async def _seed(engine: AsyncEngine) -> None:
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    async with engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage):
+            await conn.execute(insert(model), [{"id": i, "name": str(i)} for i in range(1, 6)])
+        await conn.execute(insert(Country).values(id=1, name="Россия", code="RU"))
+        await conn.execute(
+            insert(UserType), [{"id": 1, "name": "Покупатель"}, {"id": 2, "name": "Продавец"}]
+        )
+        await conn.execute(
+            insert(Address),
+            [
+                {"id": i, "street": "-", "city": "-", "postal_code": "-", "country_id": 1}
+                for i in range(1, USERS + 1)
+            ],
+        )
+        await conn.execute(
+            insert(User),
+            [
+                {"id": i, "email": f"user{i}@flowerhub.test", "password_hash": "-", "role_id": 1}
+                for i in range(1, USERS + 1)
+            ],
+        )
+        await conn.execute(
+            insert(Person),
+            [
+                {
+                    "id": i,
+                    "first_name": "-",
+                    "last_name": "-",
+                    "display_name": "-",
+                    "user_id": i,
+                    "address_id": i,
+                    "user_type_id": 1 + i % 2,
+                }
+                for i in range(1, USERS + 1)
+            ],
+        )
+        await conn.execute(
+            insert(Flower),
+            [
+                {
+                    "id": i,
+                    "name": f"Роза {i}",
+                    "variety": "-",
+                    "type_id": 1 + i % 5,
+                    "season_id": 1 + i % 3,
+                    "usage_id": 1 + i % 4,
+                    "country_id": 1,
+                    "price": 1 + i % 500,
+                }
+                for i in range(1, FLOWERS + 1)
+            ],
+        )
+        await conn.execute(
+            insert(saleable_flowers),
+            [{"seller_id": 2 * (1 + i % 50), "flower_id": i} for i in range(1, FLOWERS + 1)],
+        )
+
+
+def _cases(rng: random.Random) -> Dict[str, Callable[[AsyncSession], Awaitable[Any]]]:
+    def user_id() -> int:
+        return rng.randint(1, USERS)
+
+    async def principal(db: AsyncSession) -> Any:
+        principal_cache.clear()
+        return await load_principal(db, user_id())
+
+    def flowers(**filters: Any) -> Callable[[AsyncSession], Awaitable[Any]]:
+        return lambda db: get_flowers_page(db, FlowerFilter(**filters), limit=20)
+
+    return {
+        "get_user_by_id": lambda db: get_user_by_id(db, user_id()),
+        "get_user_by_email": lambda db: get_user_by_email(db, f"user{user_id()}@flowerhub.test"),
+        "load_principal": principal,
+        "flowers: type_id": flowers(type_id=2),
+        "flowers: type+season+price": flowers(type_id=2, season_id=1, min_price=10, max_price=400),
+        "flowers: seller_id": flowers(seller_id=4),
+        "flowers: q": flowers(q="роза"),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'cache.db')}")
+        await _seed(engine)
+
+        stats = {"statements": 0, "hits": 0}
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany) -> None:
+            stats["statements"] += 1
+            stats["hits"] += context.cache_hit == CACHE_HIT
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            for name, call in _cases(random.Random(42)).items():
+                await call(db)  # прогрев: первая компиляция не входит в замер
+                db.expunge_all()
+                stats.update(statements=0, hits=0)
+                start = time.perf_counter()
+                for _ in range(args.calls):
+                    await call(db)
+                    db.expunge_all()
+                elapsed_us = (time.perf_counter() - start) / args.calls * 1_000_000
+                per_call = stats["statements"] / args.calls
+                hit_rate = stats["hits"] / max(stats["statements"], 1) * 100
+                print(
+                    f"{name:>28} | {elapsed_us:8.1f} мкс/вызов | {per_call:4.1f} запр."
+                    f" | кэш компиляции {hit_rate:5.1f}%"
+                )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,194 @@
+"""Число SQL-запросов и фиксаций транзакций на запрос в изменяющих эндпоинтах.
+
+БД SQLite создаётся во временном каталоге миграциями; запись идёт через
+единственное соединение писателя из app.db.database.create_engine. Авторизация
+подменяется нужным principal, обращения к Redis заменены заглушками, чтобы в
+замер попадала только работа с БД. Каждая фиксация на
+основной БД — это отдельная запись в журнал и fsync при synchronous=FULL.
+
+Запуск:
+    poetry run python benchmarks/bench_write_paths.py --requests 500
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+from unittest.mock import AsyncMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core import Principal, auth_service, current_principal, setup_logger, verify_token
+from app.db import database
+from app.db.database import create_engine
+from app.db.models import (
+    Country,
+    Flower,
+    FloweringSeason,
+    FlowerType,
+    FlowerUsage,
+    Order,
+    Person,
+    User,
+    UserType,
+)
+from app.db.routing import ReadRouter
+from app.db.schema import ensure_schema
+from app.main import app
+
+BUYER = Principal(user_id=1, person_id=1, role="Покупатель")
+SELLER = Principal(user_id=2, person_id=2, role="Продавец")
+ADMIN = Principal(user_id=3, person_id=3, role="Админ")
+FLOWER = {
+    "name": "Роза",
+    "variety": "-",
+    "type_id": 1,
+    "season_id": 1,
+    "usage_id": 1,
+    "country_id": 1,
+    "price": 10,
+}
+PROFILE = {
+    "id": 1,
+    "email": "user1@flowerhub.test",
+    "first_name": "Иван",
+    "last_name": "Иванов",
+    "display_name": "Иван",
+    "is_user_seller": False,
+    "is_user_admin": False,
+    "address": {
+        "street": "Ленина, 1",
+        "city": "Москва",
+        "postal_code": "101000",
+        "country_name": "Россия",
+        "country_code": "RU",
+    },
+}
+
+
+async def _seed(engine: AsyncEngine) -> None:
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    async with engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage):
+            await conn.execute(insert(model).values(id=1, name="-"))
+        await conn.execute(insert(Country).values(id=1, name="Россия", code="RU"))
+        await conn.execute(
+            insert(UserType), [{"id": p.person_id, "name": p.role} for p in (BUYER, SELLER, ADMIN)]
+        )
+        await conn.execute(
+            insert(User),
+            [
+                {"id": i, "email": f"user{i}@flowerhub.test", "password_hash": "-", "role_id": 1}
+                for i in (1, 2, 3)
+            ],
+        )
+        await conn.execute(
+            insert(Person),
+            [
+                {
+                    "id": i,
+                    "first_name": "-",
+                    "last_name": "-",
+                    "display_name": "-",
+                    "user_id": i,
+                    "user_type_id": i,
+                }
+                for i in (1, 2, 3)
+            ],
+        )
+        await conn.execute(insert(Flower).values(id=1, **FLOWER))
+        await conn.execute(insert(Order).values(id=1, buyer_id=1, is_closed=False))
+
+
+def _cases() -> Dict[str, Any]:
+    prices = itertools.count(11)
+    return {
+        "seller: add flower": (
+            SELLER,
+            lambda client: client.post("/api/v1/seller/flowers", json=FLOWER),
+        ),
+        "seller: edit flower": (
+            SELLER,
+            lambda client: client.put("/api/v1/seller/flowers/1", json={"price": next(prices)}),
+        ),
+        "seller: order status": (
+            SELLER,
+            lambda client: client.put("/api/v1/seller/change_order_status/1"),
+        ),
+        "user: update profile": (
+            BUYER,
+            lambda client: client.put("/api/v1/user/", json=PROFILE),
+        ),
+        "buyer: make order": (
+            BUYER,
+            lambda client: client.post(
+                "/api/v1/order/", json={"items": [{"flower_id": 1, "quantity": 1}]}
+            ),
+        ),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    setup_logger(disable_logging=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'writes.db')}"
+        engine = create_engine(url, name="bench_writes_pool")
+        await _seed(engine)
+        database.async_session = sessionmaker(
+            bind=engine, expire_on_commit=False, class_=AsyncSession
+        )
+        database.read_router = ReadRouter(primary=engine, replicas=[])
+
+        stats = {"statements": 0, "commits": 0}
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany) -> None:
+            stats["statements"] += 1
+
+        @event.listens_for(engine.sync_engine, "commit")
+        def _commit(conn) -> None:
+            stats["commits"] += 1
+
+        principal = {"current": BUYER}
+        app.dependency_overrides[current_principal] = lambda: principal["current"]
+        app.dependency_overrides[verify_token] = lambda: principal["current"].user_id
+
+        transport = ASGITransport(app=app)
+        with (
+            patch.object(auth_service, "bump_token_version", new=AsyncMock()),
+            patch.object(auth_service, "revoke_all_sessions", new=AsyncMock()),
+        ):
+            async with AsyncClient(transport=transport, base_url="http://bench") as client:
+                for name, (who, call) in _cases().items():
+                    principal["current"] = who
+                    response = await call(client)  # прогрев
+                    assert response.status_code == 200, response.text
+                    stats.update(statements=0, commits=0)
+                    start = time.perf_counter()
+                    for _ in range(args.requests):
+                        await call(client)
+                    elapsed_ms = (time.perf_counter() - start) / args.requests * 1000
+                    print(
+                        f"{name:>22} | {elapsed_ms:6.2f} мс/запрос"
+                        f" | {stats['statements'] / args.requests:4.1f} запр."
+                        f" | {stats['commits'] / args.requests:4.1f} фиксаций"
+                    )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
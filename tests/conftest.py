@@ -1,4 +1,111 @@
+import atexit
+import contextlib
 import os
+import shutil
 import sys
+import tempfile
+from typing import Callable, ContextManager, Iterator, List
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+# Тесты работают с отдельной БД SQLite во временном каталоге, созданной миграциями
+_db_dir = tempfile.mkdtemp(prefix="flowerhub-tests-")
+atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+os.environ.setdefault("SQLITE_PATH", os.path.join(_db_dir, "flowers.db"))
+
+from alembic import command  # noqa: E402
+
+import app.core  # noqa: E402,F401  app.db импортируется после app.core
+from app.db import (  # noqa: E402
+    LazySession,
+    get_read_session,
+    get_read_session_factory,
+    get_write_session,
+)
+from app.db.schema import alembic_config, ensure_schema  # noqa: E402
+
+_alembic_cfg = alembic_config()
+_alembic_cfg.attributes["configure_logger"] = False
+command.upgrade(_alembic_cfg, "head")
+
+
+@pytest_asyncio.fixture
+async def memory_engine() -> AsyncEngine:
+    # БД в памяти живёт в единственном соединении, общем для всех сессий теста
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def memory_client(memory_engine: AsyncEngine) -> AsyncClient:
+    """Клиент приложения, сессии которого работают с БД в памяти.
+
+    Зависимость current_principal тест подменяет сам через app.dependency_overrides.
+    """
+    from app.main import app
+
+    def _sessions(unit_of_work: bool):
+        async def _session():
+            session = LazySession(
+                lambda: AsyncSession(memory_engine, expire_on_commit=False),
+                unit_of_work=unit_of_work,
+            )
+            try:
+                yield session
+            finally:
+                await session.release()
+
+        return _session
+
+    app.dependency_overrides[get_read_session] = _sessions(unit_of_work=False)
+    app.dependency_overrides[get_write_session] = _sessions(unit_of_work=True)
+    app.dependency_overrides[get_read_session_factory] = lambda: lambda: AsyncSession(
+        memory_engine, expire_on_commit=False
+    )
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def query_budget(memory_engine: AsyncEngine) -> Callable[[int], ContextManager[List[str]]]:
+    """Бюджет SQL-запросов: блок with падает, если выполнено больше limit запросов.
+
+    Пример:
+        with query_budget(2):
+            response = await memory_client.get("/api/v1/order/orders")
+    """
+
+    @contextlib.contextmanager
+    def budget(limit: int) -> Iterator[List[str]]:
+        statements: List[str] = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany) -> None:
+            statements.append(statement)
+
+        event.listen(memory_engine.sync_engine, "before_cursor_execute", _count)
+        try:
+            yield statements
+        finally:
+            event.remove(memory_engine.sync_engine, "before_cursor_execute", _count)
+        assert (
+            len(statements) <= limit
+        ), f"Выполнено {len(statements)} SQL-запросов при бюджете {limit}:\n" + "\n".join(
+            statements
+        )
+
+    return budget
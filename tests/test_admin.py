@@ -5,6 +5,7 @@ from fastapi import FastAPI, HTTPException, status
 from httpx import ASGITransport, AsyncClient
 
 from app.api.v1.admin import AdminAPI
+from app.core import Principal, current_principal
 from app.schemas import FlowerCreate, OrderSchema, UserData, UserRegister
 
 
@@ -14,12 +15,10 @@ def app():
     app = FastAPI()
     app.include_router(api.router, prefix="/admin")
 
-    async def override_verify_token():
-        return 1
+    async def override_current_principal():
+        return Principal(user_id=1, person_id=1, role="Админ")
 
-    from app.core import verify_token
-
-    app.dependency_overrides[verify_token] = override_verify_token
+    app.dependency_overrides[current_principal] = override_current_principal
     return app
 
 
@@ -47,7 +46,6 @@ async def test_create_user_success(app):
 
     with (
         patch("sqlalchemy.ext.asyncio.AsyncSession.execute", mock_execute),
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
         patch(
             "app.api.v1.admin.create_user", new=AsyncMock(return_value=MagicMock(id=1))
         ) as mock_create_user,
@@ -62,7 +60,6 @@ async def test_create_user_success(app):
         assert response.status_code == 200
         data = response.json()
         assert data["email"] == "test@example.com"
-        mock_check_admin.assert_awaited_once()
         mock_create_user.assert_awaited_once()
         mock_get_user_by_id.assert_awaited_once()
 
@@ -79,17 +76,13 @@ async def test_create_user_email_exists(app):
     mock_result.scalars.return_value = mock_scalars
     mock_execute = AsyncMock(return_value=mock_result)
 
-    with (
-        patch("sqlalchemy.ext.asyncio.AsyncSession.execute", mock_execute),
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
-    ):
+    with (patch("sqlalchemy.ext.asyncio.AsyncSession.execute", mock_execute),):
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as client:
             response = await client.post("/admin/users", json=user_register.dict())
 
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert response.json()["detail"] == "Пользователь с таким email уже существует"
-        mock_check_admin.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -104,7 +97,9 @@ async def test_delete_user_success(app):
     with (
         patch("sqlalchemy.ext.asyncio.AsyncSession.execute", mock_execute),
         patch("sqlalchemy.ext.asyncio.AsyncSession.commit", mock_commit),
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
+        patch(
+            "app.api.v1.admin.auth_service.revoke_all_sessions", new_callable=AsyncMock
+        ) as mock_revoke_sessions,
     ):
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -112,9 +107,9 @@ async def test_delete_user_success(app):
 
         assert response.status_code == 200
         assert "удалён" in response.json()["detail"]
-        mock_check_admin.assert_awaited_once()
         mock_execute.assert_awaited()
         mock_commit.assert_awaited()
+        mock_revoke_sessions.assert_awaited_once_with(1)
 
 
 @pytest.mark.asyncio
@@ -126,17 +121,13 @@ async def test_delete_user_not_found(app):
     mock_execute = AsyncMock(return_value=mock_result)
     mock_commit = AsyncMock()
 
-    with (
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
-        patch("sqlalchemy.ext.asyncio.AsyncSession.execute", mock_execute),
-    ):
+    with (patch("sqlalchemy.ext.asyncio.AsyncSession.execute", mock_execute),):
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as client:
             response = await client.delete("/admin/users/9999")
         print(response.text)
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert response.json()["detail"] == "Пользователь не найден"
-        mock_check_admin.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -152,7 +143,6 @@ async def test_admin_update_user_success(app):
         address=None,
     )
     with (
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
         patch(
             "app.api.v1.admin.get_user_by_id",
             new=AsyncMock(side_effect=[updated_user, updated_user]),
@@ -166,7 +156,6 @@ async def test_admin_update_user_success(app):
         assert response.status_code == 200
         data = response.json()
         assert data["email"] == "updated@example.com"
-        mock_check_admin.assert_awaited_once()
         mock_update_user.assert_awaited_once()
         assert mock_get_user_by_id.await_count == 2
 
@@ -184,7 +173,6 @@ async def test_admin_update_user_not_found(app):
         address=None,
     )
     with (
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
         patch(
             "app.api.v1.admin.get_user_by_id", new=AsyncMock(return_value=None)
         ) as mock_get_user_by_id,
@@ -195,7 +183,6 @@ async def test_admin_update_user_not_found(app):
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert response.json()["detail"] == "Пользователь не найден"
-        mock_check_admin.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -209,10 +196,7 @@ async def test_list_users_success(app):
 
     mock_execute = AsyncMock(return_value=mock_result)
 
-    with (
-        patch("sqlalchemy.ext.asyncio.AsyncSession.execute", mock_execute),
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
-    ):
+    with (patch("sqlalchemy.ext.asyncio.AsyncSession.execute", mock_execute),):
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as client:
             response = await client.get("/admin/users")
@@ -222,7 +206,6 @@ async def test_list_users_success(app):
         assert len(users) == 1
         assert users[0]["email"] == "test@example.com"
         assert users[0]["is_user_admin"] is True
-        mock_check_admin.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -243,7 +226,6 @@ async def test_add_flower_success(app):
     flower_return.price = flower_data.price
 
     with (
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
         patch(
             "app.api.v1.admin.create_flower", new=AsyncMock(return_value=flower_return)
         ) as mock_create_flower,
@@ -258,7 +240,6 @@ async def test_add_flower_success(app):
         assert response.status_code == 200
         data = response.json()
         assert data["name"] == flower_data.name
-        mock_check_admin.assert_awaited_once()
         mock_create_flower.assert_awaited_once()
         mock_add_flower.assert_awaited_once()
 
@@ -274,7 +255,6 @@ async def test_list_users_success(app):
     mock_result.all.return_value = [(user, person, user_type)]
 
     with (
-        patch("app.api.v1.admin.AdminAPI._check_admin", new=AsyncMock()) as mock_check_admin,
         patch(
             "sqlalchemy.ext.asyncio.AsyncSession.execute", new=AsyncMock(return_value=mock_result)
         ) as mock_execute,
@@ -289,4 +269,28 @@ async def test_list_users_success(app):
         assert len(users) == 1
         assert users[0]["email"] == "test@example.com"
         assert users[0]["is_user_admin"] is True
-        mock_check_admin.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_non_admin_forbidden(app):
+    async def override_current_principal():
+        return Principal(user_id=2, person_id=2, role="Продавец")
+
+    app.dependency_overrides[current_principal] = override_current_principal
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/admin/users")
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert response.json()["detail"] == "Доступ только для администратора"
+
+
+@pytest.mark.asyncio
+async def test_get_metrics(app):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/admin/metrics")
+
+    assert response.status_code == 200
+    assert {"hits", "misses"} <= response.json()["principal_cache"].keys()
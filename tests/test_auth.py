@@ -1,13 +1,22 @@
 from unittest.mock import AsyncMock, patch
 
+import fakeredis
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
+from app.core import auth_service
 from app.main import app
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def throttle_redis(monkeypatch):
+    # Свежие окна ограничения попыток для каждого теста
+    monkeypatch.setattr("app.db.redis.redis_client", fakeredis.FakeAsyncRedis())
+
+
 def test_register_user_success():
     user_data = {
         "email": "test@example.com",
@@ -21,7 +30,9 @@ def test_register_user_success():
         patch("app.api.v1.auth.get_user_by_email", new_callable=AsyncMock) as mock_get_user,
         patch("app.api.v1.auth.create_user", new_callable=AsyncMock) as mock_create_user,
         patch("app.core.auth_service.create_access_token") as mock_access_token,
-        patch("app.core.auth_service.create_refresh_token") as mock_refresh_token,
+        patch(
+            "app.core.auth_service.create_refresh_token", new_callable=AsyncMock
+        ) as mock_refresh_token,
     ):
         mock_get_user.return_value = None
         fake_user = AsyncMock()
@@ -65,13 +76,17 @@ def test_login_success():
     fake_user.password_hash = "hashed_password"
 
     with (
-        patch("app.crud.get_user_by_email", new_callable=AsyncMock) as mock_get_user,
-        patch("app.core.auth_service.verify_password") as mock_verify_password,
+        patch("app.api.v1.auth.get_user_by_email", new_callable=AsyncMock) as mock_get_user,
+        patch(
+            "app.core.auth_service.verify_and_update", new_callable=AsyncMock
+        ) as mock_verify_password,
         patch("app.core.auth_service.create_access_token") as mock_access_token,
-        patch("app.core.auth_service.create_refresh_token") as mock_refresh_token,
+        patch(
+            "app.core.auth_service.create_refresh_token", new_callable=AsyncMock
+        ) as mock_refresh_token,
     ):
         mock_get_user.return_value = fake_user
-        mock_verify_password.return_value = True
+        mock_verify_password.return_value = (True, None)
         mock_access_token.return_value = "access_token"
         mock_refresh_token.return_value = "refresh_token"
 
@@ -83,6 +98,36 @@ def test_login_success():
         assert "refresh_token" in data
 
 
+def test_login_rehashes_outdated_password_hash():
+    user_data = {"email": "test@example.com", "password": "password123"}
+
+    fake_user = AsyncMock()
+    fake_user.id = 1
+    fake_user.password_hash = "old_hash"
+
+    with (
+        patch("app.api.v1.auth.get_user_by_email", new_callable=AsyncMock) as mock_get_user,
+        patch(
+            "app.core.auth_service.verify_and_update", new_callable=AsyncMock
+        ) as mock_verify_password,
+        patch("app.api.v1.auth.update_password_hash", new_callable=AsyncMock) as mock_update_hash,
+        patch("app.core.auth_service.create_access_token") as mock_access_token,
+        patch(
+            "app.core.auth_service.create_refresh_token", new_callable=AsyncMock
+        ) as mock_refresh_token,
+    ):
+        mock_get_user.return_value = fake_user
+        mock_verify_password.return_value = (True, "new_hash")
+        mock_access_token.return_value = "access_token"
+        mock_refresh_token.return_value = "refresh_token"
+
+        response = client.post("/api/v1/auth/login", json=user_data)
+
+        assert response.status_code == 200
+        mock_update_hash.assert_awaited_once()
+        assert mock_update_hash.await_args.args[1:] == (1, "new_hash")
+
+
 def test_login_wrong_password():
     user_data = {"email": "test@example.com", "password": "wrong_password"}
 
@@ -90,11 +135,13 @@ def test_login_wrong_password():
     fake_user.password_hash = "hashed_password"
 
     with (
-        patch("app.crud.get_user_by_email", new_callable=AsyncMock) as mock_get_user,
-        patch("app.core.auth_service.verify_password") as mock_verify_password,
+        patch("app.api.v1.auth.get_user_by_email", new_callable=AsyncMock) as mock_get_user,
+        patch(
+            "app.core.auth_service.verify_and_update", new_callable=AsyncMock
+        ) as mock_verify_password,
     ):
         mock_get_user.return_value = fake_user
-        mock_verify_password.return_value = False
+        mock_verify_password.return_value = (False, None)
 
         response = client.post("/api/v1/auth/login", json=user_data)
 
@@ -107,16 +154,14 @@ def test_refresh_token_success():
 
     with (
         patch("app.core.auth_service.decode_token") as mock_decode_token,
-        patch("app.core.auth_service.is_token_revoked") as mock_is_revoked,
         patch("app.core.auth_service.create_access_token") as mock_create_access_token,
-        patch("app.core.auth_service.create_refresh_token") as mock_create_refresh_token,
-        patch("app.core.auth_service.revoke_token") as mock_revoke_token,
+        patch(
+            "app.core.auth_service.rotate_refresh_token", new_callable=AsyncMock
+        ) as mock_rotate_refresh_token,
     ):
         mock_decode_token.return_value = fake_payload
-        mock_is_revoked.return_value = False
         mock_create_access_token.return_value = "new_access_token"
-        mock_create_refresh_token.return_value = "new_refresh_token"
-        mock_revoke_token.return_value = None
+        mock_rotate_refresh_token.return_value = "new_refresh_token"
 
         response = client.post(
             "/api/v1/auth/refresh", json={"refresh_token": "valid_refresh_token"}
@@ -143,12 +188,65 @@ def test_refresh_token_revoked():
 
     with (
         patch("app.core.auth_service.decode_token") as mock_decode_token,
-        patch("app.core.auth_service.is_token_revoked") as mock_is_revoked,
+        patch(
+            "app.core.auth_service.rotate_refresh_token", new_callable=AsyncMock
+        ) as mock_rotate_refresh_token,
     ):
         mock_decode_token.return_value = fake_payload
-        mock_is_revoked.return_value = True
+        mock_rotate_refresh_token.return_value = None
 
         response = client.post("/api/v1/auth/refresh", json={"refresh_token": "revoked_token"})
 
         assert response.status_code == 401
         assert response.json()["detail"] == "Token revoked"
+
+
+def test_logout_all():
+    from app.core import verify_token
+
+    app.dependency_overrides[verify_token] = lambda: "1"
+    try:
+        with patch(
+            "app.core.auth_service.revoke_all_sessions", new_callable=AsyncMock
+        ) as mock_revoke_sessions:
+            mock_revoke_sessions.return_value = 2
+
+            response = client.post("/api/v1/auth/logout-all", headers={"X-Token": "token"})
+
+        assert response.status_code == 200
+        mock_revoke_sessions.assert_awaited_once_with(1)
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_register_hashes_password_without_holding_connection(memory_client, memory_engine):
+    checked_out = []
+    hashed_with = []
+    hash_password = auth_service.hash_password
+
+    @event.listens_for(memory_engine.sync_engine.pool, "checkout")
+    def _checkout(*_):
+        checked_out.append(1)
+
+    @event.listens_for(memory_engine.sync_engine.pool, "checkin")
+    def _checkin(*_):
+        checked_out.pop()
+
+    async def _hash(password: str) -> str:
+        # Пока идёт bcrypt, соединение с БД должно быть возвращено в пул
+        hashed_with.append(len(checked_out))
+        return await hash_password(password)
+
+    user_data = {
+        "email": "hash@example.com",
+        "password": "password123",
+        "first_name": "string",
+        "last_name": "string",
+        "is_user_seller": False,
+    }
+    with patch("app.core.auth_service.hash_password", new=AsyncMock(side_effect=_hash)):
+        response = await memory_client.post("/api/v1/auth/register", json=user_data)
+
+    assert response.status_code == 200
+    assert hashed_with == [0]
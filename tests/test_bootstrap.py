@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core import auth_service
+from app.crud import create_user
+from app.db import bootstrap
+from app.db.bootstrap import bootstrap_db, bootstrap_lock, is_bootstrapped, lock_path
+from app.db.models import Person, User, UserRole, UserType
+from app.db.schema import ensure_schema
+from app.main import log_startup
+from app.schemas import UserRegister
+
+ADMIN = UserRegister(
+    email="admin@flowerhub.test", first_name="-", last_name="-", password="password"
+)
+BUYER = UserRegister(
+    email="buyer@flowerhub.test", first_name="-", last_name="-", password="password"
+)
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'boot.db'}")
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    async with engine.begin() as conn:
+        await conn.execute(insert(UserRole).values(id=1, name="-"))
+    yield engine
+    await engine.dispose()
+
+
+async def _admins(engine) -> int:
+    async with engine.connect() as conn:
+        return await conn.scalar(
+            select(func.count()).select_from(User).where(User.email == ADMIN.email)
+        )
+
+
+async def _admin(engine):
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(User.password_hash, UserType.name)
+            .join(Person, Person.user_id == User.id)
+            .join(UserType, UserType.id == Person.user_type_id)
+            .where(User.email == ADMIN.email)
+        )
+        return result.one()
+
+
+def _hash_spy():
+    # Хеширование идёт по-настоящему, подменой только считаются вызовы
+    return patch.object(
+        auth_service, "hash_password", new=AsyncMock(wraps=auth_service.hash_password)
+    )
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_runs_once(engine):
+    with _hash_spy() as hash_password:
+        assert await bootstrap_db(engine, ADMIN) is True
+        assert await is_bootstrapped(engine, ADMIN.email)
+
+        # Повторный запуск не берёт блокировку и не создаёт администратора
+        with patch.object(bootstrap, "bootstrap_lock") as lock:
+            assert await bootstrap_db(engine, ADMIN) is False
+        lock.assert_not_called()
+
+    hash_password.assert_awaited_once_with(ADMIN.password)
+    assert await _admins(engine) == 1
+    password_hash, user_type = await _admin(engine)
+    assert user_type == "Админ"
+    assert await auth_service.verify_password(ADMIN.password, password_hash)
+
+
+@pytest.mark.asyncio
+async def test_existing_admin_skips_bcrypt(engine):
+    async with engine.begin() as conn:
+        await conn.execute(insert(User).values(email=ADMIN.email, password_hash="-", role_id=1))
+
+    with patch.object(auth_service, "hash_password", new=AsyncMock()) as hash_password:
+        assert await bootstrap_db(engine, ADMIN) is False
+
+    hash_password.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_bootstrap_once(engine):
+    with _hash_spy() as hash_password:
+        results = await asyncio.gather(*(bootstrap_db(engine, ADMIN) for _ in range(4)))
+
+    assert True in results
+    assert await _admins(engine) == 1
+    hash_password.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_lock_is_exclusive(engine):
+    events = []
+
+    async def worker(name: str) -> None:
+        async with bootstrap_lock(engine):
+            events.append(f"{name}+")
+            await asyncio.sleep(0.05)
+            events.append(f"{name}-")
+
+    await asyncio.gather(worker("a"), worker("b"))
+
+    assert events in (["a+", "a-", "b+", "b-"], ["b+", "b-", "a+", "a-"])
+    assert lock_path(engine).endswith("boot.db.bootstrap.lock")
+
+
+def test_lock_path_only_for_sqlite_files():
+    memory = create_async_engine("sqlite+aiosqlite://")
+    postgres = create_async_engine("postgresql+asyncpg://u:p@localhost/db")
+
+    assert lock_path(memory) is None
+    assert lock_path(postgres) is None
+
+
+def test_slow_startup_is_warned(caplog):
+    with patch("app.main.config.STARTUP_BUDGET_MS", 100.0):
+        with caplog.at_level(logging.INFO, logger="app.main"):
+            log_startup({"db": 40.0, "redis": 5.0}, 45.0)
+            log_startup({"db": 140.0, "redis": 5.0}, 145.0)
+
+    first, second = caplog.records
+    assert first.levelno == logging.INFO
+    assert second.levelno == logging.WARNING
+    assert "db 140.0 мс, redis 5.0 мс" in second.getMessage()
+
+
+@pytest.mark.asyncio
+async def test_cold_boot_on_empty_database(tmp_path):
+    # Пустой файл БД: миграции, администратор и регистрация без подмен
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cold.db'}")
+    try:
+        assert await bootstrap_db(engine, ADMIN) is True
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            user = await create_user(session, BUYER)
+
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                select(User.email, User.role_id, UserType.name)
+                .join(Person, Person.user_id == User.id)
+                .join(UserType, UserType.id == Person.user_type_id)
+                .order_by(User.id)
+            )
+            rows = result.all()
+            role_ids = {role_id for _, role_id, _ in rows}
+            assert (
+                await conn.scalar(select(UserRole.name).where(UserRole.id.in_(role_ids))) == "Юзер"
+            )
+        assert [(email, type_name) for email, _, type_name in rows] == [
+            (ADMIN.email, "Админ"),
+            (BUYER.email, "Покупатель"),
+        ]
+        assert user.role_id in role_ids and len(role_ids) == 1
+    finally:
+        await engine.dispose()
@@ -0,0 +1,372 @@
+import asyncio
+import time
+from http.cookies import SimpleCookie
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Response
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel, field_serializer
+from sqlalchemy import bindparam, literal_column, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import metrics
+from app.core.config import Config
+from app.db import LazySession, SessionReleasingRoute, commit_unit, database
+from app.db.database import (
+    create_engine,
+    engine_options,
+    instrument_pool,
+    instrument_statement_cache,
+)
+from app.db.routing import ReadRouter
+from app.main import app
+
+
+def _config(**overrides):
+    return Config(SECRET_KEY="x", REDIS_HOST="localhost", REDIS_PORT=6379, REDIS_DB=0, **overrides)
+
+
+def test_db_url_resolution(monkeypatch):
+    for name in ("DATABASE_URL", "SQLITE_PATH", "POSTGRES_HOST", "POSTGRES_DB", "POSTGRES_USER"):
+        monkeypatch.delenv(name, raising=False)
+
+    assert _config().DB_URL == "sqlite+aiosqlite:///flowers.db"
+    assert _config(SQLITE_PATH="/tmp/x.db").DB_URL == "sqlite+aiosqlite:////tmp/x.db"
+    assert (
+        _config(
+            POSTGRES_HOST="db", POSTGRES_DB="f", POSTGRES_USER="u", POSTGRES_PASSWORD="p"
+        ).DB_URL
+        == "postgresql+asyncpg://u:p@db:5432/f"
+    )
+    assert _config(POSTGRES_HOST="db", DATABASE_URL="sqlite+aiosqlite:///a.db").DB_URL == (
+        "sqlite+aiosqlite:///a.db"
+    )
+
+
+def test_engine_options_for_postgres():
+    options = engine_options("postgresql+asyncpg://u:p@db/f")
+
+    assert options["url"].query["prepared_statement_cache_size"] == "100"
+    assert options["pool_size"] == 10
+    assert options["max_overflow"] == 20
+    assert options["pool_pre_ping"] is True
+
+
+def test_engine_options_for_sqlite_memory():
+    assert engine_options("sqlite+aiosqlite://") == {
+        "url": engine_options("sqlite+aiosqlite://")["url"]
+    }
+
+
+@pytest.mark.asyncio
+async def test_pool_exhaustion_raises_timeout(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=0.2
+    )
+    instrument_pool(engine, name="test_pool")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert metrics.snapshot()["test_pool"]["checkedout"] == 1
+
+            start = asyncio.get_running_loop().time()
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+            assert asyncio.get_running_loop().time() - start < 2
+
+        stats = metrics.snapshot()["test_pool"]
+        assert stats["checkedout"] == 0
+        assert stats["checkouts"] == stats["checkins"] == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_statement_cache_metrics(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    instrument_statement_cache(engine, name="test_statements")
+    query = select(literal_column("1")).where(literal_column("2") > bindparam("x"))
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            for x in (1, 2, 3):
+                await conn.execute(query, {"x": x})
+
+        stats = metrics.snapshot()["test_statements"]
+        assert (stats["hits"], stats["misses"]) == (2, 2)
+        assert stats["hit_rate"] == 0.5
+        assert stats["size"] == 2
+    finally:
+        await engine.dispose()
+
+
+def test_pool_timeout_returns_503():
+    client = TestClient(app)
+
+    with patch(
+        "app.api.v1.flower.get_flowers_page",
+        new=AsyncMock(side_effect=PoolTimeoutError("exhausted")),
+    ):
+        response = client.get("/api/v1/flowers/")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert metrics.snapshot()["counters"]["db.pool.timeouts"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_writer_and_reader_engines(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'profile.db'}"
+    writer = create_engine(url, name="test_writer_pool")
+    reader = create_engine(url, readonly=True, name="test_reader_pool")
+    try:
+        async with writer.begin() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+            assert (await conn.execute(text("PRAGMA temp_store"))).scalar() == 2
+            await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+        async with reader.connect() as conn:
+            assert (await conn.execute(text("SELECT count(*) FROM t"))).scalar() == 1
+            assert (await conn.execute(text("PRAGMA query_only"))).scalar() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t VALUES (2)"))
+
+        assert writer.sync_engine.pool.size() == 1
+        assert reader.sync_engine.pool.size() == 4
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_readers_do_not_wait_for_writer(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'concurrency.db'}"
+    writer = create_engine(url, name="test_writer_pool")
+    reader = create_engine(url, readonly=True, name="test_reader_pool")
+    try:
+        async with writer.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+
+        async with writer.begin() as conn:
+            # Незавершённая транзакция записи не блокирует чтение в режиме WAL
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+            async with reader.connect() as read_conn:
+                assert (await read_conn.execute(text("SELECT count(*) FROM t"))).scalar() == 0
+    finally:
+        await writer.dispose()
+        await reader.dispose()
+
+
+def _engines(tmp_path, count):
+    return [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'replica{i}.db'}")
+        for i in range(count)
+    ]
+
+
+def test_read_router_round_robin(tmp_path):
+    primary, first, second = _engines(tmp_path, 3)
+    router = ReadRouter(primary=primary, replicas=[first, second])
+
+    assert [router.choose() for _ in range(4)] == [first, second, first, second]
+    assert ReadRouter(primary=primary, replicas=[]).choose() is primary
+    with pytest.raises(ValueError):
+        ReadRouter(primary=primary, replicas=[first], strategy="random")
+
+
+@pytest.mark.asyncio
+async def test_read_router_least_connections(tmp_path):
+    primary, first, second = _engines(tmp_path, 3)
+    router = ReadRouter(primary=primary, replicas=[first, second], strategy="least_connections")
+    try:
+        async with first.connect():
+            assert router.choose() is second
+        async with second.connect():
+            assert router.choose() is first
+    finally:
+        for engine in (primary, first, second):
+            await engine.dispose()
+
+
+def test_read_router_pins_writer_to_primary(tmp_path):
+    primary, replica = _engines(tmp_path, 2)
+    router = ReadRouter(primary=primary, replicas=[replica], pin_seconds=5)
+
+    assert router.choose(time.time() - 1) is primary
+    assert router.choose(time.time() - 10) is replica
+    assert router.choose(None) is replica
+    # Время из будущего не закрепляет клиента навсегда
+    assert router.choose(time.time() + 3600) is replica
+
+    disabled = ReadRouter(primary=primary, replicas=[replica])
+    assert disabled.choose(time.time()) is replica
+
+
+@pytest.mark.asyncio
+async def test_write_session_commit_pins_client(tmp_path):
+    primary, replica = _engines(tmp_path, 2)
+    router = ReadRouter(primary=primary, replicas=[replica], pin_seconds=5)
+    response = Response()
+    try:
+        with (
+            patch.object(database, "read_router", router),
+            patch.object(
+                database, "async_session", sessionmaker(bind=primary, class_=AsyncSession)
+            ),
+            # Время, которое при округлении до миллисекунд ушло бы в будущее
+            patch("time.time", return_value=1000.0009),
+        ):
+            sessions = database.get_write_session(response)
+            session = await sessions.__anext__()
+            await session.execute(text("SELECT 1"))
+            assert "set-cookie" not in response.headers
+
+            await session.commit()
+            await sessions.aclose()
+            cookie = SimpleCookie(response.headers["set-cookie"])[database.LAST_WRITE_COOKIE]
+            assert cookie["max-age"] == "5"
+
+            # Запрос с этой cookie может прийти на любой воркер
+            request = SimpleNamespace(cookies={database.LAST_WRITE_COOKIE: cookie.value})
+            sessions = database.get_read_session(request)
+            session = await sessions.__anext__()
+            assert session.bind is primary
+            await sessions.aclose()
+
+            request = SimpleNamespace(cookies={database.LAST_WRITE_COOKIE: "garbage"})
+            assert database.last_write(request) is None
+    finally:
+        await primary.dispose()
+        await replica.dispose()
+
+
+@pytest.mark.asyncio
+async def test_lazy_session_opens_on_first_use(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'lazy.db'}")
+    instrument_pool(engine, name="test_lazy_pool")
+    session = LazySession(lambda: AsyncSession(engine))
+    try:
+        assert not session.opened
+        assert metrics.snapshot()["test_lazy_pool"]["checkouts"] == 0
+
+        assert await session.scalar(text("SELECT 1")) == 1
+        assert session.opened
+        assert metrics.snapshot()["test_lazy_pool"]["checkedout"] == 1
+
+        await session.release()
+        assert not session.opened
+        assert metrics.snapshot()["test_lazy_pool"]["checkedout"] == 0
+
+        # После освобождения прокси открывает новую сессию
+        assert await session.scalar(text("SELECT 2")) == 2
+        await session.release()
+        assert metrics.snapshot()["test_lazy_pool"]["checkouts"] == 2
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_session_released_before_serialization(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'release.db'}")
+    checked_out = []
+
+    class Answer(BaseModel):
+        value: int
+
+        @field_serializer("value")
+        def _serialize(self, value: int) -> int:
+            checked_out.append(engine.sync_engine.pool.checkedout())
+            return value
+
+    async def _session():
+        session = LazySession(lambda: AsyncSession(engine))
+        try:
+            yield session
+        finally:
+            await session.release()
+
+    router = APIRouter(route_class=SessionReleasingRoute)
+
+    @router.get("/answer", response_model=Answer)
+    async def answer(db=Depends(_session)):
+        return Answer(value=await db.scalar(text("SELECT 42")))
+
+    test_app = FastAPI()
+    test_app.include_router(router)
+    try:
+        transport = ASGITransport(app=test_app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/answer")
+    finally:
+        await engine.dispose()
+
+    assert response.json() == {"value": 42}
+    assert checked_out == [0]
+
+
+@pytest.mark.asyncio
+async def test_unused_session_is_not_opened():
+    router = APIRouter(route_class=SessionReleasingRoute)
+
+    @router.get("/cached")
+    async def cached(db=Depends(database.get_read_session)):
+        return {"cached": True}
+
+    test_app = FastAPI()
+    test_app.include_router(router)
+    before = metrics.snapshot()["counters"]
+    transport = ASGITransport(app=test_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/cached")
+
+    after = metrics.snapshot()["counters"]
+    assert response.status_code == 200
+    assert after["db.sessions.unused"] == before.get("db.sessions.unused", 0) + 1
+    assert after.get("db.sessions.opened", 0) == before.get("db.sessions.opened", 0)
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_commits_once(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'unit.db'}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+    committed = []
+
+    async def _count_rows() -> int:
+        async with engine.connect() as conn:
+            return await conn.scalar(text("SELECT count(*) FROM item"))
+
+    async def _on_commit() -> None:
+        committed.append(await _count_rows())
+
+    try:
+        session = LazySession(lambda: AsyncSession(engine), unit_of_work=True)
+        await session.execute(text("INSERT INTO item (id) VALUES (1)"))
+        await commit_unit(session, _on_commit)
+        await session.execute(text("INSERT INTO item (id) VALUES (2)"))
+        await commit_unit(session)
+        assert committed == []
+
+        await session.complete()
+        await session.release()
+        assert committed == [2]
+
+        # Без complete изменения единицы работы откатываются целиком
+        session = LazySession(lambda: AsyncSession(engine), unit_of_work=True)
+        await session.execute(text("INSERT INTO item (id) VALUES (3)"))
+        await commit_unit(session, _on_commit)
+        await session.release()
+        assert await _count_rows() == 2
+        assert committed == [2]
+    finally:
+        await engine.dispose()
@@ -5,10 +5,12 @@ from fastapi import FastAPI, status
 from httpx import ASGITransport, AsyncClient
 
 from app.api.v1.flower import FlowerAPI
+from app.core import Principal
 from app.schemas import (
     FlowerData,
     FloweringcountriesData,
     FloweringSeasonData,
+    FlowerPage,
     FlowerTypeData,
     FlowerUsageData,
 )
@@ -18,7 +20,7 @@ flower_api = FlowerAPI()
 
 @pytest.fixture
 def app():
-    from app.core import verify_token
+    from app.core import token_claims, verify_token
 
     app = FastAPI()
     app.include_router(flower_api.router, prefix="/flowers")
@@ -26,7 +28,11 @@ def app():
     async def override_verify_token():
         return "123"
 
+    async def override_token_claims():
+        return {"sub": "123"}
+
     app.dependency_overrides[verify_token] = override_verify_token
+    app.dependency_overrides[token_claims] = override_token_claims
     return app
 
 
@@ -58,8 +64,8 @@ def fake_flower_data():
 
 @pytest.mark.asyncio
 async def test_list_flowers_success(app, fake_flower_data):
-    with patch("app.api.v1.flower.get_flowers", new_callable=AsyncMock) as mock_get_flowers:
-        mock_get_flowers.return_value = fake_flower_data
+    with patch("app.api.v1.flower.get_flowers_page", new_callable=AsyncMock) as mock_get_flowers:
+        mock_get_flowers.return_value = FlowerPage(items=fake_flower_data)
 
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -75,8 +81,8 @@ async def test_list_flowers_success(app, fake_flower_data):
 
 @pytest.mark.asyncio
 async def test_list_flowers_with_filters(app):
-    with patch("app.api.v1.flower.get_flowers", new_callable=AsyncMock) as mock_get_flowers:
-        mock_get_flowers.return_value = []
+    with patch("app.api.v1.flower.get_flowers_page", new_callable=AsyncMock) as mock_get_flowers:
+        mock_get_flowers.return_value = FlowerPage(items=[])
 
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -91,10 +97,25 @@ async def test_list_flowers_with_filters(app):
         assert filters.max_price == 15
 
 
+@pytest.mark.asyncio
+async def test_list_flowers_search_query(app):
+    with patch("app.api.v1.flower.get_flowers_page", new_callable=AsyncMock) as mock_get_flowers:
+        mock_get_flowers.return_value = FlowerPage(items=[])
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get("/flowers/?q=роза красная")
+            too_long = await ac.get("/flowers/", params={"q": "р" * 201})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert mock_get_flowers.call_args[0][1].q == "роза красная"
+        assert too_long.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.asyncio
 async def test_list_flowers_pagination(app):
-    with patch("app.api.v1.flower.get_flowers", new_callable=AsyncMock) as mock_get_flowers:
-        mock_get_flowers.return_value = []
+    with patch("app.api.v1.flower.get_flowers_page", new_callable=AsyncMock) as mock_get_flowers:
+        mock_get_flowers.return_value = FlowerPage(items=[])
 
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -105,10 +126,27 @@ async def test_list_flowers_pagination(app):
         assert kwargs["offset"] == 20
 
 
+@pytest.mark.asyncio
+async def test_list_flowers_cursor(app, fake_flower_data):
+    with patch("app.api.v1.flower.get_flowers_page", new_callable=AsyncMock) as mock_get_flowers:
+        mock_get_flowers.return_value = FlowerPage(items=fake_flower_data, next_cursor="next")
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get("/flowers/?limit=2&cursor=abc")
+            conflict = await ac.get("/flowers/?offset=2&cursor=abc")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["X-Next-Cursor"] == "next"
+        assert len(response.json()) == 2
+        assert mock_get_flowers.call_args.kwargs["cursor"] == "abc"
+        assert conflict.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.asyncio
 async def test_list_flowers_empty_result(app):
-    with patch("app.api.v1.flower.get_flowers", new_callable=AsyncMock) as mock_get_flowers:
-        mock_get_flowers.return_value = []
+    with patch("app.api.v1.flower.get_flowers_page", new_callable=AsyncMock) as mock_get_flowers:
+        mock_get_flowers.return_value = FlowerPage(items=[])
 
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -134,7 +172,7 @@ async def test_list_flowers_invalid_query(app):
 
 @pytest.mark.asyncio
 async def test_list_flowers_internal_server_error(app):
-    with patch("app.api.v1.flower.get_flowers", new_callable=AsyncMock) as mock_get_flowers:
+    with patch("app.api.v1.flower.get_flowers_page", new_callable=AsyncMock) as mock_get_flowers:
         mock_get_flowers.side_effect = Exception("Unexpected error")
 
         transport = ASGITransport(app=app)
@@ -152,10 +190,10 @@ async def test_create_flower_type_success(app):
 
     with (
         patch("app.api.v1.flower.create_flower_type", new_callable=AsyncMock) as mock_create,
-        patch("app.api.v1.flower.get_user_by_id", new_callable=AsyncMock) as mock_user,
+        patch("app.core.principal.load_principal", new_callable=AsyncMock) as mock_principal,
     ):
         mock_create.return_value = {"id": 1, "name": "Test Type", "description": "Test Description"}
-        mock_user.return_value = type("User", (), {"is_user_seller": True, "is_user_admin": False})
+        mock_principal.return_value = Principal(user_id=123, person_id=1, role="Продавец")
 
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -167,3 +205,23 @@ async def test_create_flower_type_success(app):
         data = response.json()
         assert data["name"] == "Test Type"
         mock_create.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_create_flower_type_forbidden_for_buyer(app):
+    payload = {"name": "Test Type", "description": "Test Description"}
+
+    with (
+        patch("app.api.v1.flower.create_flower_type", new_callable=AsyncMock) as mock_create,
+        patch("app.core.principal.load_principal", new_callable=AsyncMock) as mock_principal,
+    ):
+        mock_principal.return_value = Principal(user_id=123, person_id=1, role="Покупатель")
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.post(
+                "/flowers/types", json=payload, headers={"X-Token": "test-token"}
+            )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        mock_create.assert_not_awaited()
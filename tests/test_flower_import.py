@@ -0,0 +1,266 @@
+import json
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import event, func, insert, select
+
+from app.core import Principal, current_principal
+from app.crud.flower_import import CSV, NDJSON, import_format, parse_records
+from app.db.models import (
+    Country,
+    Flower,
+    FloweringSeason,
+    FlowerType,
+    FlowerUsage,
+    saleable_flowers,
+)
+from app.main import app
+
+SELLER = Principal(user_id=2, person_id=2, role="Продавец")
+HEADER = "name,variety,type_id,season_id,usage_id,country_id,price\n"
+
+
+@pytest_asyncio.fixture
+async def references(memory_engine):
+    async with memory_engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage):
+            await conn.execute(insert(model).values(id=1, name="-"))
+        await conn.execute(insert(Country).values(id=1, name="Россия", code="RU"))
+    app.dependency_overrides[current_principal] = lambda: SELLER
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def _records(data: str, fmt: str, size: int = 7):
+    return [record async for record in parse_records(_chunks(data.encode(), size), fmt)]
+
+
+async def _flowers(memory_engine):
+    async with memory_engine.connect() as conn:
+        result = await conn.execute(
+            select(Flower.name, saleable_flowers.c.seller_id)
+            .join(saleable_flowers, saleable_flowers.c.flower_id == Flower.id)
+            .order_by(Flower.id)
+        )
+        return result.all()
+
+
+@pytest.mark.asyncio
+async def test_csv_rows_span_chunks_and_quoted_newlines():
+    data = (
+        "\ufeff"
+        + HEADER
+        + 'Роза,"Красная, ""Grand""",1,1,1,1,10\r\n\n"Пион\nмахровый",-,1,1,1,1,5\n1,2\n'
+    )
+
+    records = await _records(data, CSV)
+
+    assert records[0] == (
+        1,
+        {
+            "name": "Роза",
+            "variety": 'Красная, "Grand"',
+            "type_id": "1",
+            "season_id": "1",
+            "usage_id": "1",
+            "country_id": "1",
+            "price": "10",
+        },
+    )
+    assert records[1][1]["name"] == "Пион\nмахровый"
+    assert records[2] == (3, "ожидалось полей: 7, получено: 2")
+
+
+@pytest.mark.asyncio
+async def test_ndjson_bad_lines_are_reported():
+    data = '{"name": "Роза"}\n\nnot json\n[1]\n'
+
+    records = await _records(data, NDJSON, size=3)
+
+    assert records[0] == (1, {"name": "Роза"})
+    assert records[1][0] == 2 and records[1][1].startswith("некорректный JSON")
+    assert records[2] == (3, "строка должна быть JSON-объектом")
+
+
+@pytest.mark.asyncio
+async def test_long_lines_are_skipped():
+    long_name = "Р" * 40
+    data = (
+        HEADER
+        + f"{long_name},-,1,1,1,1,10\n"
+        + 'Роза,"очень длинный\nсорт в кавычках\nна нескольких строках\n'
+        + 'и ещё одной строке",1,1,1,1,10\n'
+        + "Пион,-,1,1,1,1,5\n"
+    )
+
+    with patch("app.crud.flower_import.config.IMPORT_MAX_LINE_BYTES", 70):
+        records = await _records(data, CSV, size=5)
+        ndjson = await _records(f'{{"name": "{long_name}"}}\n{{"name": "Роза"}}', NDJSON)
+        with pytest.raises(HTTPException) as exc:
+            await _records("name," * 15 + "\n", CSV)
+
+    assert records[:2] == [(1, "строка длиннее 70 байт"), (2, "строка длиннее 70 байт")]
+    assert records[2][0] == 3 and records[2][1]["name"] == "Пион"
+    assert len(records) == 3
+    assert ndjson == [(1, "строка длиннее 70 байт"), (2, {"name": "Роза"})]
+    assert exc.value.status_code == 400
+
+
+def test_import_format_from_content_type():
+    assert import_format("text/csv; charset=utf-8") == CSV
+    assert import_format("application/x-ndjson") == NDJSON
+    with pytest.raises(HTTPException) as exc:
+        import_format("application/json")
+    assert exc.value.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_import_csv_in_batches(memory_client, memory_engine, query_budget, references):
+    rows = [f"Роза {i},-,1,1,1,1,{i + 1}" for i in range(5)]
+    rows.insert(2, "Тюльпан,-,9,1,1,1,3")
+    rows.insert(4, "Пион,-,1,1,1,1,0")
+    body = (HEADER + "\n".join(rows)).encode()
+
+    # Справочники, затем по executemany цветов и связок на каждую пачку из 2 строк
+    with patch("app.crud.flower_import.config.IMPORT_BATCH_SIZE", 2), query_budget(4 + 3 * 2):
+        response = await memory_client.post(
+            "/api/v1/seller/flowers/import",
+            content=_chunks(body, 16),
+            headers={"Content-Type": "text/csv"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "imported": 5,
+        "failed": 2,
+        "errors": [
+            {"row": 3, "error": "type_id: 9 не найден"},
+            {"row": 5, "error": "price: цена должна быть положительной"},
+        ],
+        "interrupted": False,
+    }
+    flowers = await _flowers(memory_engine)
+    assert [name for name, _ in flowers] == [f"Роза {i}" for i in range(5)]
+    assert {seller for _, seller in flowers} == {SELLER.user_id}
+
+
+@pytest.mark.asyncio
+async def test_admin_imports_ndjson_for_seller(memory_client, memory_engine, references):
+    app.dependency_overrides[current_principal] = lambda: Principal(3, 3, "Админ")
+    flower = {"name": "Роза", "variety": "-", "type_id": 1, "season_id": 1}
+    lines = [
+        {**flower, "usage_id": 1, "country_id": 1, "price": 10},
+        {**flower, "usage_id": 1, "price": 10},
+    ]
+    body = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines)
+
+    with patch("app.crud.flower_import.config.IMPORT_MAX_ERRORS", 0):
+        response = await memory_client.post(
+            "/api/v1/admin/flowers/import",
+            params={"seller_id": 7},
+            content=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {"imported": 1, "failed": 1, "errors": [], "interrupted": False}
+    assert await _flowers(memory_engine) == [("Роза", 7)]
+
+
+@pytest.mark.asyncio
+async def test_import_rejects_unknown_content_type(memory_client, memory_engine, references):
+    response = await memory_client.post(
+        "/api/v1/seller/flowers/import",
+        content='[{"name": "Роза"}]'.encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 415
+    async with memory_engine.connect() as conn:
+        assert await conn.scalar(select(func.count()).select_from(Flower)) == 0
+
+
+@pytest.mark.asyncio
+async def test_import_commits_batches_without_holding_connection(
+    memory_client, memory_engine, references
+):
+    rows = [f"Роза {i},-,1,1,1,1,{i + 1}" for i in range(4)]
+    rows += ["Ирис,-,1,1,1,1,nan", "Лилия,-,1,1,1,1,inf"]
+    body = (HEADER + "\n".join(rows)).encode()
+    checked_out = []
+    commits = []
+    held_while_reading = []
+
+    @event.listens_for(memory_engine.sync_engine.pool, "checkout")
+    def _checkout(*_):
+        checked_out.append(1)
+
+    @event.listens_for(memory_engine.sync_engine.pool, "checkin")
+    def _checkin(*_):
+        checked_out.pop()
+
+    @event.listens_for(memory_engine.sync_engine, "commit")
+    def _commit(*_):
+        commits.append(1)
+
+    async def _body():
+        async for chunk in _chunks(body, 16):
+            held_while_reading.append(len(checked_out))
+            yield chunk
+
+    with patch("app.crud.flower_import.config.IMPORT_BATCH_SIZE", 2):
+        response = await memory_client.post(
+            "/api/v1/seller/flowers/import",
+            content=_body(),
+            headers={"Content-Type": "text/csv"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 4
+    assert response.json()["errors"] == [
+        {"row": 5, "error": "price: цена должна быть конечным числом"},
+        {"row": 6, "error": "price: цена должна быть конечным числом"},
+    ]
+    assert len(commits) == 2
+    assert set(held_while_reading) == {0}
+
+
+@pytest.mark.asyncio
+async def test_interrupted_import_reports_committed_rows(memory_client, memory_engine, references):
+    rows = [f"Роза {i},-,1,1,1,1,{i + 1}" for i in range(3)]
+
+    async def _body():
+        yield (HEADER + "\n".join(rows) + "\n").encode()
+        raise OSError("соединение с клиентом разорвано")
+
+    with patch("app.crud.flower_import.config.IMPORT_BATCH_SIZE", 2):
+        response = await memory_client.post(
+            "/api/v1/seller/flowers/import",
+            content=_body(),
+            headers={"Content-Type": "text/csv"},
+        )
+
+    # Первая пачка уже зафиксирована и остаётся, недочитанная вторая не сохраняется
+    assert response.status_code == 200
+    assert response.json() == {"imported": 2, "failed": 0, "errors": [], "interrupted": True}
+    assert [name for name, _ in await _flowers(memory_engine)] == ["Роза 0", "Роза 1"]
+
+
+@pytest.mark.asyncio
+async def test_import_failing_before_first_commit_raises(memory_client, memory_engine, references):
+    async def _body():
+        yield HEADER.encode()
+        raise OSError("соединение с клиентом разорвано")
+
+    with pytest.raises(OSError):
+        await memory_client.post(
+            "/api/v1/seller/flowers/import",
+            content=_body(),
+            headers={"Content-Type": "text/csv"},
+        )
+    assert await _flowers(memory_engine) == []
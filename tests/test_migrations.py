@@ -0,0 +1,98 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from app.db import models  # noqa: F401
+from app.db.database import Base
+from app.db.schema import (
+    SchemaOutdatedError,
+    alembic_config,
+    ensure_schema,
+    head_revision,
+    include_name,
+)
+
+
+def _alembic(path):
+    alembic_cfg = alembic_config(f"sqlite+aiosqlite:///{path}")
+    alembic_cfg.attributes["configure_logger"] = False
+    return alembic_cfg
+
+
+def test_migrations_match_models(tmp_path):
+    path = tmp_path / "migrated.db"
+    command.upgrade(_alembic(path), "head")
+
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        with engine.connect() as conn:
+            assert (
+                compare_metadata(
+                    MigrationContext.configure(conn, opts={"include_name": include_name}),
+                    Base.metadata,
+                )
+                == []
+            )
+            indexes = {index["name"] for index in inspect(conn).get_indexes("flower")}
+            assert {"ix_flower_type_id", "ix_flower_price", "ix_flower_country_id"} <= indexes
+
+        command.downgrade(_alembic(path), "0001")
+        with engine.connect() as conn:
+            assert inspect(conn).get_indexes("flower") == []
+    finally:
+        engine.dispose()
+
+
+def test_ensure_schema_bootstraps_empty_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    try:
+        with engine.connect() as conn:
+            ensure_schema(conn)
+        with engine.connect() as conn:
+            assert MigrationContext.configure(conn).get_current_revision() == head_revision()
+            assert "ix_person_user_id" in {i["name"] for i in inspect(conn).get_indexes("person")}
+            # Повторная проверка на актуальной схеме проходит без изменений
+            ensure_schema(conn)
+    finally:
+        engine.dispose()
+
+
+def test_ensure_schema_refuses_outdated_database(tmp_path):
+    path = tmp_path / "outdated.db"
+    command.upgrade(_alembic(path), "0001")
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(SchemaOutdatedError, match="alembic upgrade head"):
+                ensure_schema(conn)
+    finally:
+        engine.dispose()
+
+
+def test_ensure_schema_suggests_stamp_for_initial_schema(tmp_path):
+    # Схема ревизии 0001 без таблицы версий: так выглядит БД прежнего create_all
+    path = tmp_path / "legacy.db"
+    command.upgrade(_alembic(path), "0001")
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE alembic_version"))
+        with engine.connect() as conn:
+            with pytest.raises(SchemaOutdatedError, match="alembic stamp 0001"):
+                ensure_schema(conn)
+    finally:
+        engine.dispose()
+
+
+def test_ensure_schema_refuses_unknown_unversioned_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE flower (id INTEGER PRIMARY KEY)"))
+        with engine.connect() as conn:
+            with pytest.raises(SchemaOutdatedError, match="не совпадает с ревизией 0001"):
+                ensure_schema(conn)
+    finally:
+        engine.dispose()
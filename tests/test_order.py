@@ -7,6 +7,7 @@ from fastapi import FastAPI, status
 from httpx import ASGITransport, AsyncClient
 
 from app.api.v1.order import OrderAPI
+from app.core import Principal
 from app.schemas import CreateOrder, FlowerOrderItem, OrderResponse
 
 order_api = OrderAPI()
@@ -38,7 +39,7 @@ def sample_order_data():
 
 @pytest.mark.asyncio
 async def test_make_order_success():
-    fake_user = SimpleNamespace(is_user_seller=False)
+    buyer = Principal(user_id=1, person_id=1, role="Покупатель")
     order_items = [
         FlowerOrderItem(flower_id=1, quantity=2),
         FlowerOrderItem(flower_id=2, quantity=3),
@@ -48,21 +49,19 @@ async def test_make_order_success():
     fake_orders = [SimpleNamespace(id=123), SimpleNamespace(id=124)]
 
     with (
-        patch("app.api.v1.order.get_user_by_id", new=AsyncMock(return_value=fake_user)),
         patch("app.api.v1.order.create_order_by_buyer", new=AsyncMock(return_value=fake_orders)),
     ):
         api = OrderAPI()
 
-        response = await api.make_order(order_data=order_data, user_id=1, db=AsyncMock())
+        response = await api.make_order(order_data=order_data, principal=buyer, db=AsyncMock())
         assert response == {"details": "Заказ оформлен успешно"}
 
 
 @pytest.mark.asyncio
 async def test_make_order_forbidden(app, sample_order_data):
-    fake_user = AsyncMock()
-    fake_user.is_user_seller = True
+    seller = Principal(user_id=1, person_id=1, role="Продавец")
 
-    with patch("app.api.v1.order.get_user_by_id", return_value=fake_user):
+    with patch("app.core.principal.load_principal", new=AsyncMock(return_value=seller)):
         transport = ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
             response = await ac.post("/api/orders", json=sample_order_data.dict())
@@ -132,13 +131,11 @@ async def test_make_order_forbidden():
 
     order_data = CreateOrder(items=[FlowerOrderItem(flower_id=1, quantity=1)])
 
-    with patch(
-        "app.api.v1.order.get_user_by_id", return_value=SimpleNamespace(is_user_seller=True)
-    ):
-        from app.api.v1.order import OrderAPI
+    seller = Principal(user_id=1, person_id=1, role="Продавец")
 
-        api = OrderAPI()
-        try:
-            await api.make_order(order_data=order_data, user_id=1, db=AsyncMock())
-        except HTTPException as e:
-            assert e.status_code == 403
+    from app.api.v1.order import OrderAPI
+
+    api = OrderAPI()
+    with pytest.raises(HTTPException) as exc:
+        await api.make_order(order_data=order_data, principal=seller, db=AsyncMock())
+    assert exc.value.status_code == 403
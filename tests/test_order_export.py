@@ -0,0 +1,117 @@
+import json
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import Principal, current_principal
+from app.crud.order_export import CSV, NDJSON, export_orders
+from app.db.models import Order, ordered_flowers
+from app.main import app
+
+ADMIN = Principal(user_id=3, person_id=3, role="Админ")
+
+
+@pytest_asyncio.fixture
+async def orders(memory_engine):
+    # Заказ 1 — три позиции, заказ 2 — одна, заказ 3 — без позиций
+    async with memory_engine.begin() as conn:
+        await conn.execute(
+            insert(Order),
+            [
+                {"id": 1, "buyer_id": 1, "order_date": date(2024, 1, 10), "is_closed": False},
+                {"id": 2, "buyer_id": 2, "order_date": date(2024, 2, 20), "is_closed": True},
+                {"id": 3, "buyer_id": 1, "order_date": date(2024, 3, 1), "is_closed": False},
+            ],
+        )
+        await conn.execute(
+            ordered_flowers.insert(),
+            [
+                {"order_id": 1, "flower_id": 1, "quantity": 2},
+                {"order_id": 1, "flower_id": 2, "quantity": 1},
+                {"order_id": 1, "flower_id": 3, "quantity": 5},
+                {"order_id": 2, "flower_id": 1, "quantity": 7},
+            ],
+        )
+    app.dependency_overrides[current_principal] = lambda: ADMIN
+
+
+@pytest.mark.asyncio
+async def test_order_spanning_partitions_stays_whole(memory_engine, orders):
+    def factory():
+        return AsyncSession(memory_engine, expire_on_commit=False)
+
+    with patch("app.crud.order_export.config.EXPORT_FETCH_SIZE", 2):
+        chunks = [chunk async for chunk in export_orders(factory, NDJSON)]
+
+    # Порции курсора по 2 строки: заказ 1 дописывается во второй порции
+    assert len(chunks) == 2
+    lines = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert lines == [
+        {
+            "order_id": 1,
+            "order_date": "2024-01-10",
+            "buyer_id": 1,
+            "is_closed": False,
+            "items": [
+                {"flower_id": 1, "quantity": 2},
+                {"flower_id": 2, "quantity": 1},
+                {"flower_id": 3, "quantity": 5},
+            ],
+        },
+        {
+            "order_id": 2,
+            "order_date": "2024-02-20",
+            "buyer_id": 2,
+            "is_closed": True,
+            "items": [{"flower_id": 1, "quantity": 7}],
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_is_one_query(memory_client, query_budget, orders):
+    with query_budget(1):
+        response = await memory_client.get("/api/v1/admin/orders/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["order_id"] for line in response.text.splitlines()] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_export_csv_date_range(memory_client, orders):
+    response = await memory_client.get(
+        "/api/v1/admin/orders/export",
+        params={"format": CSV, "date_from": "2024-02-01", "date_to": "2024-12-31"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="orders.csv"' in response.headers["content-disposition"]
+    assert response.text.splitlines() == [
+        "order_id,order_date,buyer_id,is_closed,flower_id,quantity",
+        "2,2024-02-20,2,True,1,7",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_rejects_inverted_range(memory_client, orders):
+    response = await memory_client.get(
+        "/api/v1/admin/orders/export",
+        params={"date_from": "2024-03-01", "date_to": "2024-01-01"},
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_export_requires_admin(memory_client, orders):
+    app.dependency_overrides[current_principal] = lambda: Principal(2, 2, "Покупатель")
+
+    response = await memory_client.get("/api/v1/admin/orders/export")
+
+    assert response.status_code == 403
@@ -0,0 +1,139 @@
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.cursor import decode_cursor, encode_cursor
+from app.crud import get_flowers_page
+from app.db.models import (
+    Country,
+    Flower,
+    FloweringSeason,
+    FlowerType,
+    FlowerUsage,
+    Person,
+    saleable_flowers,
+)
+from app.db.schema import ensure_schema
+from app.schemas import FlowerFilter
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pages.db'}")
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    async with engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage, Country):
+            await conn.execute(insert(model).values(id=1, name="-"))
+        await conn.execute(
+            insert(Flower),
+            [
+                {
+                    "id": i,
+                    "name": "Роза" if i % 2 else "Пион",
+                    "variety": "-",
+                    "type_id": 1,
+                    "season_id": 1,
+                    "usage_id": 1,
+                    "country_id": 1,
+                    "price": i,
+                }
+                for i in range(1, 12)
+            ],
+        )
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+async def _walk(db, filters, limit):
+    pages, cursor = [], None
+    while True:
+        page = await get_flowers_page(db, filters, limit=limit, cursor=cursor)
+        pages.append([flower.id for flower in page.items])
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor({"id": 7, "k": -1.5})) == {"id": 7, "k": -1.5}
+    for broken in ("!!!", "bm90IGpzb24", encode_cursor([1, 2])):
+        with pytest.raises(ValueError):
+            decode_cursor(broken)
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_match_offset_pages(db):
+    pages = await _walk(db, FlowerFilter(), limit=4)
+    assert pages == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11]]
+
+    offset_page = await get_flowers_page(db, FlowerFilter(), limit=4, offset=4)
+    assert [flower.id for flower in offset_page.items] == pages[1]
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_respect_filters(db):
+    # Полная последняя страница даёт курсор, за которым пусто
+    pages = await _walk(db, FlowerFilter(name="Пион", min_price=3), limit=2)
+    assert pages == [[4, 6], [8, 10], []]
+    assert await _walk(db, FlowerFilter(max_price=5), limit=2) == [[1, 2], [3, 4], [5]]
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_follow_search_rank(db):
+    ranked = await get_flowers_page(db, FlowerFilter(q="роз"), limit=100)
+    pages = await _walk(db, FlowerFilter(q="роз"), limit=2)
+
+    assert sum(pages, []) == [flower.id for flower in ranked.items]
+    assert len(ranked.items) == 6
+
+
+@pytest.mark.asyncio
+async def test_cursor_rejected_for_other_order(db):
+    page = await get_flowers_page(db, FlowerFilter(), limit=2)
+
+    with pytest.raises(HTTPException) as exc:
+        await get_flowers_page(db, FlowerFilter(q="роз"), limit=2, cursor=page.next_cursor)
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        await get_flowers_page(db, FlowerFilter(), limit=2, cursor="garbage")
+
+
+@pytest.mark.asyncio
+async def test_pages_are_exact_with_many_sellers(db):
+    await db.execute(
+        insert(Person),
+        [
+            {
+                "id": seller,
+                "first_name": "-",
+                "last_name": "-",
+                "user_id": seller,
+                "user_type_id": 1,
+            }
+            for seller in (7, 8, 9)
+        ],
+    )
+    await db.execute(
+        insert(saleable_flowers),
+        [{"seller_id": seller, "flower_id": flower} for flower in (1, 2) for seller in (7, 8, 9)]
+        + [{"seller_id": 7, "flower_id": 5}],
+    )
+    await db.commit()
+    statements = []
+    event.listen(
+        db.bind.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+
+    page = await get_flowers_page(db, FlowerFilter(), limit=3)
+    assert [(f.id, f.seller_ids) for f in page.items] == [(1, [7, 8, 9]), (2, [7, 8, 9]), (3, [])]
+    # Страница и продавцы всех её цветков: ровно два запроса
+    assert len(statements) == 2
+
+    by_seller = await get_flowers_page(db, FlowerFilter(seller_id=7), limit=2)
+    assert [(f.id, f.seller_ids) for f in by_seller.items] == [(1, [7, 8, 9]), (2, [7, 8, 9])]
+    rest = await get_flowers_page(db, FlowerFilter(seller_id=7), cursor=by_seller.next_cursor)
+    assert [(f.id, f.seller_ids) for f in rest.items] == [(5, [7])]
@@ -0,0 +1,152 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app.core import (
+    Principal,
+    auth_service,
+    current_principal,
+    invalidate_principal,
+    issue_access_token,
+    token_claims,
+)
+from app.core.cache import TTLCache
+from app.core.principal import load_principal, principal_cache
+from app.core.revocation import revocation_mirror
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest_asyncio.fixture
+async def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr("app.db.redis.redis_client", client)
+    yield client
+    await client.aclose()
+
+
+def _db_returning(row):
+    result = MagicMock()
+    result.first.return_value = row
+    db = AsyncMock()
+    db.execute.return_value = result
+    return db
+
+
+@pytest.mark.asyncio
+async def test_load_principal_uses_single_query_and_cache():
+    db = _db_returning((7, "Продавец"))
+
+    first = await load_principal(db, 1)
+    second = await load_principal(db, 1)
+
+    assert first == second == Principal(user_id=1, person_id=7, role="Продавец")
+    assert first.is_seller and not first.is_admin
+    assert db.execute.await_count == 1
+    assert principal_cache.stats()["hits"] == 1
+    assert principal_cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_principal_forces_reload():
+    db = _db_returning((7, "Покупатель"))
+    await load_principal(db, 1)
+
+    invalidate_principal(1)
+    await load_principal(db, 1)
+
+    assert db.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_load_principal_missing_person():
+    db = _db_returning(None)
+
+    assert await load_principal(db, 1) is None
+    assert len(principal_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_access_token_claims_resolve_principal_without_db(redis):
+    db = _db_returning((7, "Продавец"))
+    token = await issue_access_token(db, 1)
+    principal_cache.clear()
+
+    claims = await token_claims(token)
+    other_db = AsyncMock()
+    principal = await current_principal(claims, other_db)
+
+    assert claims["role"] == "s" and claims["pid"] == 7 and claims["ver"] == 0
+    assert principal == Principal(user_id=1, person_id=7, role="Продавец")
+    other_db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_token_version_bump_rejects_outstanding_tokens(redis, monkeypatch):
+    monkeypatch.setattr(revocation_mirror, "_versions", TTLCache(maxsize=100, ttl=60))
+    token = await issue_access_token(_db_returning((7, "Продавец")), 1)
+
+    await auth_service.bump_token_version(1)
+
+    with pytest.raises(HTTPException) as exc:
+        await token_claims(token)
+    assert exc.value.status_code == 401
+
+    fresh = await issue_access_token(_db_returning((7, "Покупатель")), 1)
+    assert (await token_claims(fresh))["ver"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_version_message_from_other_worker(redis, monkeypatch):
+    monkeypatch.setattr(revocation_mirror, "_versions", TTLCache(maxsize=100, ttl=60))
+
+    revocation_mirror._apply_message("version:42:3")
+    revocation_mirror._apply_message("version:42:2")
+
+    assert await revocation_mirror.token_version(42) == 3
+    assert await revocation_mirror.token_version(43) == 0
+
+
+@pytest.mark.asyncio
+async def test_version_message_drops_cached_principal(monkeypatch):
+    monkeypatch.setattr(revocation_mirror, "_versions", TTLCache(maxsize=100, ttl=60))
+    await load_principal(_db_returning((7, "Покупатель")), 42)
+
+    # Роль сменили на другом воркере: сюда приходит только новая версия токенов
+    revocation_mirror._apply_message("version:42:1")
+
+    assert principal_cache.get(42) is None
+
+
+@pytest.mark.asyncio
+async def test_issued_token_role_bypasses_stale_cache(redis, monkeypatch):
+    monkeypatch.setattr(revocation_mirror, "_versions", TTLCache(maxsize=100, ttl=60))
+    revocation_mirror.set_token_version(1, 1)
+    await redis.set("token_version:1", 1)
+    principal_cache.set(1, Principal(user_id=1, person_id=7, role="Покупатель"))
+
+    token = await issue_access_token(_db_returning((7, "Продавец")), 1)
+
+    claims = await token_claims(token)
+    assert claims["role"] == "s" and claims["ver"] == 1
+    assert principal_cache.get(1).role == "Продавец"
+
+
+@pytest.mark.asyncio
+async def test_issued_token_version_comes_from_redis(redis, monkeypatch):
+    # Этот воркер пропустил увеличение версии, сделанное другим
+    monkeypatch.setattr(revocation_mirror, "_versions", TTLCache(maxsize=100, ttl=60))
+    await redis.set("token_version:1", 2)
+
+    token = await issue_access_token(_db_returning((7, "Продавец")), 1)
+
+    assert (await token_claims(token))["ver"] == 2
+    assert await revocation_mirror.token_version(1) == 2
@@ -0,0 +1,288 @@
+from datetime import date
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import Principal, current_principal, verify_token
+from app.db.models import (
+    Address,
+    Country,
+    Flower,
+    FloweringSeason,
+    FlowerType,
+    FlowerUsage,
+    Order,
+    Person,
+    User,
+    UserType,
+    ordered_flowers,
+    saleable_flowers,
+)
+from app.main import app
+
+BUYER = Principal(user_id=1, person_id=1, role="Покупатель")
+SELLER = Principal(user_id=2, person_id=2, role="Продавец")
+ADMIN = Principal(user_id=3, person_id=3, role="Админ")
+ORDERS = 10
+FLOWERS = 5
+
+
+def login(principal: Principal) -> None:
+    app.dependency_overrides[current_principal] = lambda: principal
+
+
+@pytest_asyncio.fixture
+async def seeded(memory_engine):
+    async with memory_engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage):
+            await conn.execute(insert(model).values(id=1, name="-"))
+        await conn.execute(insert(Country).values(id=1, name="Россия", code="RU"))
+        await conn.execute(
+            insert(Address).values(
+                id=1, street="Ленина, 1", city="Москва", postal_code="101000", country_id=1
+            )
+        )
+        await conn.execute(
+            insert(UserType), [{"id": p.person_id, "name": p.role} for p in (BUYER, SELLER, ADMIN)]
+        )
+        await conn.execute(
+            insert(User),
+            [
+                {"id": i, "email": f"user{i}@flowerhub.test", "password_hash": "-", "role_id": 1}
+                for i in (1, 2, 3)
+            ],
+        )
+        await conn.execute(
+            insert(Person),
+            [
+                {
+                    "id": i,
+                    "first_name": "-",
+                    "last_name": "-",
+                    "display_name": "-",
+                    "user_id": i,
+                    "address_id": 1 if i == 1 else None,
+                    "user_type_id": i,
+                }
+                for i in (1, 2, 3)
+            ],
+        )
+        await conn.execute(
+            insert(Flower),
+            [
+                {
+                    "id": i,
+                    "name": f"Роза {i}",
+                    "variety": "-",
+                    "type_id": 1,
+                    "season_id": 1,
+                    "usage_id": 1,
+                    "country_id": 1,
+                    "price": i,
+                }
+                for i in range(1, FLOWERS + 1)
+            ],
+        )
+        await conn.execute(
+            insert(saleable_flowers),
+            [{"seller_id": 2, "flower_id": i} for i in range(1, FLOWERS + 1)],
+        )
+        await conn.execute(
+            insert(Order),
+            [
+                {"id": i, "buyer_id": 1, "order_date": date(2026, 1, 1), "is_closed": False}
+                for i in range(1, ORDERS + 1)
+            ],
+        )
+        await conn.execute(
+            insert(ordered_flowers),
+            [
+                {"order_id": order_id, "flower_id": flower_id, "quantity": 1}
+                for order_id in range(1, ORDERS + 1)
+                for flower_id in range(1, FLOWERS + 1)
+            ],
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "principal, url, limit",
+    [
+        (BUYER, "/api/v1/order/orders", 2),
+        (BUYER, "/api/v1/order/orders/1", 2),
+        (SELLER, "/api/v1/seller/orders", 2),
+        (ADMIN, "/api/v1/admin/orders", 2),
+        (BUYER, "/api/v1/flowers/", 2),
+    ],
+)
+async def test_endpoint_query_budget(memory_client, query_budget, seeded, principal, url, limit):
+    login(principal)
+
+    with query_budget(limit):
+        response = await memory_client.get(url)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_user_profile_is_one_query(memory_client, query_budget, seeded):
+    app.dependency_overrides[verify_token] = lambda: 1
+
+    with query_budget(1):
+        response = await memory_client.get("/api/v1/user/")
+
+    assert response.status_code == 200
+    assert response.json()["address"] == {
+        "street": "Ленина, 1",
+        "city": "Москва",
+        "postal_code": "101000",
+        "country_name": "Россия",
+        "country_code": "RU",
+    }
+
+
+@pytest.mark.asyncio
+async def test_user_profile_without_address(memory_client, seeded):
+    app.dependency_overrides[verify_token] = lambda: 2
+
+    response = await memory_client.get("/api/v1/user/")
+
+    assert response.status_code == 200
+    assert response.json()["is_user_seller"] is True
+    assert response.json()["address"] is None
+
+
+@pytest.mark.asyncio
+async def test_orders_carry_all_items(memory_client, seeded):
+    login(BUYER)
+
+    response = await memory_client.get("/api/v1/order/orders")
+
+    orders = response.json()
+    assert [order["order_id"] for order in orders] == list(range(1, ORDERS + 1))
+    assert all(len(order["items"]) == FLOWERS for order in orders)
+
+
+@pytest.mark.asyncio
+async def test_make_order_query_budget(memory_client, memory_engine, query_budget, seeded):
+    login(BUYER)
+    items = [{"flower_id": i, "quantity": 2} for i in range(1, FLOWERS + 1)]
+
+    # Покупатель, цветы, заказ и позиции одним executemany
+    with query_budget(4):
+        response = await memory_client.post("/api/v1/order/", json={"items": items})
+
+    assert response.status_code == 200
+    async with memory_engine.connect() as conn:
+        result = await conn.execute(
+            select(ordered_flowers.c.flower_id).where(ordered_flowers.c.order_id == ORDERS + 1)
+        )
+    assert sorted(result.scalars()) == list(range(1, FLOWERS + 1))
+
+
+@pytest.mark.asyncio
+async def test_make_order_unknown_flower(memory_client, seeded):
+    login(BUYER)
+    items = [{"flower_id": 1, "quantity": 1}, {"flower_id": 404, "quantity": 1}]
+
+    response = await memory_client.post("/api/v1/order/", json={"items": items})
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Цветок с ID 404 не найден"
+
+
+@pytest.mark.asyncio
+async def test_query_budget_fails_when_exceeded(memory_engine, query_budget):
+    async with AsyncSession(memory_engine) as session:
+        with pytest.raises(AssertionError, match="Выполнено 2 SQL-запросов при бюджете 1"):
+            with query_budget(1):
+                await session.execute(select(1))
+                await session.execute(select(2))
+
+
+@pytest.mark.asyncio
+async def test_relationships_do_not_lazy_load(memory_engine, seeded):
+    async with AsyncSession(memory_engine) as session:
+        order = await session.get(Order, 1)
+
+        with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+            order.flowers
+
+
+@pytest.mark.asyncio
+async def test_add_flower_commits_once(memory_client, memory_engine, query_budget, seeded):
+    login(SELLER)
+    commits = []
+    event.listen(memory_engine.sync_engine, "commit", commits.append)
+    flower = {
+        "name": "Тюльпан",
+        "variety": "-",
+        "type_id": 1,
+        "season_id": 1,
+        "usage_id": 1,
+        "country_id": 1,
+        "price": 7,
+    }
+
+    # INSERT ... RETURNING цветка и связка с продавцом, без refresh
+    with query_budget(2):
+        response = await memory_client.post("/api/v1/seller/flowers", json=flower)
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Тюльпан"
+    assert len(commits) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_handler_rolls_back_unit_of_work(memory_client, memory_engine, seeded):
+    login(SELLER)
+    flower = {
+        "name": "Тюльпан",
+        "variety": "-",
+        "type_id": 1,
+        "season_id": 1,
+        "usage_id": 1,
+        "country_id": 1,
+        "price": 7,
+    }
+
+    with patch(
+        "app.api.v1.seller.add_flower_to_seller",
+        new=AsyncMock(side_effect=HTTPException(status_code=409, detail="-")),
+    ):
+        response = await memory_client.post("/api/v1/seller/flowers", json=flower)
+
+    assert response.status_code == 409
+    async with memory_engine.connect() as conn:
+        assert await conn.scalar(select(func.count()).select_from(Flower)) == FLOWERS
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "method, url, body",
+    [
+        ("put", "/api/v1/seller/flowers/1", {"price": 99}),
+        ("put", "/api/v1/seller/change_order_status/1", None),
+    ],
+)
+async def test_updates_are_one_statement(memory_client, query_budget, seeded, method, url, body):
+    login(SELLER)
+
+    with query_budget(1):
+        response = await memory_client.request(method, url, json=body)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_change_order_status_unknown_order(memory_client, seeded):
+    login(SELLER)
+
+    response = await memory_client.put("/api/v1/seller/change_order_status/404")
+
+    assert response.status_code == 404
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from redis.asyncio import Redis
+
+from app.core.cache import TTLCache
+from app.core.security import AuthService
+
+REPLY_DELAY = 0.1
+
+_store: dict[str, int] = {}
+
+
+async def _read_command(reader: asyncio.StreamReader) -> list[str]:
+    header = await reader.readline()
+    if not header:
+        return []
+    args = []
+    for _ in range(int(header[1:])):
+        length = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(length + 2))[:-2].decode())
+    return args
+
+
+async def _handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    # Минимальный RESP-сервер: отвечает с задержкой, имитируя медленную сеть
+    while command := await _read_command(reader):
+        name = command[0].upper()
+        if name == "EVALSHA":
+            # Скрипт увеличения версии: EVALSHA sha numkeys key user_id channel ttl
+            await asyncio.sleep(REPLY_DELAY)
+            _store[command[3]] = _store.get(command[3], 0) + 1
+            writer.write(b":%d\r\n" % _store[command[3]])
+        else:
+            writer.write(b"+OK\r\n")
+        await writer.drain()
+    writer.close()
+
+
+@pytest_asyncio.fixture
+async def fake_redis(monkeypatch):
+    _store.clear()
+    server = await asyncio.start_server(_handle_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    client = Redis(host="127.0.0.1", port=port, decode_responses=True, max_connections=8)
+    monkeypatch.setattr("app.db.redis.redis_client", client)
+    yield client
+    await client.aclose()
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_token_version_bump_does_not_block_event_loop(fake_redis, monkeypatch):
+    service = AuthService()
+    monkeypatch.setattr("app.core.security.revocation_mirror._versions", TTLCache(100, 60))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    task = asyncio.create_task(ticker())
+    version = await service.bump_token_version(1)
+    task.cancel()
+
+    assert version == 1
+    # За медленную операцию Redis event loop продолжал обслуживать другие задачи
+    assert ticks >= REPLY_DELAY / 0.005 * 0.5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_version_bumps_overlap(fake_redis, monkeypatch):
+    service = AuthService()
+    monkeypatch.setattr("app.core.security.revocation_mirror._versions", TTLCache(100, 60))
+
+    start = asyncio.get_running_loop().time()
+    versions = await asyncio.gather(*(service.bump_token_version(i) for i in range(5)))
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert versions == [1] * 5
+    # Последовательно пять увеличений заняли бы пять задержек
+    assert elapsed < 5 * REPLY_DELAY
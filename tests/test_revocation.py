@@ -0,0 +1,147 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app.core import auth_service, verify_token
+from app.core.cache import TTLCache
+from app.core.revocation import TOKEN_VERSION_TTL, RevocationMirror, revocation_mirror
+
+
+@pytest_asyncio.fixture
+async def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr("app.db.redis.redis_client", client)
+    monkeypatch.setattr(revocation_mirror, "_versions", TTLCache(maxsize=100, ttl=60))
+    yield client
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_mirror_receives_versions_from_other_workers(redis):
+    mirror = RevocationMirror(channel=revocation_mirror.channel, resync_interval=60)
+    await mirror.start(redis)
+    try:
+        # Даём слушателю подписаться на канал
+        await asyncio.sleep(0.1)
+        await redis.publish(revocation_mirror.channel, "version:7:2")
+
+        for _ in range(50):
+            if mirror._versions.get("7") == 2:
+                break
+            await asyncio.sleep(0.05)
+        assert await mirror.token_version(7) == 2
+    finally:
+        await mirror.stop()
+
+
+@pytest.mark.asyncio
+async def test_version_bump_is_published_with_increment(redis):
+    async with redis.pubsub() as pubsub:
+        await pubsub.subscribe(revocation_mirror.channel)
+        await pubsub.get_message(timeout=1.0)
+
+        assert await auth_service.bump_token_version(9) == 1
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+
+    assert message["data"] == "version:9:1"
+    assert await redis.get("token_version:9") == "1"
+
+
+@pytest.mark.asyncio
+async def test_verify_token_rejects_outdated_token(redis):
+    token = auth_service.create_access_token(5, ver=0)
+    assert await verify_token(token) == "5"
+
+    await auth_service.bump_token_version(5)
+
+    with pytest.raises(HTTPException) as exc:
+        await verify_token(token)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_token_versions_expire_and_are_read_lazily(redis, monkeypatch):
+    assert await auth_service.bump_token_version(9) == 1
+    assert await auth_service.bump_token_version(9) == 2
+    assert await revocation_mirror.token_version(9) == 2
+    # Ключ версии не живёт вечно: срок не меньше времени жизни access токена
+    assert 0 < await redis.ttl("token_version:9") <= TOKEN_VERSION_TTL
+
+    # Другой воркер без подписки на сообщения читает версию одним GET
+    mirror = RevocationMirror(channel="test", resync_interval=60)
+    with patch.object(redis, "scan_iter") as scan_iter:
+        assert await mirror.token_version(9) == 2
+        assert await mirror.token_version(10) == 0
+    scan_iter.assert_not_called()
+
+    await redis.set("token_version:10", 1)
+    # Версия хранится в зеркале и перечитывается только после resync_interval
+    assert await mirror.token_version(10) == 0
+    now = time.monotonic()
+    monkeypatch.setattr("time.monotonic", lambda: now + 61)
+    assert await mirror.token_version(10) == 1
+
+
+def test_reset_drops_versions_and_notifies_listeners():
+    mirror = RevocationMirror(channel="test", resync_interval=60)
+    changed = []
+    mirror.on_version_change(changed.append)
+    mirror.set_token_version(3, 1)
+    changed.clear()
+
+    mirror.reset()
+
+    assert changed == [3]
+    assert mirror._versions.get("3") is None
+
+
+def _jti(token):
+    return auth_service.decode_token(token)["jti"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refresh_rotation_has_single_winner(redis):
+    old_token = await auth_service.create_refresh_token(3)
+
+    results = await asyncio.gather(
+        *(auth_service.rotate_refresh_token(_jti(old_token), 3) for _ in range(20))
+    )
+
+    winners = [token for token in results if token is not None]
+    assert len(winners) == 1
+    assert await redis.exists(f"rt:{_jti(old_token)}") == 0
+    assert await redis.get(f"rt:{_jti(winners[0])}") == "3"
+    assert await redis.smembers("rt_user:3") == {_jti(winners[0])}
+    assert await auth_service.rotate_refresh_token(_jti(old_token), 3) is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotation_checks_token_owner(redis):
+    token = await auth_service.create_refresh_token(3)
+
+    assert await auth_service.rotate_refresh_token(_jti(token), 4) is None
+    assert await auth_service.rotate_refresh_token(None, 3) is None
+    assert await auth_service.rotate_refresh_token(_jti(token), 3) is not None
+
+
+@pytest.mark.asyncio
+async def test_revoke_all_sessions_in_one_call(redis, monkeypatch):
+    monkeypatch.setattr(revocation_mirror, "_versions", TTLCache(maxsize=100, ttl=60))
+    refresh_tokens = [await auth_service.create_refresh_token(8) for _ in range(3)]
+    other = await auth_service.create_refresh_token(9)
+    access_token = auth_service.create_access_token(8)
+
+    assert await auth_service.revoke_all_sessions(8) == 3
+
+    for token in refresh_tokens:
+        assert await auth_service.rotate_refresh_token(_jti(token), 8) is None
+    assert await redis.exists("rt_user:8") == 0
+    assert await redis.get("token_version:8") == "1"
+    assert await auth_service.rotate_refresh_token(_jti(other), 9) is not None
+    with pytest.raises(HTTPException):
+        await verify_token(access_token)
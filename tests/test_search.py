@@ -0,0 +1,89 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.crud import get_flowers
+from app.crud.search import apply_search, search_params, search_terms
+from app.db.models import Country, Flower, FloweringSeason, FlowerType, FlowerUsage
+from app.db.schema import ensure_schema
+from app.schemas import FlowerFilter
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'search.db'}")
+    async with engine.connect() as conn:
+        await conn.run_sync(ensure_schema)
+    async with engine.begin() as conn:
+        for model in (FlowerType, FloweringSeason, FlowerUsage, Country):
+            await conn.execute(insert(model).values(id=1, name="-"))
+        base = {"type_id": 1, "season_id": 1, "usage_id": 1, "country_id": 1, "price": 10}
+        await conn.execute(
+            insert(Flower),
+            [
+                {"id": 1, "name": "Тюльпан", "variety": "Розовый", **base},
+                {"id": 2, "name": "Роза красная", "variety": "Эквадор", **base},
+                {"id": 3, "name": "Ромашка", "variety": "Полевая", **base},
+            ],
+        )
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+async def _search(db, q, **kwargs):
+    return [flower.id for flower in await get_flowers(db, FlowerFilter(q=q), **kwargs)]
+
+
+def test_search_terms():
+    assert search_terms("Роза, КРАСНАЯ!") == ["роза", "красная"]
+    assert search_terms('"OR * NEAR(') == ["or", "near"]
+    assert search_terms("%%") == []
+
+
+@pytest.mark.asyncio
+async def test_search_orders_name_matches_first(db):
+    # Совпадение в названии весит больше совпадения в сорте
+    assert await _search(db, "роз") == [2, 1]
+    assert await _search(db, "роз", limit=1, offset=1) == [1]
+    assert await _search(db, "роза красн") == [2]
+    assert await _search(db, "полев") == [3]
+    assert await _search(db, "%%") == []
+
+
+@pytest.mark.asyncio
+async def test_search_index_follows_changes(db):
+    await db.execute(update(Flower).where(Flower.id == 3).values(name="Хризантема"))
+    await db.execute(text("DELETE FROM flower WHERE id = 2"))
+    await db.commit()
+
+    assert await _search(db, "роз") == [1]
+    assert await _search(db, "хризант") == [3]
+    assert await _search(db, "ромашк") == []
+
+
+def test_postgres_search_uses_index_expression():
+    terms = search_terms("Роза красная")
+    query, rank = apply_search(select(Flower), "postgresql", len(terms))
+    sql = str(query.order_by(rank).compile(dialect=postgresql.dialect()))
+
+    # Скобки не меняют дерево выражения: PostgreSQL сопоставит его с индексом ix_flower_search
+    assert (
+        "to_tsvector('simple'::regconfig, (coalesce(flower.name, '') || ' ') || "
+        "coalesce(flower.variety, '')) @@ to_tsquery('simple'::regconfig, %(search)s)"
+    ) in sql
+    assert "ORDER BY -ts_rank(" in sql
+    assert search_params("postgresql", terms) == {"search": "роза:* & красная:*"}
+
+
+def test_fallback_search_params_match_conditions():
+    query, rank = apply_search(select(Flower), "mysql", 2)
+
+    assert rank is None
+    assert set(query.compile().params) == set(search_params("mysql", ["роза", "красн"]))
+    assert search_params("mysql", ["роза", "красн"]) == {
+        "search_0": "%роза%",
+        "search_1": "%красн%",
+    }
@@ -0,0 +1,89 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+
+from app.core import auth_service, config, verify_token
+from app.core.security import AuthService
+from app.core.token import token_cache
+
+
+@pytest.fixture
+def service():
+    service = AuthService()
+    service.hash_workers = 1
+    yield service
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_password_in_pool(service):
+    hashed = await service.hash_password("password123")
+
+    assert hashed != "password123"
+    assert await service.verify_password("password123", hashed) is True
+    assert await service.verify_password("wrong_password", hashed) is False
+
+
+@pytest.mark.asyncio
+async def test_verify_and_update_rehashes_outdated_cost(service):
+    outdated = bcrypt.using(rounds=4).hash("password123")
+
+    valid, new_hash = await service.verify_and_update("password123", outdated)
+    assert valid is True
+    assert new_hash.startswith(f"$2b${config.BCRYPT_ROUNDS:02d}$")
+    assert await service.verify_and_update("password123", new_hash) == (True, None)
+    assert await service.verify_and_update("wrong_password", outdated) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_hash_queue_overflow_returns_503(service):
+    service.hash_queue_limit = 1
+    service._hash_pending = 1
+
+    with pytest.raises(HTTPException) as exc:
+        await service.hash_password("password123")
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_hashing_does_not_block_event_loop(service):
+    hashed = await service.hash_password("password123")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.gather(*(service.verify_password("password123", hashed) for _ in range(4)))
+    task.cancel()
+
+    assert ticks > 10
+
+
+@pytest.mark.asyncio
+async def test_verify_token_decodes_each_token_once():
+    token_cache.clear()
+    token = auth_service.create_access_token(5)
+
+    with patch.object(auth_service, "decode_token", wraps=auth_service.decode_token) as decode:
+        assert await verify_token(token) == "5"
+        assert await verify_token(token) == "5"
+
+    assert decode.call_count == 1
+    assert token_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_verify_token_rejects_invalid_token():
+    with pytest.raises(HTTPException) as exc:
+        await verify_token("not-a-token")
+
+    assert exc.value.status_code == 401
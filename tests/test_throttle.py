@@ -0,0 +1,104 @@
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError
+
+from app.core import metrics
+from app.core.throttle import SlidingWindowThrottle
+from app.main import app
+
+
+@pytest_asyncio.fixture
+async def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr("app.db.redis.redis_client", client)
+    yield client
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_email_limit_returns_429_with_retry_after(redis):
+    throttle = SlidingWindowThrottle(ip_limit=10, email_limit=2, window=60)
+
+    await throttle.check("login", "1.1.1.1", "a@b.c")
+    await throttle.check("login", "1.1.1.2", "A@b.c")
+    with pytest.raises(HTTPException) as exc:
+        await throttle.check("login", "1.1.1.3", "a@b.c")
+
+    assert exc.value.status_code == 429
+    assert 0 < int(exc.value.headers["Retry-After"]) <= 60
+    assert await redis.zcard("throttle:login:email:a@b.c") == 2
+    assert metrics.snapshot()["counters"]["throttle.login.email.rejected"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_ip_limit_is_shared_across_emails_and_scoped(redis):
+    throttle = SlidingWindowThrottle(ip_limit=2, email_limit=10, window=60)
+
+    await throttle.check("login", "1.1.1.1", "a@b.c")
+    await throttle.check("login", "1.1.1.1", "d@e.f")
+    await throttle.check("register", "1.1.1.1", "g@h.i")
+    with pytest.raises(HTTPException):
+        await throttle.check("login", "1.1.1.1", "x@y.z")
+
+
+@pytest.mark.asyncio
+async def test_window_slides(redis, monkeypatch):
+    throttle = SlidingWindowThrottle(ip_limit=1, email_limit=1, window=60)
+    now = 1_000_000.0
+    monkeypatch.setattr("app.core.throttle.time.time", lambda: now)
+
+    await throttle.check("login", None, "a@b.c")
+    with pytest.raises(HTTPException):
+        await throttle.check("login", None, "a@b.c")
+
+    now += 61
+    await throttle.check("login", None, "a@b.c")
+
+
+@pytest.mark.asyncio
+async def test_local_fallback_when_redis_unavailable():
+    broken = AsyncMock(side_effect=ConnectionError("down"))
+    throttle = SlidingWindowThrottle(ip_limit=5, email_limit=1, window=60)
+
+    with patch("app.core.throttle.get_redis") as get_redis:
+        get_redis.return_value.register_script.return_value = broken
+        await throttle.check("login", "1.1.1.1", "a@b.c")
+        with pytest.raises(HTTPException) as exc:
+            await throttle.check("login", "1.1.1.1", "a@b.c")
+
+    assert exc.value.status_code == 429
+    throttle.reset()
+
+
+def test_local_windows_expire_and_are_bounded(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("time.monotonic", lambda: now)
+    throttle = SlidingWindowThrottle(ip_limit=5, email_limit=1, window=60, local_keys=2)
+
+    for ip in ("1.1.1.1", "1.1.1.2", "1.1.1.3"):
+        assert throttle._hit_local(ip, 1) == 0
+    # Самое старое окно вытеснено, размер не превышает local_keys
+    assert len(throttle._local) == 2
+    assert throttle._hit_local("1.1.1.3", 1) == 60
+
+    now += 61
+    assert throttle._local.get("1.1.1.3") is None
+    assert len(throttle._local) == 1
+
+
+def test_login_rejected_before_user_lookup(monkeypatch):
+    monkeypatch.setattr("app.db.redis.redis_client", fakeredis.FakeAsyncRedis())
+    client = TestClient(app)
+    user_data = {"email": "flood@example.com", "password": "password123"}
+
+    with patch("app.api.v1.auth.get_user_by_email", new_callable=AsyncMock) as mock_get_user:
+        mock_get_user.return_value = None
+        statuses = [client.post("/api/v1/auth/login", json=user_data).status_code for _ in range(6)]
+
+    assert statuses == [400] * 5 + [429]
+    assert mock_get_user.await_count == 5
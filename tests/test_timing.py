@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core import Principal, auth_service, current_principal
+from app.core.timing import RequestTimings, record, request_timings, timed
+from app.db.database import instrument_queries
+from app.main import app
+
+
+def test_server_timing_header():
+    timings = RequestTimings()
+    timings.add("db", 0.002)
+    timings.add("db", 0.003)
+    timings.add("hash", 0.25)
+
+    assert timings.server_timing(260.04) == (
+        'db;desc="2";dur=5.0, hash;desc="1";dur=250.0, total;dur=260.0'
+    )
+    assert timings.summary() == "db: 2 за 5.0 мс, hash: 1 за 250.0 мс"
+
+
+def test_record_outside_request_is_ignored():
+    with timed("redis"):
+        pass
+    record("db", 1.0)
+
+    assert request_timings.get() is None
+
+
+@pytest.mark.asyncio
+async def test_timed_collects_in_request_context():
+    timings = RequestTimings()
+    token = request_timings.set(timings)
+    try:
+        with timed("redis"):
+            await asyncio.sleep(0.01)
+        # Задачи, созданные внутри запроса, наследуют его замеры
+        await asyncio.create_task(asyncio.to_thread(record, "db", 0.5))
+    finally:
+        request_timings.reset(token)
+
+    assert timings.counts == {"redis": 1, "db": 1}
+    assert timings.seconds["redis"] >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_is_timed():
+    timings = RequestTimings()
+    token = request_timings.set(timings)
+    try:
+        with patch.object(auth_service, "_get_hash_executor", return_value=None):
+            await auth_service.hash_password("secret")
+    finally:
+        request_timings.reset(token)
+
+    assert timings.counts == {"hash": 1}
+
+
+@pytest.mark.asyncio
+async def test_response_carries_sql_timing(memory_client, memory_engine):
+    instrument_queries(memory_engine)
+    app.dependency_overrides[current_principal] = lambda: Principal(1, 1, "Покупатель")
+
+    response = await memory_client.get("/api/v1/order/orders")
+
+    assert response.status_code == 200
+    header = response.headers["Server-Timing"]
+    assert header.startswith('db;desc="1";dur=')
+    assert ", total;dur=" in header
+
+
+@pytest.mark.asyncio
+async def test_slow_request_log_names_phases(memory_client, caplog):
+    with (
+        patch("app.main.THRESHOLD_MS", -1),
+        patch("app.api.v1.flower.get_flowers_page", new=AsyncMock()) as get_page,
+    ):
+        get_page.return_value.items = []
+        get_page.return_value.next_cursor = None
+        with caplog.at_level(logging.WARNING, logger="app.main"):
+            response = await memory_client.get("/api/v1/flowers/")
+
+    assert response.status_code == 200
+    assert "без обращений к БД, Redis и bcrypt" in caplog.text
@@ -5,6 +5,9 @@ from fastapi import status
 from httpx import ASGITransport, AsyncClient
 
 from app.api.v1.user import UserAPI
+from app.core import auth_service, optional_token_claims
+from app.core.cache import TTLCache
+from app.core.revocation import revocation_mirror
 from app.schemas import UserData
 
 user_api = UserAPI()
@@ -23,6 +26,7 @@ def app():
     from app.core import verify_token
 
     app.dependency_overrides[verify_token] = override_verify_token
+    app.dependency_overrides[optional_token_claims] = lambda: {"sub": "123"}
 
     return app
 
@@ -107,7 +111,6 @@ async def test_update_user_password(app):
 async def test_get_user_by_id_success(app, test_user_data):
     with (
         patch("app.api.v1.user.get_user_by_id", new_callable=AsyncMock) as mock_get_user,
-        patch("app.api.v1.user.auth_service.decode_token", return_value={"sub": "123"}),
     ):
         mock_get_user.side_effect = [test_user_data, test_user_data]  # get_user_data и user_data
 
@@ -146,7 +149,6 @@ async def test_get_user_by_id_forbidden(app, test_user_data):
 
     with (
         patch("app.api.v1.user.get_user_by_id", new_callable=AsyncMock) as mock_get_user,
-        patch("app.api.v1.user.auth_service.decode_token", return_value={"sub": "123"}),
     ):
         mock_get_user.side_effect = [unauthorized_user, requested_user]
 
@@ -162,7 +164,6 @@ async def test_get_user_by_id_forbidden(app, test_user_data):
 async def test_get_user_by_id_not_found(app):
     with (
         patch("app.api.v1.user.get_user_by_id", new_callable=AsyncMock) as mock_get_user,
-        patch("app.api.v1.user.auth_service.decode_token", return_value={"sub": "123"}),
     ):
         mock_get_user.side_effect = [None, None]
 
@@ -172,3 +173,33 @@ async def test_get_user_by_id_not_found(app):
 
         assert response.status_code == status.HTTP_502_BAD_GATEWAY
         assert response.json()["detail"] == "Данные пользователя недействительны"
+
+
+@pytest.mark.asyncio
+async def test_get_user_by_id_rejects_revoked_token(app, monkeypatch):
+    del app.dependency_overrides[optional_token_claims]
+    monkeypatch.setattr(revocation_mirror, "_versions", TTLCache(maxsize=100, ttl=60))
+    token = auth_service.create_access_token(123, ver=0)
+    revocation_mirror.set_token_version(123, 1)
+
+    with patch("app.api.v1.user.get_user_by_id", new_callable=AsyncMock) as mock_get_user:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get("/user/0", headers={"X-Token": token})
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    mock_get_user.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_user_by_id_anonymous_sees_seller(app, test_user_data):
+    del app.dependency_overrides[optional_token_claims]
+
+    with patch("app.api.v1.user.get_user_by_id", new_callable=AsyncMock) as mock_get_user:
+        mock_get_user.return_value = test_user_data
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get("/user/0")
+
+    assert response.status_code == 200
+    mock_get_user.assert_awaited_once_with(ANY, 0)